@@ -1,37 +1,61 @@
 """Sales agent implementation using pydantic-ai for customer interactions."""
 
+import functools
 import os
 
-import boto3
-from dynamodb.campaign import CampaignDDB
+from aws_clients import get_client
 from pydantic_ai import Agent, RunContext, ToolOutput
 from pydantic_ai.models.bedrock import BedrockConverseModel
-from utils import get_boto3_session_config
+from pydantic_ai.providers.bedrock import BedrockProvider
+from storage import get_storage
+from utils import is_lazy_init_enabled
 
 from agent.models import AgentContext, AgentResponse
-from agent.prompt import SYSTEM_PROMPT
+from agent.prompt import SUMMARY_PROMPT, SYSTEM_PROMPT
 
-session = boto3.Session(**get_boto3_session_config())
-bedrock_client = session.client("bedrock-runtime")
 
-# Initialize the Bedrock model
-bedrock_model = BedrockConverseModel(model_name=os.environ["BEDROCK_MODEL_NAME"])
+@functools.cache
+def get_bedrock_model() -> BedrockConverseModel:
+    """Get the Bedrock model on the shared Bedrock runtime client, creating it on first use."""
+    return BedrockConverseModel(
+        model_name=os.environ["BEDROCK_MODEL_NAME"],
+        provider=BedrockProvider(bedrock_client=get_client("bedrock-runtime")),
+    )
 
-# Sales rep agent with structured output and knowledge base tool
+
+# Sales rep agent with structured output and knowledge base tool.
+# With lazy initialization the model is passed to each run instead.
 sales_agent = Agent[AgentContext, AgentResponse](
-    model=bedrock_model,
+    model=None if is_lazy_init_enabled() else get_bedrock_model(),
     instructions=SYSTEM_PROMPT,
     output_type=ToolOutput(AgentResponse),
 )
 
+# Condenses turns that fell out of the history window into the rolling summary
+summary_agent = Agent[None, str](
+    model=None if is_lazy_init_enabled() else get_bedrock_model(),
+    instructions=SUMMARY_PROMPT,
+    output_type=str,
+)
+
 
 @sales_agent.instructions
 async def add_campaign_context(ctx: RunContext[AgentContext]) -> str:
     """Add campaign context to agent instructions based on the most recent campaign."""
     campaign_details = "No campaign context available."
-    if ctx.deps.most_recent_campaign_id:
-        campaign = CampaignDDB.get_campaign(ctx.deps.most_recent_campaign_id)
+    if ctx.deps.campaign_details:
+        campaign_details = ctx.deps.campaign_details
+    elif ctx.deps.most_recent_campaign_id:
+        campaign = await get_storage().get_campaign(ctx.deps.most_recent_campaign_id)
         if campaign and campaign.campaign_details:
             campaign_details = campaign.campaign_details
 
     return f"<campaign_context>{campaign_details}</campaign_context>"
+
+
+@sales_agent.instructions
+def add_conversation_summary(ctx: RunContext[AgentContext]) -> str:
+    """Add the summary of turns older than the history window, if there is one."""
+    if not ctx.deps.conversation_summary:
+        return ""
+    return f"<conversation_summary>{ctx.deps.conversation_summary}</conversation_summary>"
@@ -54,3 +54,7 @@ class AgentContext:
     customer_name: str
     customer_email: str | None = None
     most_recent_campaign_id: str | None = None
+    # Prefetched campaign details; when None the instructions hook loads them itself
+    campaign_details: str | None = None
+    # Rolling summary of turns older than the history window, in windowed history mode
+    conversation_summary: str | None = None
@@ -1,4 +1,4 @@
-"""System prompt configuration and loading for the sales agent."""
+"""System prompt configuration and loading for the sales and summary agents."""
 
 import logging
 import pathlib
@@ -6,6 +6,7 @@ import pathlib
 logger = logging.getLogger(__name__)
 
 SYSTEM_PROMPT = None
+SUMMARY_PROMPT = None
 
 __root_dir = pathlib.Path(__file__).parent.parent.resolve()
 
@@ -15,3 +16,10 @@ try:
 except Exception as e:
     logger.error(f"Error loading system prompt: {e}")
     raise e
+
+try:
+    with open(__root_dir / "prompts" / "summary-prompt.md", "r") as f:
+        SUMMARY_PROMPT = f.read()
+except Exception as e:
+    logger.error(f"Error loading summary prompt: {e}")
+    raise e
@@ -1,21 +1,90 @@
-from dynamodb.models import ChatMessage
+from typing import AsyncIterable, AsyncIterator, Iterable, Iterator
+
+from dynamodb.models import ChatMessage, HistoryMessage
 from pydantic_ai.messages import ModelRequest, ModelResponse, TextPart, UserPromptPart
 
 
+def convert_message(
+    msg: ChatMessage | HistoryMessage,
+) -> ModelRequest | ModelResponse | None:
+    """Convert a database message to pydantic-ai message format, None if it is skipped."""
+    # Skip messages that have been intervened by guardrails
+    if msg.guardrails_intervened:
+        return None
+    if msg.direction == "inbound":
+        # User message
+        return ModelRequest(parts=[UserPromptPart(content=msg.message)])
+    # Campaign message or AI response or manual response from human agent
+    return ModelResponse(parts=[TextPart(content=msg.message)])
+
+
+def iter_history_messages(
+    conversation_history: Iterable[ChatMessage | HistoryMessage],
+) -> Iterator[ModelRequest | ModelResponse]:
+    """Lazily convert a (possibly streamed) history to pydantic-ai message format."""
+    for msg in conversation_history:
+        message = convert_message(msg)
+        if message is not None:
+            yield message
+
+
+async def aiter_history_messages(
+    conversation_history: AsyncIterable[ChatMessage | HistoryMessage],
+) -> AsyncIterator[ModelRequest | ModelResponse]:
+    """Lazily convert a history streamed by AsyncChatHistoryDDB to pydantic-ai format."""
+    async for msg in conversation_history:
+        message = convert_message(msg)
+        if message is not None:
+            yield message
+
+
 def convert_history_to_messages(
-    conversation_history: list[ChatMessage],
+    conversation_history: list[ChatMessage | HistoryMessage],
 ) -> list[ModelRequest | ModelResponse]:
     """Convert database conversation history to pydantic-ai message format."""
-    messages = []
+    return list(iter_history_messages(conversation_history))
+
+
+def split_pending_inbound(
+    conversation_history: list[HistoryMessage],
+) -> tuple[list[HistoryMessage], list[HistoryMessage]]:
+    """Split history into the answered part and the trailing unanswered inbound messages."""
+    index = len(conversation_history)
+    while index > 0 and conversation_history[index - 1].direction == "inbound":
+        index -= 1
+    return conversation_history[:index], conversation_history[index:]
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count of a text, at about four characters per token."""
+    return len(text) // 4 + 1
+
+
+def select_history_window(
+    conversation_history: list[HistoryMessage], token_budget: int
+) -> list[HistoryMessage]:
+    """Keep the newest messages of the history that fit within the token budget."""
+    used_tokens = 0
+    index = len(conversation_history)
+    while index > 0:
+        message = conversation_history[index - 1]
+        # Messages dropped by convert_history_to_messages cost nothing
+        if not message.guardrails_intervened:
+            used_tokens += estimate_tokens(message.message)
+            if used_tokens > token_budget:
+                break
+        index -= 1
+    return conversation_history[index:]
+
+
+def format_history_for_summary(
+    conversation_history: list[HistoryMessage],
+) -> str:
+    """Render messages as a plain transcript for the summary agent."""
+    lines = []
     for msg in conversation_history:
-        # Skip messages that have been intervened by guardrails
         if msg.guardrails_intervened:
             continue
-        if msg.direction == "inbound":
-            # User message
-            content = msg.message
-            messages.append(ModelRequest(parts=[UserPromptPart(content=content)]))
-        else:
-            # Campaign message or AI response or manual response from human agent
-            messages.append(ModelResponse(parts=[TextPart(content=msg.message)]))
-    return messages
+        speaker = "Customer" if msg.direction == "inbound" else "Representative"
+        lines.append(f"{speaker}: {msg.message}")
+    return "\n".join(lines)
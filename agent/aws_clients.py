@@ -0,0 +1,132 @@
+"""Shared, tuned AWS clients for every module of the agent."""
+
+import functools
+import os
+import threading
+from dataclasses import dataclass
+from typing import Any
+
+import boto3
+from botocore.config import Config
+from custom_types import DictMixin
+from logging_config import setup_logging
+from utils import get_boto3_session_config
+
+logger = setup_logging(__name__)
+
+# Sized for concurrent SQS batches plus the DynamoDB writes they fan out
+AWS_MAX_POOL_CONNECTIONS = int(os.environ.get("AWS_MAX_POOL_CONNECTIONS", "50"))
+AWS_CONNECT_TIMEOUT = float(os.environ.get("AWS_CONNECT_TIMEOUT", "2"))
+AWS_READ_TIMEOUT = float(os.environ.get("AWS_READ_TIMEOUT", "60"))
+# DynamoDB answers in milliseconds, so a hung read is retried well before Bedrock's timeout
+AWS_DYNAMODB_READ_TIMEOUT = float(os.environ.get("AWS_DYNAMODB_READ_TIMEOUT", "5"))
+AWS_TCP_KEEPALIVE = os.environ.get("AWS_TCP_KEEPALIVE", "true").lower() == "true"
+# "adaptive" adds client-side rate limiting on throttling to the standard retries
+AWS_RETRY_MODE = os.environ.get("AWS_RETRY_MODE", "adaptive")
+AWS_MAX_ATTEMPTS = int(os.environ.get("AWS_MAX_ATTEMPTS", "5"))
+
+_lock = threading.Lock()
+_clients: dict[str, Any] = {}
+_resources: dict[str, Any] = {}
+
+
+@dataclass
+class PoolStats(DictMixin):
+    service: str
+    max_pool_connections: int
+    pools: int
+    connections_created: int
+    requests: int
+    idle_connections: int
+
+
+def get_client_config_kwargs(service_name: str) -> dict[str, Any]:
+    """Keyword arguments of the botocore Config for a service, shared with aioboto3."""
+    return {
+        "max_pool_connections": AWS_MAX_POOL_CONNECTIONS,
+        "connect_timeout": AWS_CONNECT_TIMEOUT,
+        "read_timeout": (
+            AWS_DYNAMODB_READ_TIMEOUT if service_name == "dynamodb" else AWS_READ_TIMEOUT
+        ),
+        "tcp_keepalive": AWS_TCP_KEEPALIVE,
+        "retries": {"mode": AWS_RETRY_MODE, "max_attempts": AWS_MAX_ATTEMPTS},
+    }
+
+
+@functools.cache
+def get_session() -> boto3.Session:
+    """Get the boto3 session every client and resource is created from."""
+    return boto3.Session(**get_boto3_session_config())
+
+
+def get_client(service_name: str, **kwargs) -> Any:
+    """
+    Get the shared client for a service, creating it on first use.
+
+    Clients are thread-safe, so one client and its connection pool serve every thread.
+    Creating a client from a session is not, which is why creation is locked.
+
+    Args:
+        service_name: The AWS service, e.g. "sqs"
+        kwargs: Extra client arguments, e.g. endpoint_url; only used on creation
+
+    Returns:
+        The shared client
+    """
+    if service_name not in _clients:
+        with _lock:
+            if service_name not in _clients:
+                _clients[service_name] = get_session().client(
+                    service_name,
+                    config=Config(**get_client_config_kwargs(service_name)),
+                    **kwargs,
+                )
+                logger.info(f"Created shared {service_name} client")
+    return _clients[service_name]
+
+
+def get_resource(service_name: str, **kwargs) -> Any:
+    """Get the shared boto3 resource for a service, creating it on first use."""
+    if service_name not in _resources:
+        with _lock:
+            if service_name not in _resources:
+                _resources[service_name] = get_session().resource(
+                    service_name,
+                    config=Config(**get_client_config_kwargs(service_name)),
+                    **kwargs,
+                )
+                logger.info(f"Created shared {service_name} resource")
+    return _resources[service_name]
+
+
+def get_pool_stats() -> list[PoolStats]:
+    """
+    Get connection pool counters of the shared clients and resources.
+
+    Reads the urllib3 pools behind botocore's HTTP session, which botocore does not
+    expose publicly; clients whose pools cannot be inspected are left out.
+    """
+    with _lock:
+        clients = {**_clients}
+        clients.update(
+            {f"{name} (resource)": r.meta.client for name, r in _resources.items()}
+        )
+
+    stats = []
+    for service_name, client in clients.items():
+        try:
+            manager = client._endpoint.http_session._manager
+            pools = list(manager.pools._container.values())
+            stats.append(
+                PoolStats(
+                    service=service_name,
+                    max_pool_connections=client.meta.config.max_pool_connections,
+                    pools=len(pools),
+                    connections_created=sum(p.num_connections for p in pools),
+                    requests=sum(p.num_requests for p in pools),
+                    idle_connections=sum(p.pool.qsize() for p in pools),
+                )
+            )
+        except AttributeError:
+            logger.debug(f"Connection pool of {service_name} cannot be inspected")
+    return stats
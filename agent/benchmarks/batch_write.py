@@ -0,0 +1,107 @@
+"""
+Benchmark campaign launch writes against DynamoDB Local: one PutItem per recipient
+versus the batched, parallel create_customers and add_messages.
+
+Requires DynamoDB Local (docker compose up dynamodb-local) and ENVIRONMENT=local.
+Writes synthetic customers and messages under the +1999 test prefix and deletes them.
+
+Usage: python benchmarks/batch_write.py [recipients] [max_concurrency]
+"""
+
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+# Add parent directory to path to import the dynamodb package
+sys.path.append(str(Path(__file__).parent.parent))
+
+from dynamodb import get_table_references
+from dynamodb.chat_history import AsyncChatHistoryDDB
+from dynamodb.connection import connection
+from dynamodb.customer import AsyncCustomerDDB
+from dynamodb.models import AddMessageInput, Customer, CustomerStatus
+
+CAMPAIGN_ID = "benchmark-campaign"
+
+
+def make_recipients(count: int) -> tuple[list[Customer], list[AddMessageInput]]:
+    customers = []
+    messages = []
+    for i in range(count):
+        phone_number = f"+1999{i:07d}"
+        customers.append(
+            Customer(
+                phone_number=phone_number,
+                first_name="Bench",
+                last_name=f"Mark{i}",
+                status=CustomerStatus.AUTOMATED,
+                most_recent_campaign_id=CAMPAIGN_ID,
+            )
+        )
+        messages.append(
+            AddMessageInput(
+                phone_number=phone_number,
+                campaign_id=CAMPAIGN_ID,
+                message="Game day is coming, want tickets?",
+                direction="outbound",
+                timestamp="2026-01-01T00:00:00Z",
+            )
+        )
+    return customers, messages
+
+
+async def write_individually(customers, messages):
+    for customer, message in zip(customers, messages):
+        await AsyncCustomerDDB.create_customer(customer)
+        await AsyncChatHistoryDDB.add_message(message)
+
+
+async def write_batched(customers, messages, max_concurrency: int):
+    await asyncio.gather(
+        AsyncCustomerDDB.create_customers(customers, max_concurrency),
+        AsyncChatHistoryDDB.add_messages(messages, max_concurrency),
+    )
+
+
+def cleanup(customers, messages):
+    tables = get_table_references()
+    with tables["customers"].batch_writer() as batch:
+        for customer in customers:
+            batch.delete_item(Key={"phone_number": customer.phone_number})
+    with tables["chat_history"].batch_writer() as batch:
+        for message in messages:
+            if message.id:
+                batch.delete_item(Key={"id": message.id})
+
+
+def measure(name: str, write, recipients: int) -> float:
+    customers, messages = make_recipients(recipients)
+    start = time.perf_counter()
+    connection.run_sync(write(customers, messages))
+    elapsed = time.perf_counter() - start
+    cleanup(customers, messages)
+
+    writes_per_second = recipients * 2 / elapsed
+    print(f"{name:<24} {elapsed:8.2f} s  {writes_per_second:10.0f} writes/s")
+    return writes_per_second
+
+
+if __name__ == "__main__":
+    recipients = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    max_concurrency = int(sys.argv[2]) if len(sys.argv) > 2 else 8
+
+    print("=" * 60)
+    print(f"Campaign launch writes ({recipients} recipients, 2 items each)")
+    print()
+
+    before = measure("Single PutItem", write_individually, recipients)
+    after = measure(
+        f"BatchWriteItem x{max_concurrency}",
+        lambda c, m: write_batched(c, m, max_concurrency),
+        recipients,
+    )
+
+    print()
+    print(f"Speedup: {after / before:.1f}x")
+    print("=" * 60)
@@ -0,0 +1,98 @@
+"""
+Cold-start profile of the agent Lambda.
+
+Reports the time spent importing each module and running each initialization step, in
+the order the Lambda runtime goes through them. Run it in a fresh interpreter so that
+nothing is already imported.
+
+Usage: python benchmarks/cold_start.py [--lazy]
+
+With --lazy, AGENT_LAZY_INIT is enabled so import-time work is deferred and reported
+under the initialization steps instead.
+"""
+
+import importlib
+import os
+import sys
+import time
+from pathlib import Path
+
+# Add parent directory to path to import the agent modules
+sys.path.append(str(Path(__file__).parent.parent))
+
+# Imported in dependency order, so each timing excludes the modules imported before it
+MODULES = [
+    "logging_config",
+    "utils",
+    "phone_utils",
+    "custom_types",
+    "pydantic_logging",
+    "retrier",
+    "dynamodb",
+    "dynamodb.models",
+    "dynamodb.connection",
+    "dynamodb.customer",
+    "dynamodb.campaign",
+    "dynamodb.chat_history",
+    "guardrails",
+    "agent.models",
+    "agent.prompt",
+    "agent.agent",
+    "agent.utils",
+    "sqs_utils",
+    "main",
+    "lambda_handler",
+]
+
+
+def init_steps() -> list[tuple[str, callable]]:
+    """Initialization steps that run on first use when lazy initialization is enabled."""
+    from agent.agent import get_bedrock_model
+    from dynamodb import ensure_dynamodb_initialized
+    from dynamodb.connection import connection
+    from guardrails import get_bedrock_client
+    from pydantic_logging import configure_logfire
+    from sqs_utils import get_sqs_client
+
+    return [
+        ("configure_logfire", configure_logfire),
+        ("dynamodb table check", ensure_dynamodb_initialized),
+        ("async dynamodb connection", lambda: connection.run_sync(connection.resource())),
+        ("bedrock guardrails client", get_bedrock_client),
+        ("bedrock model", get_bedrock_model),
+        ("sqs client", get_sqs_client),
+    ]
+
+
+def timed(func) -> float:
+    start = time.perf_counter()
+    func()
+    return (time.perf_counter() - start) * 1000
+
+
+def print_report(title: str, timings: list[tuple[str, float]]):
+    print(title)
+    for name, duration in timings:
+        print(f"  {name:<30} {duration:9.2f} ms")
+    print(f"  {'total':<30} {sum(d for _, d in timings):9.2f} ms")
+    print()
+
+
+if __name__ == "__main__":
+    if "--lazy" in sys.argv:
+        os.environ["AGENT_LAZY_INIT"] = "true"
+
+    print("=" * 50)
+    print(f"Cold start profile (lazy init: {os.environ.get('AGENT_LAZY_INIT', 'false')})")
+    print()
+
+    import_timings = [
+        (module, timed(lambda: importlib.import_module(module))) for module in MODULES
+    ]
+    print_report("Module imports:", import_timings)
+
+    step_timings = [(name, timed(step)) for name, step in init_steps()]
+    print_report("Initialization steps (first use):", step_timings)
+
+    total = sum(d for _, d in import_timings) + sum(d for _, d in step_timings)
+    print(f"Total cold start: {total:.2f} ms")
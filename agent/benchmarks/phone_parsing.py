@@ -0,0 +1,72 @@
+"""
+Microbenchmark of phone number handling per inbound message.
+
+Compares the previous validate-then-normalize flow, which parsed the number twice,
+with a cold (uncached) single parse and the memoized parse_phone_number.
+
+Usage: python benchmarks/phone_parsing.py [calls] [distinct_numbers]
+"""
+
+import sys
+import time
+from pathlib import Path
+
+import phonenumbers
+
+# Add parent directory to path to import phone_utils.py
+sys.path.append(str(Path(__file__).parent.parent))
+
+from phone_utils import parse_phone_number
+
+
+def validate_then_normalize(phone_number: str) -> str | None:
+    """Previous flow in process_message: two parses of the same input."""
+    parsed = phonenumbers.parse(phone_number, "US")
+    if not phonenumbers.is_valid_number(parsed):
+        return None
+    parsed = phonenumbers.parse(phone_number, "US")
+    if phonenumbers.is_valid_number(parsed):
+        return phonenumbers.format_number(parsed, phonenumbers.PhoneNumberFormat.E164)
+    return phone_number
+
+
+def parse_once(phone_number: str) -> str | None:
+    parsed = parse_phone_number(phone_number)
+    return parsed.e164 if parsed.is_valid else None
+
+
+def parse_once_cold(phone_number: str) -> str | None:
+    """A single parse that bypasses the memoization, as on a cache miss."""
+    parsed = parse_phone_number.__wrapped__(phone_number)
+    return parsed.e164 if parsed.is_valid else None
+
+
+def measure(func, phone_numbers: list[str], calls: int) -> float:
+    start = time.perf_counter()
+    for i in range(calls):
+        func(phone_numbers[i % len(phone_numbers)])
+    return (time.perf_counter() - start) / calls * 1_000_000
+
+
+if __name__ == "__main__":
+    calls = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    distinct_numbers = int(sys.argv[2]) if len(sys.argv) > 2 else 500
+
+    # Hot numbers recur throughout a campaign, in mixed input formats
+    phone_numbers = [
+        f"(412) 624-{i:04d}" if i % 2 else f"+1412624{i:04d}"
+        for i in range(distinct_numbers)
+    ]
+
+    print("=" * 60)
+    print(f"Phone number handling ({calls} calls over {distinct_numbers} numbers)")
+    print()
+
+    before = measure(validate_then_normalize, phone_numbers, calls)
+    cold = measure(parse_once_cold, phone_numbers, calls)
+    after = measure(parse_once, phone_numbers, calls)
+
+    print(f"validate + normalize  {before:8.2f} us/call")
+    print(f"single parse, cold    {cold:8.2f} us/call")
+    print(f"parse_phone_number    {after:8.2f} us/call (memoized)")
+    print(f"saving                {before - after:8.2f} us/call ({before / after:.1f}x)")
@@ -0,0 +1,97 @@
+"""
+Benchmark the chat history exporter against DynamoDB Local with 1 to 16 scan segments.
+
+Requires DynamoDB Local (docker compose up dynamodb-local) and ENVIRONMENT=local.
+Seeds synthetic messages under the +1999 test prefix into the chat table and deletes
+them afterwards; existing items are exported too and counted in the throughput.
+
+Usage: python benchmarks/segmented_scan.py [messages] [max_segments]
+"""
+
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Add parent directory to path to import the dynamodb package
+sys.path.append(str(Path(__file__).parent.parent))
+
+from dynamodb import CHAT_TABLE_NAME, get_table_references
+from dynamodb.chat_history import AsyncChatHistoryDDB
+from dynamodb.connection import connection
+from dynamodb.export import CHAT_HISTORY_COLUMNS, export_table
+from dynamodb.models import AddMessageInput
+
+CAMPAIGN_ID = "benchmark-campaign"
+
+
+def make_messages(count: int) -> list[AddMessageInput]:
+    return [
+        AddMessageInput(
+            phone_number=f"+1999{i // 10:07d}",
+            campaign_id=CAMPAIGN_ID,
+            message="Game day is coming, want tickets? " * 4,
+            direction="outbound" if i % 2 else "inbound",
+            timestamp=f"2026-01-01T00:{(i // 60) % 60:02d}:{i % 60:02d}Z",
+        )
+        for i in range(count)
+    ]
+
+
+def cleanup(messages: list[AddMessageInput]):
+    with get_table_references()["chat_history"].batch_writer() as batch:
+        for message in messages:
+            if message.id:
+                batch.delete_item(Key={"id": message.id})
+
+
+def measure(segments: int) -> float:
+    output_dir = tempfile.mkdtemp(prefix="export-")
+    try:
+        start = time.perf_counter()
+        # Full capacity share, the benchmark measures the scan and not the throttle
+        result = connection.run_sync(
+            export_table(
+                CHAT_TABLE_NAME,
+                output_dir,
+                total_segments=segments,
+                target_capacity_share=1.0,
+                columns=CHAT_HISTORY_COLUMNS,
+            )
+        )
+        elapsed = time.perf_counter() - start
+        parts = len(list(Path(output_dir).glob("part-*")))
+    finally:
+        shutil.rmtree(output_dir)
+
+    items_per_second = result.items / elapsed
+    print(
+        f"{segments:>3} segments {elapsed:8.2f} s  {items_per_second:10.0f} items/s  {parts:4d} parts  {result.consumed_capacity:8.0f} RCU"
+    )
+    return items_per_second
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    max_segments = int(sys.argv[2]) if len(sys.argv) > 2 else 16
+
+    messages = make_messages(count)
+    connection.run_sync(AsyncChatHistoryDDB.add_messages(messages))
+    try:
+        print("=" * 60)
+        print(f"Chat history export ({count} seeded messages)")
+        print()
+
+        results = {}
+        segments = 1
+        while segments <= max_segments:
+            results[segments] = measure(segments)
+            segments *= 2
+
+        best = max(results, key=results.get)
+        print()
+        print(f"Best: {best} segments, {results[best] / results[1]:.1f}x one segment")
+        print("=" * 60)
+    finally:
+        cleanup(messages)
@@ -0,0 +1,151 @@
+"""
+Benchmark warm-invocation overhead of a new event loop per invocation versus the
+persistent event loop runner.
+
+Two workloads mirror the loop usage of process_message:
+- executor: blocking calls offloaded to the default executor (guardrails, Bedrock)
+  fanned out with asyncio.gather; measures default executor thread reuse
+- dynamodb: an aioboto3 DynamoDB call. An async client is bound to the loop it was
+  opened on, so with a new loop per invocation every invocation opens a client (and
+  its HTTP connection pool) again, while the persistent runner keeps one open.
+
+The dynamodb workload needs DynamoDB Local (docker compose up dynamodb-local) and
+ENVIRONMENT=local; it is skipped otherwise.
+
+Usage: python benchmarks/warm_invocation.py [invocations] [offloaded_calls]
+"""
+
+import asyncio
+import contextlib
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import Any
+
+# Add parent directory to path to import event_loop.py
+sys.path.append(str(Path(__file__).parent.parent))
+
+import event_loop
+
+
+def blocking_call():
+    """Stand-in for a short blocking SDK call."""
+    time.sleep(0.001)
+
+
+async def executor_invocation(offloaded_calls: int):
+    await asyncio.gather(
+        *(asyncio.to_thread(blocking_call) for _ in range(offloaded_calls))
+    )
+
+
+async def open_dynamodb_client(exit_stack: contextlib.AsyncExitStack) -> Any:
+    import aioboto3
+    from utils import get_boto3_session_config, get_dynamodb_resource_config
+
+    session = aioboto3.Session(**get_boto3_session_config())
+    return await exit_stack.enter_async_context(
+        session.client("dynamodb", **get_dynamodb_resource_config())
+    )
+
+
+async def dynamodb_invocation_new_client(calls: int):
+    """A client opened for this invocation only, as a new loop per invocation forces."""
+    async with contextlib.AsyncExitStack() as exit_stack:
+        client = await open_dynamodb_client(exit_stack)
+        await asyncio.gather(*(client.list_tables(Limit=1) for _ in range(calls)))
+
+
+# Client kept open on the persistent loop across invocations
+persistent_client: dict[str, Any] = {}
+persistent_exit_stack = contextlib.AsyncExitStack()
+
+
+async def dynamodb_invocation_persistent_client(calls: int):
+    if "client" not in persistent_client:
+        persistent_client["client"] = await open_dynamodb_client(persistent_exit_stack)
+    client = persistent_client["client"]
+    await asyncio.gather(*(client.list_tables(Limit=1) for _ in range(calls)))
+
+
+def run_with_new_loop(coro):
+    """Previous lambda_handler behaviour: create and close a loop per invocation."""
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    try:
+        loop.run_until_complete(coro)
+    finally:
+        loop.close()
+
+
+def measure(invoke, invocations: int) -> list[float]:
+    # The first invocation is the cold one, it is not part of the warm measurements
+    invoke()
+
+    durations = []
+    for _ in range(invocations):
+        start = time.perf_counter()
+        invoke()
+        durations.append((time.perf_counter() - start) * 1000)
+    return durations
+
+
+def print_summary(name: str, durations: list[float]):
+    durations = sorted(durations)
+    p95 = durations[int(len(durations) * 0.95) - 1]
+    print(
+        f"{name:<26} mean {statistics.mean(durations):7.3f} ms | "
+        f"p50 {statistics.median(durations):7.3f} ms | p95 {p95:7.3f} ms"
+    )
+
+
+if __name__ == "__main__":
+    invocations = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    offloaded_calls = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+
+    print("=" * 70)
+    print(
+        f"Warm invocation latency ({invocations} invocations, {offloaded_calls} calls each)"
+    )
+    print()
+
+    print_summary(
+        "executor, new loop",
+        measure(
+            lambda: run_with_new_loop(executor_invocation(offloaded_calls)),
+            invocations,
+        ),
+    )
+    print_summary(
+        "executor, persistent loop",
+        measure(
+            lambda: event_loop.run(executor_invocation(offloaded_calls)), invocations
+        ),
+    )
+
+    if os.environ.get("ENVIRONMENT") in ["test", "local"]:
+        print_summary(
+            "dynamodb, new loop",
+            measure(
+                lambda: run_with_new_loop(
+                    dynamodb_invocation_new_client(offloaded_calls)
+                ),
+                invocations,
+            ),
+        )
+        print_summary(
+            "dynamodb, persistent loop",
+            measure(
+                lambda: event_loop.run(
+                    dynamodb_invocation_persistent_client(offloaded_calls)
+                ),
+                invocations,
+            ),
+        )
+        event_loop.run(persistent_exit_stack.aclose())
+    else:
+        print("dynamodb workload skipped, set ENVIRONMENT=local to run it")
+
+    event_loop.shutdown()
@@ -0,0 +1,120 @@
+"""In-process TTL caches with size-bounded LRU eviction."""
+
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Generic, Hashable, TypeVar
+
+from custom_types import DictMixin
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+
+@dataclass
+class CacheStats(DictMixin):
+    hits: int
+    misses: int
+    evictions: int
+    size: int
+    maxsize: int
+
+
+class TTLCache(Generic[K, V]):
+    """
+    Thread-safe cache whose entries expire after a TTL.
+
+    When the cache is full the least recently used entry is evicted. With sliding=True the
+    TTL is an idle timeout that every hit renews, up to max_age seconds after the entry
+    was stored, if given. A cache with a non-positive maxsize or TTL is disabled: every
+    lookup is a miss and nothing is stored.
+    """
+
+    def __init__(
+        self,
+        maxsize: int = 1024,
+        ttl: float = 300.0,
+        sliding: bool = False,
+        max_age: float | None = None,
+    ):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.sliding = sliding
+        self.max_age = max_age
+        # Key to (expiry, latest possible expiry, value)
+        self._entries: OrderedDict[K, tuple[float, float, V]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.maxsize > 0 and self.ttl > 0
+
+    def get(self, key: K) -> V | None:
+        """Get a cached value, or None if it is missing or expired."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] <= time.monotonic():
+                if entry is not None:
+                    del self._entries[key]
+                self._misses += 1
+                return None
+
+            if self.sliding:
+                self._entries[key] = (
+                    min(time.monotonic() + self.ttl, entry[1]),
+                    entry[1],
+                    entry[2],
+                )
+            self._entries.move_to_end(key)
+            self._hits += 1
+            return entry[2]
+
+    def set(self, key: K, value: V):
+        """Store a value, evicting the least recently used entries if full."""
+        if not self.enabled:
+            return
+
+        with self._lock:
+            now = time.monotonic()
+            max_expires = now + self.max_age if self.max_age else float("inf")
+            self._entries[key] = (min(now + self.ttl, max_expires), max_expires, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self._evictions += 1
+
+    def values(self) -> list[V]:
+        """Get a snapshot of the values that have not expired."""
+        now = time.monotonic()
+        with self._lock:
+            return [
+                value for expires, _, value in self._entries.values() if expires > now
+            ]
+
+    def invalidate(self, key: K):
+        """Remove a single entry."""
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        """Remove all entries."""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> CacheStats:
+        """Get hit, miss and eviction counters."""
+        with self._lock:
+            return CacheStats(
+                hits=self._hits,
+                misses=self._misses,
+                evictions=self._evictions,
+                size=len(self._entries),
+                maxsize=self.maxsize,
+            )
+
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -0,0 +1,157 @@
+"""Compressed cold archive of chat history, on the local disk or in S3."""
+
+import gzip
+import io
+import json
+import os
+import shutil
+import tempfile
+from decimal import Decimal
+from pathlib import Path
+from typing import Any, BinaryIO, Iterable
+
+from aws_clients import get_client
+from botocore.exceptions import ClientError
+from dynamodb.models import ChatMessage
+from logging_config import setup_logging
+
+logger = setup_logging(__name__)
+
+# Local directory, or s3://bucket/prefix
+CHAT_ARCHIVE_URI = os.environ.get("CHAT_ARCHIVE_URI", "archive/chat-history")
+# Every conversation is archived as one gzipped JSONL file, which rehydration reads.
+# "parquet" also writes one file per campaign for analytics, which needs the optional
+# pyarrow dependency.
+CHAT_ARCHIVE_FORMAT = os.environ.get("CHAT_ARCHIVE_FORMAT", "jsonl")
+
+# Typed columns for analytics; the full item is kept alongside, so no attribute is lost
+PARQUET_COLUMNS = list(ChatMessage.__dataclass_fields__.keys())
+
+
+def json_default(value: Any) -> Any:
+    """Serialize the Decimal numbers of DynamoDB items."""
+    if isinstance(value, Decimal):
+        return int(value) if value == value.to_integral_value() else float(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def get_conversation_key(campaign_id: str, phone_number: str) -> str:
+    """Archive key of one conversation in the JSONL layout."""
+    return f"campaign_id={campaign_id}/phone_number={phone_number}.jsonl.gz"
+
+
+def get_campaign_key(campaign_id: str) -> str:
+    """Archive key of one campaign in the Parquet layout."""
+    return f"campaign_id={campaign_id}/conversations.parquet"
+
+
+def write_object(key: str, data: bytes | BinaryIO):
+    """
+    Store an archive object under CHAT_ARCHIVE_URI.
+
+    A file object is streamed from its current position, as a multipart upload to S3
+    when it is large, so it never has to fit in memory.
+    """
+    if CHAT_ARCHIVE_URI.startswith("s3://"):
+        bucket, _, prefix = CHAT_ARCHIVE_URI[len("s3://") :].partition("/")
+        s3_key = f"{prefix.rstrip('/')}/{key}".lstrip("/")
+        if isinstance(data, bytes):
+            get_client("s3").put_object(Bucket=bucket, Key=s3_key, Body=data)
+        else:
+            get_client("s3").upload_fileobj(data, bucket, s3_key)
+        return
+
+    path = Path(CHAT_ARCHIVE_URI) / key
+    path.parent.mkdir(parents=True, exist_ok=True)
+    if isinstance(data, bytes):
+        path.write_bytes(data)
+    else:
+        with path.open("wb") as f:
+            shutil.copyfileobj(data, f)
+
+
+def read_object(key: str) -> bytes | None:
+    """Load an archive object, None if it does not exist."""
+    if CHAT_ARCHIVE_URI.startswith("s3://"):
+        bucket, _, prefix = CHAT_ARCHIVE_URI[len("s3://") :].partition("/")
+        try:
+            response = get_client("s3").get_object(
+                Bucket=bucket, Key=f"{prefix.rstrip('/')}/{key}".lstrip("/")
+            )
+        except ClientError as e:
+            if e.response["Error"]["Code"] in ("NoSuchKey", "404"):
+                return None
+            raise
+        return response["Body"].read()
+
+    path = Path(CHAT_ARCHIVE_URI) / key
+    return path.read_bytes() if path.exists() else None
+
+
+def encode_jsonl(items: Iterable[dict[str, Any]]) -> bytes:
+    """Gzip the items as JSON lines."""
+    buffer = io.BytesIO()
+    with gzip.GzipFile(fileobj=buffer, mode="wb") as f:
+        for item in items:
+            f.write(json.dumps(item, default=json_default).encode() + b"\n")
+    return buffer.getvalue()
+
+
+def decode_jsonl(data: bytes) -> list[dict[str, Any]]:
+    return [json.loads(line) for line in gzip.decompress(data).splitlines() if line]
+
+
+class ParquetArchiveWriter:
+    """
+    Writes a campaign's conversations to one Parquet file, a row group per conversation.
+
+    Row groups are spooled to a temporary file on disk and the file is streamed to the
+    archive on close, so only one conversation is held in memory at a time.
+    """
+
+    def __init__(self, campaign_id: str):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        self.campaign_id = campaign_id
+        self.schema = pa.schema(
+            [(column, pa.string()) for column in PARQUET_COLUMNS]
+            + [("item", pa.string())]
+        )
+        self.file = tempfile.TemporaryFile()
+        self.writer = pq.ParquetWriter(self.file, self.schema, compression="zstd")
+
+    def write_conversation(self, items: list[dict[str, Any]]):
+        import pyarrow as pa
+
+        columns = {
+            column: [
+                None if item.get(column) is None else str(item[column])
+                for item in items
+            ]
+            for column in PARQUET_COLUMNS
+        }
+        columns["item"] = [json.dumps(item, default=json_default) for item in items]
+        self.writer.write_table(pa.table(columns, schema=self.schema))
+
+    def close(self):
+        """Finish the file and store it in the archive."""
+        try:
+            self.writer.close()
+            self.file.seek(0)
+            write_object(get_campaign_key(self.campaign_id), self.file)
+        finally:
+            self.file.close()
+
+
+def read_archived_conversation(
+    campaign_id: str, phone_number: str
+) -> list[dict[str, Any]] | None:
+    """
+    Load the archived items of a conversation from its own JSONL object.
+
+    Returns:
+        The archived items, or None if the conversation was not archived
+    """
+    data = read_object(get_conversation_key(campaign_id, phone_number))
+    return decode_jsonl(data) if data is not None else None
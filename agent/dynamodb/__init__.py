@@ -1,34 +1,56 @@
 import os
+import threading
 from typing import Any
 
-import boto3
+from aws_clients import get_resource
 from botocore.exceptions import ClientError, EndpointConnectionError
 from logging_config import setup_logging
-from utils import get_boto3_session_config, get_dynamodb_resource_config
+from utils import (
+    get_dynamodb_resource_config,
+    get_storage_backend_name,
+    is_lazy_init_enabled,
+)
 
 logger = setup_logging(__name__)
 
-# Initialize DynamoDB resource
-session = boto3.Session(**get_boto3_session_config())
-dynamodb = session.resource("dynamodb", **get_dynamodb_resource_config())
-
 CUSTOMER_TABLE_NAME = os.environ.get("DYNAMODB_CUSTOMER_TABLE", "outreach-customers")
 CAMPAIGN_TABLE_NAME = os.environ.get("DYNAMODB_CAMPAIGN_TABLE", "outreach-campaigns")
 CHAT_TABLE_NAME = os.environ.get("DYNAMODB_CHAT_TABLE", "outreach-chat-history")
+CAMPAIGN_CUSTOMER_TABLE_NAME = os.environ.get(
+    "DYNAMODB_CAMPAIGN_CUSTOMER_TABLE", "outreach-campaign-customers"
+)
+
+CHAT_PHONE_INDEX_NAME = "phone_number-timestamp-index"
+CHAT_PHONE_CAMPAIGN_INDEX_NAME = "phone_number_campaign_id-timestamp-index"
+
+_initialized = False
+_initialize_lock = threading.Lock()
+
+
+def get_dynamodb() -> Any:
+    """Get the shared synchronous DynamoDB resource, creating it on first use."""
+    return get_resource("dynamodb", **get_dynamodb_resource_config())
+
+
+def get_phone_campaign_key(phone_number: str, campaign_id: str) -> str:
+    """Partition key of the phone_number_campaign_id-timestamp-index for a conversation."""
+    return f"{phone_number}#{campaign_id}"
 
 
 def get_table_references() -> dict[str, Any]:
     """Get DynamoDB table references."""
+    dynamodb = get_dynamodb()
     return {
         "customers": dynamodb.Table(CUSTOMER_TABLE_NAME),
         "campaigns": dynamodb.Table(CAMPAIGN_TABLE_NAME),
         "chat_history": dynamodb.Table(CHAT_TABLE_NAME),
+        "campaign_customers": dynamodb.Table(CAMPAIGN_CUSTOMER_TABLE_NAME),
     }
 
 
 def create_customers_table():
     """Create the customers table."""
-    dynamodb.create_table(
+    get_dynamodb().create_table(
         AttributeDefinitions=[{"AttributeName": "phone_number", "AttributeType": "S"}],
         TableName=CUSTOMER_TABLE_NAME,
         KeySchema=[{"AttributeName": "phone_number", "KeyType": "HASH"}],
@@ -38,7 +60,7 @@ def create_customers_table():
 
 def create_campaigns_table():
     """Create the campaigns table."""
-    dynamodb.create_table(
+    get_dynamodb().create_table(
         AttributeDefinitions=[{"AttributeName": "campaign_id", "AttributeType": "S"}],
         TableName=CAMPAIGN_TABLE_NAME,
         KeySchema=[{"AttributeName": "campaign_id", "KeyType": "HASH"}],
@@ -46,25 +68,63 @@ def create_campaigns_table():
     )
 
 
+def create_campaign_customers_table():
+    """Create the campaign customers table with a GSI on phone_number and campaign_id."""
+    get_dynamodb().create_table(
+        AttributeDefinitions=[
+            {"AttributeName": "campaign_id", "AttributeType": "S"},
+            {"AttributeName": "phone_number", "AttributeType": "S"},
+        ],
+        TableName=CAMPAIGN_CUSTOMER_TABLE_NAME,
+        KeySchema=[
+            {"AttributeName": "campaign_id", "KeyType": "HASH"},
+            {"AttributeName": "phone_number", "KeyType": "RANGE"},
+        ],
+        GlobalSecondaryIndexes=[
+            {
+                "IndexName": "phone_number-campaign_id-index",
+                "KeySchema": [
+                    {"AttributeName": "phone_number", "KeyType": "HASH"},
+                    {"AttributeName": "campaign_id", "KeyType": "RANGE"},
+                ],
+                "Projection": {"ProjectionType": "ALL"},
+            },
+        ],
+        BillingMode="PAY_PER_REQUEST",
+    )
+
+
 def create_chat_history_table():
-    """Create the chat history table with a GSI on phone_number and timestamp."""
-    dynamodb.create_table(
+    """
+    Create the chat history table with GSIs on phone_number and timestamp, and on
+    phone_number_campaign_id and timestamp.
+    """
+    get_dynamodb().create_table(
         AttributeDefinitions=[
             {"AttributeName": "id", "AttributeType": "S"},
             {"AttributeName": "phone_number", "AttributeType": "S"},
+            {"AttributeName": "phone_number_campaign_id", "AttributeType": "S"},
             {"AttributeName": "timestamp", "AttributeType": "S"},
         ],
         TableName=CHAT_TABLE_NAME,
         KeySchema=[{"AttributeName": "id", "KeyType": "HASH"}],
         GlobalSecondaryIndexes=[
             {
-                "IndexName": "phone_number-timestamp-index",
+                "IndexName": CHAT_PHONE_INDEX_NAME,
                 "KeySchema": [
                     {"AttributeName": "phone_number", "KeyType": "HASH"},
                     {"AttributeName": "timestamp", "KeyType": "RANGE"},
                 ],
                 "Projection": {"ProjectionType": "ALL"},
             },
+            {
+                "IndexName": CHAT_PHONE_CAMPAIGN_INDEX_NAME,
+                "KeySchema": [
+                    {"AttributeName": "phone_number_campaign_id", "KeyType": "HASH"},
+                    {"AttributeName": "timestamp", "KeyType": "RANGE"},
+                ],
+                "Projection": {"ProjectionType": "ALL"},
+            },
         ],
         BillingMode="PAY_PER_REQUEST",
     )
@@ -77,7 +137,8 @@ def load_or_create_table(
     Load a DynamoDB table, creating it if it does not exist.
 
     Args:
-        table_ref_key: Key identifying the table type ('customers', 'campaigns', 'chat_history')
+        table_ref_key: Key identifying the table type ('customers', 'campaigns',
+            'chat_history', 'campaign_customers')
         table: The DynamoDB Table resource
     Raises:
         Exception: If there is an error loading or creating the table
@@ -98,6 +159,8 @@ def load_or_create_table(
                 create_campaigns_table()
             if "chat_history" == table_ref_key:
                 create_chat_history_table()
+            if "campaign_customers" == table_ref_key:
+                create_campaign_customers_table()
         else:
             logger.error(f"Error loading table {table.table_name}: {e}", exc_info=True)
             raise Exception(f"Failed to load table: {table.table_name}")
@@ -127,8 +190,23 @@ def initialize_dynamodb(create_if_missing: bool = False):
         raise Exception(f"Failed to connect to DynamoDB: {table.table_name}")
 
 
-# Initialize on import
-# Create tables if running in test or local environment
-initialize_dynamodb(
-    create_if_missing=os.environ.get("ENVIRONMENT", "dev") in ["test", "local"]
-)
+def ensure_dynamodb_initialized():
+    """
+    Initialize DynamoDB once per process.
+
+    Tables are created if missing when running in the test or local environment.
+    """
+    global _initialized
+    with _initialize_lock:
+        if not _initialized:
+            initialize_dynamodb(
+                create_if_missing=os.environ.get("ENVIRONMENT", "dev")
+                in ["test", "local"]
+            )
+            _initialized = True
+
+
+# Initialize on import, unless deferred to the first table access or another storage
+# backend is used
+if not is_lazy_init_enabled() and get_storage_backend_name() == "dynamodb":
+    ensure_dynamodb_initialized()
@@ -0,0 +1,190 @@
+"""Parallel BatchWriteItem and BatchGetItem helpers shared by the bulk repository methods."""
+
+import asyncio
+import os
+import random
+from typing import Any
+
+from dynamodb.connection import connection, on_connection
+from logging_config import setup_logging
+
+logger = setup_logging(__name__)
+
+# BatchWriteItem accepts at most 25 put or delete requests per call
+BATCH_WRITE_MAX_ITEMS = 25
+# BatchGetItem accepts at most 100 keys per call
+BATCH_GET_MAX_KEYS = 100
+
+# Batches in flight at once; each one holds a connection from the shared pool
+BATCH_WRITE_MAX_CONCURRENCY = int(os.environ.get("BATCH_WRITE_MAX_CONCURRENCY", "8"))
+BATCH_WRITE_MAX_RETRIES = int(os.environ.get("BATCH_WRITE_MAX_RETRIES", "8"))
+BATCH_WRITE_BASE_DELAY = float(os.environ.get("BATCH_WRITE_BASE_DELAY", "0.05"))
+BATCH_WRITE_MAX_DELAY = float(os.environ.get("BATCH_WRITE_MAX_DELAY", "5"))
+
+# Reads are tuned separately, so write tuning does not change the read fan-out
+BATCH_GET_MAX_CONCURRENCY = int(os.environ.get("BATCH_GET_MAX_CONCURRENCY", "8"))
+BATCH_GET_MAX_RETRIES = int(os.environ.get("BATCH_GET_MAX_RETRIES", "8"))
+BATCH_GET_BASE_DELAY = float(os.environ.get("BATCH_GET_BASE_DELAY", "0.05"))
+BATCH_GET_MAX_DELAY = float(os.environ.get("BATCH_GET_MAX_DELAY", "5"))
+
+
+def get_backoff_delay(attempt: int, base_delay: float, max_delay: float) -> float:
+    """Full-jitter exponential backoff, so throttled batches do not retry in lockstep."""
+    return random.uniform(0, min(max_delay, base_delay * 2**attempt))
+
+
+async def write_batch(table_name: str, requests: list[dict[str, Any]]):
+    """
+    Write one batch, retrying unprocessed requests with exponential backoff.
+
+    Args:
+        table_name: The table to write to
+        requests: Up to 25 PutRequest or DeleteRequest entries
+
+    Raises:
+        Exception: If requests are still unprocessed after the last retry
+    """
+    resource = await connection.resource()
+    for attempt in range(BATCH_WRITE_MAX_RETRIES + 1):
+        response = await resource.batch_write_item(RequestItems={table_name: requests})
+        requests = response.get("UnprocessedItems", {}).get(table_name, [])
+        if not requests:
+            return
+
+        if attempt < BATCH_WRITE_MAX_RETRIES:
+            logger.warning(
+                f"{len(requests)} unprocessed items writing to {table_name}, retry {attempt + 1}"
+            )
+            await asyncio.sleep(
+                get_backoff_delay(
+                    attempt, BATCH_WRITE_BASE_DELAY, BATCH_WRITE_MAX_DELAY
+                )
+            )
+
+    raise Exception(
+        f"Failed to write {len(requests)} items to {table_name} after {BATCH_WRITE_MAX_RETRIES} retries"
+    )
+
+
+@on_connection
+async def batch_put_items(
+    table_name: str,
+    items: list[dict[str, Any]],
+    max_concurrency: int | None = None,
+):
+    """
+    Put items with BatchWriteItem, running several batches in parallel.
+
+    Items are written in batches of 25. Batches are independent, so a failure can leave
+    other batches written; callers should only batch idempotent puts.
+
+    Args:
+        table_name: The table to write to
+        items: The items to put, without duplicate keys
+        max_concurrency: Batches in flight at once, defaults to BATCH_WRITE_MAX_CONCURRENCY
+
+    Raises:
+        Exception: If any batch could not be written completely
+    """
+    if not items:
+        return
+
+    # Resolve the table once, so lazy table initialization is not raced by the batches
+    await connection.table(table_name)
+
+    semaphore = asyncio.Semaphore(max_concurrency or BATCH_WRITE_MAX_CONCURRENCY)
+
+    async def write_bounded(requests: list[dict[str, Any]]):
+        async with semaphore:
+            await write_batch(table_name, requests)
+
+    requests = [{"PutRequest": {"Item": item}} for item in items]
+    await asyncio.gather(
+        *(
+            write_bounded(requests[i : i + BATCH_WRITE_MAX_ITEMS])
+            for i in range(0, len(requests), BATCH_WRITE_MAX_ITEMS)
+        )
+    )
+    logger.info(f"Batch wrote {len(items)} items to {table_name}")
+
+
+async def get_batch(
+    table_name: str, keys: list[dict[str, Any]], projection: dict[str, Any]
+) -> list[dict[str, Any]]:
+    """
+    Read one batch, retrying unprocessed keys with exponential backoff.
+
+    Args:
+        table_name: The table to read from
+        keys: Up to 100 primary keys
+        projection: ProjectionExpression and ExpressionAttributeNames, if any
+
+    Raises:
+        Exception: If keys are still unprocessed after the last retry
+    """
+    resource = await connection.resource()
+    items = []
+    for attempt in range(BATCH_GET_MAX_RETRIES + 1):
+        response = await resource.batch_get_item(
+            RequestItems={table_name: {"Keys": keys, **projection}}
+        )
+        items.extend(response.get("Responses", {}).get(table_name, []))
+        keys = response.get("UnprocessedKeys", {}).get(table_name, {}).get("Keys", [])
+        if not keys:
+            return items
+
+        if attempt < BATCH_GET_MAX_RETRIES:
+            logger.warning(
+                f"{len(keys)} unprocessed keys reading from {table_name}, retry {attempt + 1}"
+            )
+            await asyncio.sleep(
+                get_backoff_delay(attempt, BATCH_GET_BASE_DELAY, BATCH_GET_MAX_DELAY)
+            )
+
+    raise Exception(
+        f"Failed to read {len(keys)} keys from {table_name} after {BATCH_GET_MAX_RETRIES} retries"
+    )
+
+
+@on_connection
+async def batch_get_items(
+    table_name: str,
+    key_name: str,
+    key_values: list[str],
+    projection: dict[str, Any] | None = None,
+    max_concurrency: int | None = None,
+) -> dict[str, dict[str, Any]]:
+    """
+    Get items by partition key with BatchGetItem, running several batches in parallel.
+
+    Args:
+        table_name: The table to read from
+        key_name: Name of the table's partition key
+        key_values: Partition key values to look up; duplicates are read once
+        projection: ProjectionExpression and ExpressionAttributeNames, if any
+        max_concurrency: Batches in flight at once, defaults to BATCH_GET_MAX_CONCURRENCY
+
+    Returns:
+        The found items keyed by partition key value; missing keys are left out
+    """
+    key_values = list(dict.fromkeys(key_values))
+    if not key_values:
+        return {}
+
+    # Resolve the table once, so lazy table initialization is not raced by the batches
+    await connection.table(table_name)
+
+    semaphore = asyncio.Semaphore(max_concurrency or BATCH_GET_MAX_CONCURRENCY)
+
+    async def get_bounded(keys: list[dict[str, Any]]) -> list[dict[str, Any]]:
+        async with semaphore:
+            return await get_batch(table_name, keys, projection or {})
+
+    keys = [{key_name: value} for value in key_values]
+    batches = await asyncio.gather(
+        *(
+            get_bounded(keys[i : i + BATCH_GET_MAX_KEYS])
+            for i in range(0, len(keys), BATCH_GET_MAX_KEYS)
+        )
+    )
+    return {item[key_name]: item for batch in batches for item in batch}
@@ -1,35 +1,53 @@
+import os
 import uuid
 
 from botocore.exceptions import ClientError
-from dynamodb import get_table_references
+from cache import CacheStats, TTLCache
+from dynamodb import CAMPAIGN_TABLE_NAME
+from dynamodb.batch import batch_get_items
+from dynamodb.connection import connection, on_connection
 from dynamodb.models import Campaign, CreateCampaignInput
 from logging_config import setup_logging
 
 logger = setup_logging(__name__)
 
-campaign_table = get_table_references()["campaigns"]
+# Campaign details rarely change, so replies during a campaign share one cached copy
+campaign_cache: TTLCache[str, Campaign] = TTLCache(
+    maxsize=int(os.environ.get("CAMPAIGN_CACHE_MAX_SIZE", "256")),
+    ttl=float(os.environ.get("CAMPAIGN_CACHE_TTL_SECONDS", "300")),
+)
 
 
-class CampaignDDB:
+# Only read the attributes the Campaign model holds, e.g. not the message template
+CAMPAIGN_PROJECTION = {
+    "ProjectionExpression": ", ".join(
+        [f"#{field}" for field in Campaign.__dataclass_fields__.keys()]
+    ),
+    "ExpressionAttributeNames": {
+        f"#{field}": field for field in Campaign.__dataclass_fields__.keys()
+    },
+}
+
+
+class AsyncCampaignDDB:
 
     @staticmethod
-    def get_campaign(campaign_id: str) -> Campaign | None:
+    @on_connection
+    async def get_campaign(campaign_id: str) -> Campaign | None:
+        cached_campaign = campaign_cache.get(campaign_id)
+        if cached_campaign:
+            return cached_campaign
+
         try:
-            projection_expression = ", ".join(
-                [f"#{field}" for field in Campaign.__dataclass_fields__.keys()]
-            )
-            expression_attribute_names = {
-                f"#{field}": field for field in Campaign.__dataclass_fields__.keys()
-            }
-
-            response = campaign_table.get_item(
-                Key={"campaign_id": campaign_id},
-                ProjectionExpression=projection_expression,
-                ExpressionAttributeNames=expression_attribute_names,
+            campaign_table = await connection.table(CAMPAIGN_TABLE_NAME)
+            response = await campaign_table.get_item(
+                Key={"campaign_id": campaign_id}, **CAMPAIGN_PROJECTION
             )
 
             if "Item" in response:
-                return Campaign(**response["Item"])
+                campaign = Campaign(**response["Item"])
+                campaign_cache.set(campaign_id, campaign)
+                return campaign
 
             return None
         except ClientError as e:
@@ -37,13 +55,90 @@ class CampaignDDB:
             raise Exception(f"Failed to fetch campaign: {campaign_id}")
 
     @staticmethod
-    def create_campaign(campaign: CreateCampaignInput) -> str:
+    @on_connection
+    async def get_campaigns(campaign_ids: list[str]) -> dict[str, Campaign]:
+        """
+        Fetch many campaigns, reading only the uncached ones with BatchGetItem.
+
+        Args:
+            campaign_ids: The campaign IDs to look up
+
+        Returns:
+            The found campaigns keyed by campaign ID; missing campaigns are left out
+        """
+        campaigns = {}
+        missing_ids = []
+        for campaign_id in dict.fromkeys(campaign_ids):
+            cached_campaign = campaign_cache.get(campaign_id)
+            if cached_campaign:
+                campaigns[campaign_id] = cached_campaign
+            else:
+                missing_ids.append(campaign_id)
+
+        try:
+            items = await batch_get_items(
+                CAMPAIGN_TABLE_NAME, "campaign_id", missing_ids, CAMPAIGN_PROJECTION
+            )
+        except ClientError as e:
+            logger.error(
+                f"Error fetching {len(missing_ids)} campaigns: {e}", exc_info=True
+            )
+            raise Exception(f"Failed to fetch {len(missing_ids)} campaigns")
+
+        for campaign_id, item in items.items():
+            campaign = Campaign(**item)
+            campaign_cache.set(campaign_id, campaign)
+            campaigns[campaign_id] = campaign
+        return campaigns
+
+    @staticmethod
+    @on_connection
+    async def create_campaign(campaign: CreateCampaignInput) -> str:
         try:
             campaign.campaign_id = campaign.campaign_id or str(uuid.uuid4())
             item = campaign.as_dict()
 
-            campaign_table.put_item(Item=item)
+            campaign_table = await connection.table(CAMPAIGN_TABLE_NAME)
+            await campaign_table.put_item(Item=item)
+            campaign_cache.invalidate(campaign.campaign_id)
             return campaign.campaign_id
         except ClientError as e:
             logger.error(f"Error creating campaign: {e}", exc_info=True)
             raise Exception("Failed to create campaign")
+
+    @staticmethod
+    def invalidate_campaign(campaign_id: str | None = None):
+        """Drop a campaign from the cache, or every campaign if no ID is given."""
+        if campaign_id:
+            campaign_cache.invalidate(campaign_id)
+        else:
+            campaign_cache.clear()
+
+    @staticmethod
+    def get_cache_stats() -> CacheStats:
+        """Get the campaign cache hit and miss counters."""
+        return campaign_cache.stats()
+
+
+class CampaignDDB:
+    """Synchronous wrapper around AsyncCampaignDDB."""
+
+    @staticmethod
+    def get_campaign(campaign_id: str) -> Campaign | None:
+        return connection.run_sync(AsyncCampaignDDB.get_campaign(campaign_id))
+
+    @staticmethod
+    def get_campaigns(campaign_ids: list[str]) -> dict[str, Campaign]:
+        return connection.run_sync(AsyncCampaignDDB.get_campaigns(campaign_ids))
+
+    @staticmethod
+    def create_campaign(campaign: CreateCampaignInput) -> str:
+        return connection.run_sync(AsyncCampaignDDB.create_campaign(campaign))
+
+    @staticmethod
+    def invalidate_campaign(campaign_id: str | None = None):
+        AsyncCampaignDDB.invalidate_campaign(campaign_id)
+
+    @staticmethod
+    def get_cache_stats() -> CacheStats:
+        return AsyncCampaignDDB.get_cache_stats()
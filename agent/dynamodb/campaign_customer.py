@@ -0,0 +1,110 @@
+from datetime import datetime, timezone
+
+from botocore.exceptions import ClientError
+from dynamodb import CAMPAIGN_CUSTOMER_TABLE_NAME
+from dynamodb.connection import connection, on_connection
+from dynamodb.models import ConversationSummary
+from logging_config import setup_logging
+from phone_utils import mask_phone_number
+
+logger = setup_logging(__name__)
+
+
+class AsyncCampaignCustomerDDB:
+
+    @staticmethod
+    @on_connection
+    async def get_conversation_summary(
+        campaign_id: str, phone_number: str
+    ) -> ConversationSummary | None:
+        """
+        Fetch the rolling summary of a customer's conversation in a campaign.
+
+        Args:
+            campaign_id: The campaign ID
+            phone_number: The customer's phone number in E.164 format
+
+        Returns:
+            The conversation summary, or None if the conversation has not been summarized
+        """
+        try:
+            campaign_customer_table = await connection.table(CAMPAIGN_CUSTOMER_TABLE_NAME)
+            response = await campaign_customer_table.get_item(
+                Key={"campaign_id": campaign_id, "phone_number": phone_number},
+                ProjectionExpression="conversation_summary, summarized_through",
+            )
+            item = response.get("Item", {})
+            if "conversation_summary" in item:
+                return ConversationSummary(**item)
+            return None
+        except ClientError as e:
+            logger.error(
+                f"Error fetching conversation summary for {mask_phone_number(phone_number)} in campaign {campaign_id}: {e}",
+                exc_info=True,
+            )
+            return None
+
+    @staticmethod
+    @on_connection
+    async def update_conversation_summary(
+        campaign_id: str, phone_number: str, summary: ConversationSummary
+    ) -> bool:
+        """
+        Store the rolling summary on the customer's campaign record.
+
+        Args:
+            campaign_id: The campaign ID
+            phone_number: The customer's phone number in E.164 format
+            summary: The updated conversation summary
+
+        Returns:
+            True if stored, False if the customer is not part of the campaign
+        """
+        try:
+            campaign_customer_table = await connection.table(CAMPAIGN_CUSTOMER_TABLE_NAME)
+            await campaign_customer_table.update_item(
+                Key={"campaign_id": campaign_id, "phone_number": phone_number},
+                UpdateExpression="SET conversation_summary = :summary, summarized_through = :through, updated_at = :updated_at",
+                ConditionExpression="attribute_exists(campaign_id)",
+                ExpressionAttributeValues={
+                    ":summary": summary.conversation_summary,
+                    ":through": summary.summarized_through,
+                    ":updated_at": datetime.now(tz=timezone.utc).isoformat(),
+                },
+            )
+            return True
+        except ClientError as e:
+            if e.response["Error"]["Code"] == "ConditionalCheckFailedException":
+                logger.warning(
+                    f"No campaign record for {mask_phone_number(phone_number)} in campaign {campaign_id}, summary not stored"
+                )
+                return False
+            logger.error(
+                f"Error updating conversation summary for {mask_phone_number(phone_number)} in campaign {campaign_id}: {e}",
+                exc_info=True,
+            )
+            raise Exception(
+                f"Failed to update conversation summary: {mask_phone_number(phone_number)}"
+            )
+
+
+class CampaignCustomerDDB:
+    """Synchronous wrapper around AsyncCampaignCustomerDDB."""
+
+    @staticmethod
+    def get_conversation_summary(
+        campaign_id: str, phone_number: str
+    ) -> ConversationSummary | None:
+        return connection.run_sync(
+            AsyncCampaignCustomerDDB.get_conversation_summary(campaign_id, phone_number)
+        )
+
+    @staticmethod
+    def update_conversation_summary(
+        campaign_id: str, phone_number: str, summary: ConversationSummary
+    ) -> bool:
+        return connection.run_sync(
+            AsyncCampaignCustomerDDB.update_conversation_summary(
+                campaign_id, phone_number, summary
+            )
+        )
@@ -1,41 +1,214 @@
+import os
 import uuid
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import AsyncIterator, Iterator
 
 from boto3.dynamodb.conditions import Attr, Key
 from botocore.exceptions import ClientError
-from dynamodb import get_table_references
-from dynamodb.models import AddMessageInput, ChatMessage, UpdateChatMessageAttributes
+from cache import CacheStats, TTLCache
+from dynamodb import (
+    CHAT_PHONE_CAMPAIGN_INDEX_NAME,
+    CHAT_PHONE_INDEX_NAME,
+    CHAT_TABLE_NAME,
+    get_phone_campaign_key,
+)
+from dynamodb.batch import batch_put_items
+from dynamodb.connection import connection, on_connection
+from dynamodb.models import (
+    AddMessageInput,
+    ChatMessage,
+    HistoryMessage,
+    UpdateChatMessageAttributes,
+)
 from logging_config import setup_logging
 from phone_utils import mask_phone_number
 
 logger = setup_logging(__name__)
 
-chat_table = get_table_references()["chat_history"]
+# Query conversations through the phone_number_campaign_id-timestamp-index, so only the
+# campaign's messages are read. Off by default: only enable it once the backfill
+# migration has run, older messages are missing from the index until then.
+CHAT_HISTORY_USE_CAMPAIGN_INDEX = (
+    os.environ.get("CHAT_HISTORY_USE_CAMPAIGN_INDEX", "false").lower() == "true"
+)
 
+# Messages written shortly before the newest cached one (e.g. by a slower writer) are
+# picked up by re-reading this many seconds before the newest cached timestamp.
+HISTORY_CACHE_OVERLAP_SECONDS = float(
+    os.environ.get("HISTORY_CACHE_OVERLAP_SECONDS", "5")
+)
+
+
+@dataclass
+class CachedConversation:
+    """Conversation history of one (phone number, campaign) pair, in timestamp order."""
+
+    messages: list[HistoryMessage] = field(default_factory=list)
+    message_ids: set[str] = field(default_factory=set)
+
+    def merge(self, new_messages: list[HistoryMessage]):
+        """Add messages that are not cached yet, keeping timestamp order."""
+        added = [m for m in new_messages if m.id not in self.message_ids]
+        if added:
+            self.messages.extend(added)
+            self.messages.sort(key=lambda m: m.timestamp)
+            self.message_ids.update(m.id for m in added)
+
+    def delta_start(self) -> str | None:
+        """Lower bound of the timestamp key condition for fetching newer messages."""
+        if not self.messages:
+            return None
+        newest = datetime.fromisoformat(self.messages[-1].timestamp.replace("Z", "+00:00"))
+        start = newest - timedelta(seconds=HISTORY_CACHE_OVERLAP_SECONDS)
+        return start.strftime("%Y-%m-%dT%H:%M:%S")
+
+
+# The agent path only reads the attributes HistoryMessage holds, not delivery metadata
+HISTORY_PROJECTION = {
+    "ProjectionExpression": ", ".join(
+        [f"#{field}" for field in HistoryMessage.__dataclass_fields__.keys()]
+    ),
+    "ExpressionAttributeNames": {
+        f"#{field}": field for field in HistoryMessage.__dataclass_fields__.keys()
+    },
+}
+
+# Per-(phone number, campaign) history, evicted after being idle for the TTL. Active
+# conversations are still re-read in full after the max age, which picks up messages
+# that became visible on the index later than the delta overlap allows for.
+history_cache: TTLCache[tuple[str, str], CachedConversation] = TTLCache(
+    maxsize=int(os.environ.get("HISTORY_CACHE_MAX_SIZE", "512")),
+    ttl=float(os.environ.get("HISTORY_CACHE_IDLE_SECONDS", "900")),
+    sliding=True,
+    max_age=float(os.environ.get("HISTORY_CACHE_MAX_AGE_SECONDS", "3600")),
+)
+
+
+def get_conversation_query_kwargs(phone_number: str, campaign_id: str) -> dict:
+    """Index and key condition for querying one campaign conversation."""
+    if CHAT_HISTORY_USE_CAMPAIGN_INDEX:
+        return {
+            "IndexName": CHAT_PHONE_CAMPAIGN_INDEX_NAME,
+            "KeyConditionExpression": Key("phone_number_campaign_id").eq(
+                get_phone_campaign_key(phone_number, campaign_id)
+            ),
+        }
+    return {
+        "IndexName": CHAT_PHONE_INDEX_NAME,
+        "KeyConditionExpression": Key("phone_number").eq(phone_number),
+        "FilterExpression": Attr("campaign_id").eq(campaign_id),
+    }
+
+
+def get_message_attributes_update(
+    message_id: str, attributes: UpdateChatMessageAttributes
+) -> dict:
+    """UpdateItem arguments for setting the given attributes of a message."""
+    # Build the update expression and attribute mappings dynamically
+    update_expressions = []
+    expression_attribute_names = {}
+    expression_attribute_values = {}
+
+    for attr_name, attr_value in attributes.as_dict().items():
+        # Use attribute names to handle reserved keywords
+        placeholder_name = f"#{attr_name}"
+        placeholder_value = f":{attr_name}"
+
+        update_expressions.append(f"{placeholder_name} = {placeholder_value}")
+        expression_attribute_names[placeholder_name] = attr_name
+        expression_attribute_values[placeholder_value] = attr_value
+
+    return {
+        "Key": {"id": message_id},
+        "UpdateExpression": f"SET {', '.join(update_expressions)}",
+        "ExpressionAttributeNames": expression_attribute_names,
+        "ExpressionAttributeValues": expression_attribute_values,
+    }
 
-class ChatHistoryDDB:
+
+def update_cached_message(message_id: str, attributes: UpdateChatMessageAttributes):
+    """Keep cached copies of a message in line with an update written to the table."""
+    for cached_conversation in history_cache.values():
+        if message_id in cached_conversation.message_ids:
+            for message in cached_conversation.messages:
+                if message.id == message_id:
+                    for attr_name, attr_value in attributes.as_dict().items():
+                        if attr_name in message.__dataclass_fields__:
+                            setattr(message, attr_name, attr_value)
+
+
+@on_connection
+async def query_page(query_kwargs: dict) -> dict:
+    """Run a single chat history query call on the shared connection."""
+    chat_table = await connection.table(CHAT_TABLE_NAME)
+    return await chat_table.query(**query_kwargs)
+
+
+def to_chat_message(item: dict) -> ChatMessage:
+    """
+    ChatMessage of a full chat history item.
+
+    Items carry attributes ChatMessage does not model, e.g. the handoff_reason written
+    by the backend and the expires_at TTL, so only the ChatMessage fields are read.
+    """
+    fields = ChatMessage.__dataclass_fields__
+    return ChatMessage(**{k: v for k, v in item.items() if k in fields})
+
+
+def get_stream_query_kwargs(
+    phone_number: str, campaign_id: str, page_size: int | None, newest_first: bool
+) -> dict:
+    """Query arguments for streaming a conversation page by page."""
+    query_kwargs = get_conversation_query_kwargs(phone_number, campaign_id)
+    query_kwargs["ScanIndexForward"] = not newest_first
+    if page_size:
+        query_kwargs["Limit"] = page_size
+    return query_kwargs
+
+
+class AsyncChatHistoryDDB:
 
     @staticmethod
-    def get_conversation_history(
+    @on_connection
+    async def get_conversation_history(
         phone_number: str, campaign_id: str | None = None, skip_last: bool = False
-    ) -> list[ChatMessage]:
+    ) -> list[HistoryMessage]:
         if not campaign_id:
             logger.warning("Campaign ID is required for conversation history")
             return []
 
         try:
-            response = chat_table.query(
-                IndexName="phone_number-timestamp-index",
-                KeyConditionExpression=Key("phone_number").eq(phone_number),
-                FilterExpression=Attr("campaign_id").eq(campaign_id),
-                ScanIndexForward=True,  # Sort by timestamp ascending
+            # Only fetch messages newer than the cached ones, if any
+            cached_conversation = history_cache.get((phone_number, campaign_id))
+            delta_start = (
+                cached_conversation.delta_start() if cached_conversation else None
             )
 
-            items = response.get("Items", [])
+            query_kwargs = {
+                **get_conversation_query_kwargs(phone_number, campaign_id),
+                **HISTORY_PROJECTION,
+            }
+            if delta_start:
+                query_kwargs["KeyConditionExpression"] &= Key("timestamp").gte(
+                    delta_start
+                )
+
+            # Follow LastEvaluatedKey, a query returns at most 1 MB per call
+            items = []
+            async for page in AsyncChatHistoryDDB.iter_pages(
+                {**query_kwargs, "ScanIndexForward": True}  # Timestamp ascending
+            ):
+                items.extend(page)
             logger.info(
-                f"Retrieved {len(items)} messages for {mask_phone_number(phone_number)} in campaign {campaign_id}"
+                f"Retrieved {len(items)} {'new ' if delta_start else ''}messages for {mask_phone_number(phone_number)} in campaign {campaign_id}"
             )
 
-            messages = [ChatMessage(**item) for item in items]
+            if cached_conversation is None:
+                cached_conversation = CachedConversation()
+                history_cache.set((phone_number, campaign_id), cached_conversation)
+            cached_conversation.merge([HistoryMessage(**item) for item in items])
+            messages = list(cached_conversation.messages)
 
             if skip_last:
                 logger.info("Skipping last message in conversation history")
@@ -55,36 +228,173 @@ class ChatHistoryDDB:
             return []
 
     @staticmethod
-    def update_message_attributes(
+    async def iter_pages(query_kwargs: dict) -> AsyncIterator[list[dict]]:
+        """Yield the raw items of a chat history query one page at a time."""
+        query_kwargs = dict(query_kwargs)
+        while True:
+            response = await query_page(query_kwargs)
+            yield response.get("Items", [])
+            if "LastEvaluatedKey" not in response:
+                return
+            query_kwargs["ExclusiveStartKey"] = response["LastEvaluatedKey"]
+
+    @staticmethod
+    async def iter_conversation_history(
+        phone_number: str,
+        campaign_id: str,
+        page_size: int | None = None,
+        newest_first: bool = False,
+    ) -> AsyncIterator[ChatMessage]:
+        """
+        Stream a conversation without loading it into memory.
+
+        Pages are fetched as the iterator is consumed, so only one page is held at a
+        time. Bypasses the history cache.
+
+        Args:
+            phone_number: The customer's phone number in E.164 format
+            campaign_id: The campaign ID
+            page_size: Maximum messages read per query call, defaults to 1 MB pages
+            newest_first: Whether to yield messages in descending timestamp order
+
+        Yields:
+            The conversation's messages in timestamp order
+        """
+        query_kwargs = get_stream_query_kwargs(
+            phone_number, campaign_id, page_size, newest_first
+        )
+        async for page in AsyncChatHistoryDDB.iter_pages(query_kwargs):
+            for item in page:
+                yield to_chat_message(item)
+
+    @staticmethod
+    @on_connection
+    async def get_recent_conversation_history(
+        phone_number: str, campaign_id: str, limit: int, skip_last: bool = False
+    ) -> list[HistoryMessage]:
+        """
+        Fetch only the newest messages of a conversation.
+
+        Queries the index newest-first with a limit, so the read cost stays bounded no
+        matter how long the conversation is.
+
+        Args:
+            phone_number: The customer's phone number in E.164 format
+            campaign_id: The campaign ID
+            limit: Maximum number of messages to return
+            skip_last: Whether to leave out the newest message
+
+        Returns:
+            Up to `limit` messages in ascending timestamp order
+        """
+        if not campaign_id:
+            logger.warning("Campaign ID is required for conversation history")
+            return []
+
+        wanted = limit + 1 if skip_last else limit
+        try:
+            chat_table = await connection.table(CHAT_TABLE_NAME)
+            query_kwargs = {
+                **get_conversation_query_kwargs(phone_number, campaign_id),
+                **HISTORY_PROJECTION,
+            }
+            items = []
+            # Limit is applied before the campaign filter when querying the phone
+            # index, so keep reading pages until enough messages have matched
+            while len(items) < wanted:
+                response = await chat_table.query(
+                    **query_kwargs,
+                    ScanIndexForward=False,  # Newest first
+                    Limit=wanted - len(items),
+                )
+                items.extend(response.get("Items", []))
+                if "LastEvaluatedKey" not in response:
+                    break
+                query_kwargs["ExclusiveStartKey"] = response["LastEvaluatedKey"]
+
+            messages = [HistoryMessage(**item) for item in reversed(items[:wanted])]
+            logger.info(
+                f"Retrieved {len(messages)} recent messages for {mask_phone_number(phone_number)} in campaign {campaign_id}"
+            )
+
+            if skip_last and messages:
+                logger.info("Skipping last message in conversation history")
+                return messages[:-1]
+
+            return messages
+        except ClientError as e:
+            logger.error(
+                f"Error retrieving recent conversation history for {mask_phone_number(phone_number)} in campaign {campaign_id}: {e}",
+                exc_info=True,
+            )
+            return []
+
+    @staticmethod
+    @on_connection
+    async def get_messages_between(
+        phone_number: str,
+        campaign_id: str,
+        after: str | None,
+        before: str,
+    ) -> list[HistoryMessage]:
+        """
+        Fetch the messages of a conversation strictly between two timestamps.
+
+        Args:
+            phone_number: The customer's phone number in E.164 format
+            campaign_id: The campaign ID
+            after: Exclusive lower timestamp bound, or None to start at the beginning
+            before: Exclusive upper timestamp bound
+
+        Returns:
+            The messages in ascending timestamp order
+        """
+        try:
+            query_kwargs = {
+                **get_conversation_query_kwargs(phone_number, campaign_id),
+                **HISTORY_PROJECTION,
+            }
+            if after:
+                # between is inclusive, the bounds are dropped below
+                query_kwargs["KeyConditionExpression"] &= Key("timestamp").between(
+                    after, before
+                )
+            else:
+                query_kwargs["KeyConditionExpression"] &= Key("timestamp").lt(before)
+
+            items = []
+            async for page in AsyncChatHistoryDDB.iter_pages(
+                {**query_kwargs, "ScanIndexForward": True}
+            ):
+                items.extend(page)
+
+            return [
+                HistoryMessage(**item)
+                for item in items
+                if item["timestamp"] != after and item["timestamp"] != before
+            ]
+        except ClientError as e:
+            logger.error(
+                f"Error retrieving messages for {mask_phone_number(phone_number)} in campaign {campaign_id}: {e}",
+                exc_info=True,
+            )
+            return []
+
+    @staticmethod
+    @on_connection
+    async def update_message_attributes(
         message_id: str, attributes: UpdateChatMessageAttributes
     ):
         """Update the attributes for a message."""
         try:
-            # Build the update expression and attribute mappings dynamically
-            update_expressions = []
-            expression_attribute_names = {}
-            expression_attribute_values = {}
-
-            for attr_name, attr_value in attributes.as_dict().items():
-                # Use attribute names to handle reserved keywords
-                placeholder_name = f"#{attr_name}"
-                placeholder_value = f":{attr_name}"
-
-                update_expressions.append(f"{placeholder_name} = {placeholder_value}")
-                expression_attribute_names[placeholder_name] = attr_name
-                expression_attribute_values[placeholder_value] = attr_value
-
-            update_expression = f"SET {', '.join(update_expressions)}"
-
-            chat_table.update_item(
-                Key={"id": message_id},
-                UpdateExpression=update_expression,
-                ExpressionAttributeNames=expression_attribute_names,
-                ExpressionAttributeValues=expression_attribute_values,
+            chat_table = await connection.table(CHAT_TABLE_NAME)
+            await chat_table.update_item(
+                **get_message_attributes_update(message_id, attributes)
             )
             logger.info(
                 f"Updated attributes for message {message_id}: {attributes.as_dict()}"
             )
+            update_cached_message(message_id, attributes)
         except ClientError as e:
             logger.error(
                 f"Error updating attributes for message {message_id}: {e}",
@@ -93,12 +403,154 @@ class ChatHistoryDDB:
             raise Exception(f"Failed to update message attributes for {message_id}")
 
     @staticmethod
-    def add_message(message: AddMessageInput) -> str:
+    @on_connection
+    async def add_message(message: AddMessageInput) -> str:
         try:
             message.id = message.id or str(uuid.uuid4())
+            if message.campaign_id:
+                message.phone_number_campaign_id = get_phone_campaign_key(
+                    message.phone_number, message.campaign_id
+                )
             item = message.as_dict()
-            chat_table.put_item(Item=item)
+            chat_table = await connection.table(CHAT_TABLE_NAME)
+            await chat_table.put_item(Item=item)
             return message.id
         except ClientError as e:
             logger.error(f"Error adding message to history: {e}", exc_info=True)
             raise Exception("Failed to add message to history")
+
+    @staticmethod
+    @on_connection
+    async def add_messages(
+        messages: list[AddMessageInput], max_concurrency: int | None = None
+    ) -> list[str]:
+        """
+        Add many messages with parallel BatchWriteItem calls, e.g. a campaign launch.
+
+        Args:
+            messages: The messages to add
+            max_concurrency: Batches in flight at once
+
+        Returns:
+            The IDs of the added messages, in input order
+        """
+        for message in messages:
+            message.id = message.id or str(uuid.uuid4())
+            if message.campaign_id:
+                message.phone_number_campaign_id = get_phone_campaign_key(
+                    message.phone_number, message.campaign_id
+                )
+
+        try:
+            await batch_put_items(
+                CHAT_TABLE_NAME, [m.as_dict() for m in messages], max_concurrency
+            )
+            return [message.id for message in messages]
+        except ClientError as e:
+            logger.error(
+                f"Error adding {len(messages)} messages to history: {e}", exc_info=True
+            )
+            raise Exception("Failed to add messages to history")
+
+    @staticmethod
+    def invalidate_conversation(
+        phone_number: str | None = None, campaign_id: str | None = None
+    ):
+        """Drop a conversation from the history cache, or every conversation if not given."""
+        if phone_number and campaign_id:
+            history_cache.invalidate((phone_number, campaign_id))
+        else:
+            history_cache.clear()
+
+    @staticmethod
+    def get_cache_stats() -> CacheStats:
+        """Get the history cache hit and miss counters."""
+        return history_cache.stats()
+
+
+class ChatHistoryDDB:
+    """Synchronous wrapper around AsyncChatHistoryDDB."""
+
+    @staticmethod
+    def get_conversation_history(
+        phone_number: str, campaign_id: str | None = None, skip_last: bool = False
+    ) -> list[HistoryMessage]:
+        return connection.run_sync(
+            AsyncChatHistoryDDB.get_conversation_history(
+                phone_number, campaign_id, skip_last
+            )
+        )
+
+    @staticmethod
+    def get_recent_conversation_history(
+        phone_number: str, campaign_id: str, limit: int, skip_last: bool = False
+    ) -> list[HistoryMessage]:
+        return connection.run_sync(
+            AsyncChatHistoryDDB.get_recent_conversation_history(
+                phone_number, campaign_id, limit, skip_last
+            )
+        )
+
+    @staticmethod
+    def get_messages_between(
+        phone_number: str, campaign_id: str, after: str | None, before: str
+    ) -> list[HistoryMessage]:
+        return connection.run_sync(
+            AsyncChatHistoryDDB.get_messages_between(
+                phone_number, campaign_id, after, before
+            )
+        )
+
+    @staticmethod
+    def iter_conversation_history(
+        phone_number: str,
+        campaign_id: str,
+        page_size: int | None = None,
+        newest_first: bool = False,
+    ) -> Iterator[ChatMessage]:
+        """Stream a conversation page by page, see AsyncChatHistoryDDB."""
+        # Drive the async page loop one page per call, on the connection loop
+        pages = AsyncChatHistoryDDB.iter_pages(
+            get_stream_query_kwargs(phone_number, campaign_id, page_size, newest_first)
+        )
+
+        async def next_page() -> list[dict] | None:
+            return await anext(pages, None)
+
+        try:
+            while (page := connection.run_sync(next_page())) is not None:
+                for item in page:
+                    yield to_chat_message(item)
+        finally:
+            connection.run_sync(pages.aclose())
+
+    @staticmethod
+    def update_message_attributes(
+        message_id: str, attributes: UpdateChatMessageAttributes
+    ):
+        """Update the attributes for a message."""
+        return connection.run_sync(
+            AsyncChatHistoryDDB.update_message_attributes(message_id, attributes)
+        )
+
+    @staticmethod
+    def add_message(message: AddMessageInput) -> str:
+        return connection.run_sync(AsyncChatHistoryDDB.add_message(message))
+
+    @staticmethod
+    def add_messages(
+        messages: list[AddMessageInput], max_concurrency: int | None = None
+    ) -> list[str]:
+        return connection.run_sync(
+            AsyncChatHistoryDDB.add_messages(messages, max_concurrency)
+        )
+
+    @staticmethod
+    def invalidate_conversation(
+        phone_number: str | None = None, campaign_id: str | None = None
+    ):
+        AsyncChatHistoryDDB.invalidate_conversation(phone_number, campaign_id)
+
+    @staticmethod
+    def get_cache_stats() -> CacheStats:
+        return AsyncChatHistoryDDB.get_cache_stats()
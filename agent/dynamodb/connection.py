@@ -0,0 +1,139 @@
+"""Shared asyncio DynamoDB connection used by the async repositories."""
+
+import asyncio
+import atexit
+import concurrent.futures
+import contextlib
+import functools
+import threading
+from typing import Any, Awaitable, Callable, Coroutine, TypeVar
+
+import aioboto3
+from aiobotocore.config import AioConfig
+from aws_clients import get_client_config_kwargs
+from dynamodb import ensure_dynamodb_initialized
+from logging_config import setup_logging
+from utils import get_boto3_session_config, get_dynamodb_resource_config
+
+logger = setup_logging(__name__)
+
+T = TypeVar("T")
+
+
+class DynamoDBConnection:
+    """
+    Owns a single aioboto3 DynamoDB resource and its HTTP connection pool.
+
+    The resource lives on a dedicated event loop thread. Coroutines submitted from any
+    other loop or thread are dispatched to it, so every caller in the process shares the
+    same pool and no caller's event loop is blocked by DynamoDB I/O.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._thread: threading.Thread | None = None
+        self._resource: Any = None
+        self._resource_lock: asyncio.Lock | None = None
+        self._exit_stack: contextlib.AsyncExitStack | None = None
+        self._tables: dict[str, Any] = {}
+
+    def _get_loop(self) -> asyncio.AbstractEventLoop:
+        """Start the connection event loop thread on first use."""
+        with self._lock:
+            if self._loop is None:
+                loop = asyncio.new_event_loop()
+                thread = threading.Thread(
+                    target=loop.run_forever, name="dynamodb-connection", daemon=True
+                )
+                thread.start()
+                self._loop, self._thread = loop, thread
+            return self._loop
+
+    async def _get_resource(self) -> Any:
+        """Open the shared DynamoDB resource. Must run on the connection loop."""
+        if self._resource_lock is None:
+            self._resource_lock = asyncio.Lock()
+
+        async with self._resource_lock:
+            if self._resource is None:
+                self._exit_stack = contextlib.AsyncExitStack()
+                session = aioboto3.Session(**get_boto3_session_config())
+                self._resource = await self._exit_stack.enter_async_context(
+                    session.resource(
+                        "dynamodb",
+                        config=AioConfig(**get_client_config_kwargs("dynamodb")),
+                        **get_dynamodb_resource_config(),
+                    )
+                )
+                logger.info("Opened shared async DynamoDB connection")
+        return self._resource
+
+    async def table(self, table_name: str) -> Any:
+        """Get an async Table resource on the shared connection."""
+        if table_name not in self._tables:
+            # No-op unless the table check was deferred by lazy initialization
+            await asyncio.to_thread(ensure_dynamodb_initialized)
+            resource = await self._get_resource()
+            self._tables[table_name] = await resource.Table(table_name)
+        return self._tables[table_name]
+
+    async def resource(self) -> Any:
+        """Get the shared async DynamoDB service resource."""
+        return await self._get_resource()
+
+    def submit(self, coro: Coroutine[Any, Any, T]) -> concurrent.futures.Future[T]:
+        """Schedule a coroutine on the connection loop from any thread."""
+        return asyncio.run_coroutine_threadsafe(coro, self._get_loop())
+
+    async def run(self, coro: Coroutine[Any, Any, T]) -> T:
+        """Await a coroutine on the connection loop from any event loop."""
+        loop = self._get_loop()
+        if asyncio.get_running_loop() is loop:
+            return await coro
+        return await asyncio.wrap_future(self.submit(coro))
+
+    def run_sync(self, coro: Coroutine[Any, Any, T]) -> T:
+        """Run a coroutine on the connection loop and block until it completes."""
+        if threading.current_thread() is self._thread:
+            coro.close()
+            raise RuntimeError(
+                "Synchronous DynamoDB API called from the connection loop, use the async API"
+            )
+        return self.submit(coro).result()
+
+    def close(self):
+        """Close the shared resource and stop the connection loop."""
+        with self._lock:
+            loop, thread = self._loop, self._thread
+            self._loop = self._thread = None
+
+        if loop is None:
+            return
+
+        async def _close():
+            if self._exit_stack is not None:
+                await self._exit_stack.aclose()
+            self._resource = self._resource_lock = self._exit_stack = None
+            self._tables.clear()
+
+        asyncio.run_coroutine_threadsafe(_close(), loop).result()
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join()
+        loop.close()
+
+
+connection = DynamoDBConnection()
+atexit.register(connection.close)
+
+
+def on_connection(
+    func: Callable[..., Awaitable[T]],
+) -> Callable[..., Coroutine[Any, Any, T]]:
+    """Decorator that runs an async repository method on the shared connection loop."""
+
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs) -> T:
+        return await connection.run(func(*args, **kwargs))
+
+    return wrapper
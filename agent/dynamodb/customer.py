@@ -1,22 +1,82 @@
+import dataclasses
+import os
 from datetime import datetime, timezone
 
+from boto3.dynamodb.types import TypeDeserializer
 from botocore.exceptions import ClientError
-from dynamodb import get_table_references
+from cache import CacheStats, TTLCache
+from dynamodb import CUSTOMER_TABLE_NAME
+from dynamodb.batch import batch_get_items, batch_put_items
+from dynamodb.connection import connection, on_connection
 from dynamodb.models import Customer, CustomerStatus
 from logging_config import setup_logging
 from phone_utils import mask_phone_number
 
 logger = setup_logging(__name__)
 
-customer_table = get_table_references()["customers"]
+deserializer = TypeDeserializer()
 
+# Write-through cache keyed by normalized phone number. Writes made by this process
+# update it in place; out-of-band writes are bounded by the short TTL and detected
+# through the customer's updated_at version when the caller knows it.
+customer_cache: TTLCache[str, Customer] = TTLCache(
+    maxsize=int(os.environ.get("CUSTOMER_CACHE_MAX_SIZE", "1024")),
+    ttl=float(os.environ.get("CUSTOMER_CACHE_TTL_SECONDS", "30")),
+)
 
-class CustomerDDB:
+
+def get_customer_status_update(
+    phone_number: str,
+    status: CustomerStatus,
+    expected_status: CustomerStatus | None = None,
+) -> dict:
+    """UpdateItem arguments for setting the status of an existing customer."""
+    now = datetime.now(tz=timezone.utc).isoformat()
+    condition_expression = "attribute_exists(phone_number)"
+    expression_attribute_values = {":status": status.value, ":updated_at": now}
+    if expected_status:
+        condition_expression += " AND #status = :expected_status"
+        expression_attribute_values[":expected_status"] = expected_status.value
+
+    return {
+        "Key": {"phone_number": phone_number},
+        "UpdateExpression": "SET #status = :status, updated_at = :updated_at",
+        "ExpressionAttributeNames": {"#status": "status"},
+        "ExpressionAttributeValues": expression_attribute_values,
+        "ConditionExpression": condition_expression,
+    }
+
+
+def update_cached_customer_status(phone_number: str, update: dict):
+    """Apply a status update written without ReturnValues to the cached customer."""
+    cached_customer = customer_cache.get(phone_number)
+    if cached_customer:
+        values = update["ExpressionAttributeValues"]
+        customer_cache.set(
+            phone_number,
+            dataclasses.replace(
+                cached_customer,
+                status=CustomerStatus(values[":status"]),
+                updated_at=values[":updated_at"],
+            ),
+        )
+
+
+def skip_customer_status_update(phone_number: str, status: CustomerStatus):
+    """Handle a status update whose condition failed."""
+    customer_cache.invalidate(phone_number)
+    logger.info(
+        f"Customer {mask_phone_number(phone_number)} is missing or its status changed out-of-band, not updating it to {status}"
+    )
+
+
+class AsyncCustomerDDB:
 
     @staticmethod
-    def get_customer(phone_number: str) -> Customer | None:
+    @on_connection
+    async def get_customer(phone_number: str) -> Customer | None:
         """
-        Fetch a customer by phone number.
+        Fetch a customer by phone number from the table and refresh the cache.
 
         Args:
             phone_number: The customer's phone number in E.164 format
@@ -28,9 +88,13 @@ class CustomerDDB:
             Exception: If there is an error fetching the customer
         """
         try:
-            response = customer_table.get_item(Key={"phone_number": phone_number})
+            customer_table = await connection.table(CUSTOMER_TABLE_NAME)
+            response = await customer_table.get_item(Key={"phone_number": phone_number})
             if "Item" in response:
-                return Customer(**response["Item"])
+                customer = Customer(**response["Item"])
+                customer_cache.set(phone_number, dataclasses.replace(customer))
+                return customer
+            customer_cache.invalidate(phone_number)
             return None
         except ClientError as e:
             logger.error(f"Error fetching customer {phone_number}: {e}", exc_info=True)
@@ -39,7 +103,49 @@ class CustomerDDB:
             )
 
     @staticmethod
-    def create_customer(customer: Customer):
+    @on_connection
+    async def get_customers(phone_numbers: list[str]) -> dict[str, Customer]:
+        """
+        Fetch many customers, reading only the uncached ones with BatchGetItem.
+
+        Args:
+            phone_numbers: Phone numbers in E.164 format
+
+        Returns:
+            The found customers keyed by phone number; missing customers are left out
+
+        Raises:
+            Exception: If there is an error fetching the customers
+        """
+        customers = {}
+        missing_phone_numbers = []
+        for phone_number in dict.fromkeys(phone_numbers):
+            cached_customer = customer_cache.get(phone_number)
+            if cached_customer:
+                customers[phone_number] = dataclasses.replace(cached_customer)
+            else:
+                missing_phone_numbers.append(phone_number)
+
+        try:
+            items = await batch_get_items(
+                CUSTOMER_TABLE_NAME, "phone_number", missing_phone_numbers
+            )
+        except ClientError as e:
+            logger.error(
+                f"Error fetching {len(missing_phone_numbers)} customers: {e}",
+                exc_info=True,
+            )
+            raise Exception(f"Failed to fetch {len(missing_phone_numbers)} customers")
+
+        for phone_number, item in items.items():
+            customer = Customer(**item)
+            customer_cache.set(phone_number, dataclasses.replace(customer))
+            customers[phone_number] = customer
+        return customers
+
+    @staticmethod
+    @on_connection
+    async def create_customer(customer: Customer):
         """
         Create a new customer in the database.
 
@@ -55,7 +161,9 @@ class CustomerDDB:
                 customer.created_at = now
                 customer.updated_at = now
 
-            customer_table.put_item(Item=customer.as_dict())
+            customer_table = await connection.table(CUSTOMER_TABLE_NAME)
+            await customer_table.put_item(Item=customer.as_dict())
+            customer_cache.set(customer.phone_number, dataclasses.replace(customer))
         except ClientError as e:
             logger.error(
                 f"Error creating customer {customer.phone_number}: {e}", exc_info=True
@@ -65,26 +173,80 @@ class CustomerDDB:
             )
 
     @staticmethod
-    def get_or_create_customer(
+    @on_connection
+    async def create_customers(
+        customers: list[Customer], max_concurrency: int | None = None
+    ):
+        """
+        Create or overwrite many customers with parallel BatchWriteItem calls.
+
+        Args:
+            customers: Customer objects to create; the last one wins for a repeated phone number
+            max_concurrency: Batches in flight at once
+
+        Raises:
+            Exception: If there is an error creating the customers
+        """
+        now = datetime.now(tz=timezone.utc).isoformat()
+        items = {}
+        for customer in customers:
+            if customer.created_at is None or customer.updated_at is None:
+                customer.created_at = now
+                customer.updated_at = now
+            items[customer.phone_number] = customer.as_dict()
+
+        try:
+            await batch_put_items(
+                CUSTOMER_TABLE_NAME, list(items.values()), max_concurrency
+            )
+        except ClientError as e:
+            logger.error(
+                f"Error batch creating {len(items)} customers: {e}", exc_info=True
+            )
+            raise Exception(f"Failed to create {len(items)} customers")
+        finally:
+            # Drop rather than fill cached entries, a launch would evict every hot customer
+            for phone_number in items:
+                customer_cache.invalidate(phone_number)
+
+    @staticmethod
+    @on_connection
+    async def get_or_create_customer(
         phone_number: str,
         first_name: str = "Unknown",
         last_name: str = "Customer",
         most_recent_campaign_id: str | None = None,
-    ):
+        known_updated_at: str | None = None,
+    ) -> Customer:
         """
         Get an existing customer or create a new one.
 
+        A cached customer is returned without reading the table, unless known_updated_at
+        shows that the customer was changed elsewhere since it was cached. Without
+        known_updated_at the caller has not seen the customer, so the customer is
+        created with a conditional put that returns the existing item instead if there
+        is one, in a single round trip.
+
         Args:
             phone_number: The customer's phone number in E.164 format
             first_name: First name for new customer (default "Unknown")
             last_name: Last name for new customer (default "Customer")
+            known_updated_at: The customer's updated_at as last read by the caller, if known
 
         Returns:
             Customer object
         """
-        customer = CustomerDDB.get_customer(phone_number)
-        if customer:
-            return customer
+        cached_customer = customer_cache.get(phone_number)
+        if cached_customer and (
+            known_updated_at is None or known_updated_at == cached_customer.updated_at
+        ):
+            return dataclasses.replace(cached_customer)
+
+        if known_updated_at is not None:
+            # The caller read the customer, so it almost certainly exists
+            customer = await AsyncCustomerDDB.get_customer(phone_number)
+            if customer:
+                return customer
 
         now = datetime.now(tz=timezone.utc).isoformat()
 
@@ -100,34 +262,176 @@ class CustomerDDB:
         if most_recent_campaign_id:
             new_customer.most_recent_campaign_id = most_recent_campaign_id
 
-        CustomerDDB.create_customer(new_customer)
-        return new_customer
+        return await AsyncCustomerDDB.create_customer_if_missing(new_customer)
 
     @staticmethod
-    def update_customer_status(phone_number: str, status: CustomerStatus):
+    @on_connection
+    async def create_customer_if_missing(customer: Customer) -> Customer:
         """
-        Update the status of an existing customer.
+        Create a customer unless one already exists for the phone number.
+
+        Safe against concurrent creation: exactly one writer creates the customer and
+        every other one gets the stored customer back from the failed condition.
+
+        Args:
+            customer: Customer object to create
+
+        Returns:
+            The created customer, or the existing one
+
+        Raises:
+            Exception: If there is an error creating the customer
+        """
+        try:
+            customer_table = await connection.table(CUSTOMER_TABLE_NAME)
+            await customer_table.put_item(
+                Item=customer.as_dict(),
+                ConditionExpression="attribute_not_exists(phone_number)",
+                ReturnValuesOnConditionCheckFailure="ALL_OLD",
+            )
+            logger.info(f"Created customer {mask_phone_number(customer.phone_number)}")
+        except ClientError as e:
+            if e.response["Error"]["Code"] != "ConditionalCheckFailedException":
+                logger.error(
+                    f"Error creating customer {customer.phone_number}: {e}",
+                    exc_info=True,
+                )
+                raise Exception(
+                    f"Failed to create customer: {mask_phone_number(customer.phone_number)}"
+                )
+            # Error responses are not deserialized by the resource layer
+            customer = Customer(
+                **{k: deserializer.deserialize(v) for k, v in e.response["Item"].items()}
+            )
+
+        customer_cache.set(customer.phone_number, dataclasses.replace(customer))
+        return customer
+
+    @staticmethod
+    @on_connection
+    async def update_customer_status(
+        phone_number: str,
+        status: CustomerStatus,
+        expected_status: CustomerStatus | None = None,
+    ) -> Customer | None:
+        """
+        Update the status of an existing customer and write it through to the cache.
 
         Args:
             phone_number: The customer's phone number in E.164 format
             status: New status to set
+            expected_status: Only update if the stored status still matches this one,
+                so that a status set out-of-band (e.g. by a human agent) is not overwritten
+
+        Returns:
+            The updated customer, or None if the customer does not exist or its stored
+            status did not match expected_status
 
         Raises:
             Exception: If there is an error updating the customer
         """
         try:
-            now = datetime.now(tz=timezone.utc).isoformat()
-            customer_table.update_item(
-                Key={"phone_number": phone_number},
-                UpdateExpression="SET #status = :status, updated_at = :updated_at",
-                ExpressionAttributeNames={"#status": "status"},
-                ExpressionAttributeValues={":status": status.value, ":updated_at": now},
-                ReturnValues="NONE",
+            customer_table = await connection.table(CUSTOMER_TABLE_NAME)
+            response = await customer_table.update_item(
+                **get_customer_status_update(phone_number, status, expected_status),
+                ReturnValues="ALL_NEW",
             )
+
+            customer = Customer(**response["Attributes"])
+            customer_cache.set(phone_number, dataclasses.replace(customer))
+            return customer
         except ClientError as e:
+            if e.response["Error"]["Code"] == "ConditionalCheckFailedException":
+                skip_customer_status_update(phone_number, status)
+                return None
+
             logger.error(
                 f"Error updating customer {phone_number} status: {e}", exc_info=True
             )
             raise Exception(
                 f"Failed to update customer status: {mask_phone_number(phone_number)}"
             )
+
+    @staticmethod
+    def invalidate_customer(phone_number: str | None = None):
+        """Drop a customer from the cache, or every customer if no phone number is given."""
+        if phone_number:
+            customer_cache.invalidate(phone_number)
+        else:
+            customer_cache.clear()
+
+    @staticmethod
+    def get_cache_stats() -> CacheStats:
+        """Get the customer cache hit and miss counters."""
+        return customer_cache.stats()
+
+
+class CustomerDDB:
+    """Synchronous wrapper around AsyncCustomerDDB."""
+
+    @staticmethod
+    def get_customer(phone_number: str) -> Customer | None:
+        """Fetch a customer by phone number. See AsyncCustomerDDB.get_customer."""
+        return connection.run_sync(AsyncCustomerDDB.get_customer(phone_number))
+
+    @staticmethod
+    def get_customers(phone_numbers: list[str]) -> dict[str, Customer]:
+        """Fetch many customers at once. See AsyncCustomerDDB.get_customers."""
+        return connection.run_sync(AsyncCustomerDDB.get_customers(phone_numbers))
+
+    @staticmethod
+    def create_customer(customer: Customer):
+        """Create a new customer. See AsyncCustomerDDB.create_customer."""
+        return connection.run_sync(AsyncCustomerDDB.create_customer(customer))
+
+    @staticmethod
+    def create_customers(customers: list[Customer], max_concurrency: int | None = None):
+        """Create many customers in batches. See AsyncCustomerDDB.create_customers."""
+        return connection.run_sync(
+            AsyncCustomerDDB.create_customers(customers, max_concurrency)
+        )
+
+    @staticmethod
+    def create_customer_if_missing(customer: Customer) -> Customer:
+        """Create a customer unless it exists. See AsyncCustomerDDB.create_customer_if_missing."""
+        return connection.run_sync(AsyncCustomerDDB.create_customer_if_missing(customer))
+
+    @staticmethod
+    def get_or_create_customer(
+        phone_number: str,
+        first_name: str = "Unknown",
+        last_name: str = "Customer",
+        most_recent_campaign_id: str | None = None,
+        known_updated_at: str | None = None,
+    ) -> Customer:
+        """Get an existing customer or create a new one. See AsyncCustomerDDB.get_or_create_customer."""
+        return connection.run_sync(
+            AsyncCustomerDDB.get_or_create_customer(
+                phone_number,
+                first_name,
+                last_name,
+                most_recent_campaign_id,
+                known_updated_at,
+            )
+        )
+
+    @staticmethod
+    def update_customer_status(
+        phone_number: str,
+        status: CustomerStatus,
+        expected_status: CustomerStatus | None = None,
+    ) -> Customer | None:
+        """Update the status of a customer. See AsyncCustomerDDB.update_customer_status."""
+        return connection.run_sync(
+            AsyncCustomerDDB.update_customer_status(
+                phone_number, status, expected_status
+            )
+        )
+
+    @staticmethod
+    def invalidate_customer(phone_number: str | None = None):
+        AsyncCustomerDDB.invalidate_customer(phone_number)
+
+    @staticmethod
+    def get_cache_stats() -> CacheStats:
+        return AsyncCustomerDDB.get_cache_stats()
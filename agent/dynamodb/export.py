@@ -0,0 +1,353 @@
+"""
+Parallel segmented scan of a table into columnar part files, for offline analytics.
+
+Every segment is scanned by its own worker and written as a series of part files, so
+memory is bounded by EXPORT_ROWS_PER_FILE rows per running worker. A checkpoint records
+how far each segment got, and an interrupted export resumes from it.
+"""
+
+import asyncio
+import gzip
+import json
+import os
+import time
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, get_args
+
+from boto3.dynamodb.types import TypeDeserializer, TypeSerializer
+from botocore.exceptions import ClientError
+from chat_archive import json_default
+from dynamodb.connection import connection, on_connection
+from dynamodb.models import ChatMessage
+from logging_config import setup_logging
+
+logger = setup_logging(__name__)
+
+# Rows buffered per segment before a part file is written and the checkpoint advanced
+EXPORT_ROWS_PER_FILE = int(os.environ.get("EXPORT_ROWS_PER_FILE", "10000"))
+# Share of the table's read capacity the export may consume
+EXPORT_TARGET_CAPACITY_SHARE = float(
+    os.environ.get("EXPORT_TARGET_CAPACITY_SHARE", "0.25")
+)
+# Read capacity assumed for on-demand tables without a maximum throughput
+EXPORT_ON_DEMAND_READ_CAPACITY = float(
+    os.environ.get("EXPORT_ON_DEMAND_READ_CAPACITY", "4000")
+)
+
+CHECKPOINT_FILE_NAME = "_checkpoint.json"
+
+serializer = TypeSerializer()
+deserializer = TypeDeserializer()
+
+
+@dataclass
+class SegmentProgress:
+    """How far a scan segment got; the key is in DynamoDB JSON, so it round-trips."""
+
+    exclusive_start_key: dict[str, Any] | None = None
+    parts: int = 0
+    items: int = 0
+    done: bool = False
+
+
+@dataclass
+class ExportResult:
+    items: int
+    parts: int
+    consumed_capacity: float
+    elapsed_seconds: float
+    segments: dict[int, SegmentProgress] = field(default_factory=dict)
+
+
+class CapacityLimiter:
+    """
+    Token bucket of read capacity units shared by the scan workers.
+
+    Workers pay for a page after reading it, with the capacity DynamoDB reports as
+    consumed, and wait before the next page while the bucket is in debt.
+    """
+
+    def __init__(self, units_per_second: float):
+        self.units_per_second = units_per_second
+        # Allow a one second burst, so the first pages of every worker start at once
+        self.tokens = units_per_second
+        self.updated_at = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(
+            self.units_per_second,
+            self.tokens + (now - self.updated_at) * self.units_per_second,
+        )
+        self.updated_at = now
+
+    async def acquire(self):
+        self._refill()
+        while self.tokens < 0:
+            await asyncio.sleep(-self.tokens / self.units_per_second)
+            self._refill()
+
+    def consume(self, units: float):
+        self._refill()
+        self.tokens -= units
+
+
+def get_arrow_type(annotation: Any) -> Any:
+    """Parquet type of a column: booleans stay booleans, everything else is a string."""
+    import pyarrow as pa
+
+    return pa.bool_() if bool in (get_args(annotation) or (annotation,)) else pa.string()
+
+
+# Fixed schema for chat history, so part files of different segments always match.
+# handoff_reason is written by the backend and not part of ChatMessage.
+CHAT_HISTORY_COLUMNS = {
+    **{name: f.type for name, f in ChatMessage.__dataclass_fields__.items()},
+    "handoff_reason": str | None,
+}
+
+
+def to_row(item: dict[str, Any]) -> dict[str, Any]:
+    """Convert the Decimal numbers of a scanned item to plain int and float."""
+    return json.loads(json.dumps(item, default=json_default))
+
+
+def write_part(
+    output_dir: Path,
+    segment: int,
+    part: int,
+    rows: list[dict[str, Any]],
+    columns: dict[str, Any] | None,
+) -> Path:
+    """
+    Write one part file, as Parquet if pyarrow is installed and gzipped JSONL otherwise.
+
+    The file is written under a temporary name and renamed, so a crashed export never
+    leaves a partial part behind.
+    """
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        pa = None
+
+    name = f"part-{segment:04d}-{part:05d}"
+    if pa is not None:
+        path = output_dir / f"{name}.parquet"
+        if columns:
+            schema = pa.schema(
+                [(column, get_arrow_type(kind)) for column, kind in columns.items()]
+            )
+            table = pa.Table.from_pylist(rows, schema=schema)
+        else:
+            table = pa.Table.from_pylist(rows)
+        pq.write_table(table, f"{path}.tmp", compression="zstd")
+    else:
+        path = output_dir / f"{name}.jsonl.gz"
+        with gzip.open(f"{path}.tmp", "wt") as f:
+            for row in rows:
+                f.write(json.dumps(row) + "\n")
+
+    os.replace(f"{path}.tmp", path)
+    return path
+
+
+class Checkpoint:
+    """Progress of every segment, persisted atomically after each part file."""
+
+    def __init__(self, path: Path, table_name: str, total_segments: int):
+        self.path = path
+        self.table_name = table_name
+        self.total_segments = total_segments
+        self.segments = {
+            segment: SegmentProgress() for segment in range(total_segments)
+        }
+        self._lock = asyncio.Lock()
+
+    def load(self) -> bool:
+        """Restore progress from an earlier run, True if there was one."""
+        if not self.path.exists():
+            return False
+
+        data = json.loads(self.path.read_text())
+        if (
+            data["table_name"] != self.table_name
+            or data["total_segments"] != self.total_segments
+        ):
+            raise Exception(
+                f"Checkpoint {self.path} is for {data['table_name']} with {data['total_segments']} segments, not {self.table_name} with {self.total_segments}"
+            )
+        self.segments = {
+            int(segment): SegmentProgress(**progress)
+            for segment, progress in data["segments"].items()
+        }
+        return True
+
+    def _write(self, data: str):
+        Path(f"{self.path}.tmp").write_text(data)
+        os.replace(f"{self.path}.tmp", self.path)
+
+    async def save(self):
+        async with self._lock:
+            data = json.dumps(
+                {
+                    "table_name": self.table_name,
+                    "total_segments": self.total_segments,
+                    "segments": {
+                        segment: asdict(progress)
+                        for segment, progress in self.segments.items()
+                    },
+                }
+            )
+            await asyncio.to_thread(self._write, data)
+
+
+async def get_read_capacity(table_name: str) -> float:
+    """Read capacity units per second of a provisioned or on-demand table."""
+    resource = await connection.resource()
+    description = await resource.meta.client.describe_table(TableName=table_name)
+    table = description["Table"]
+    provisioned = table.get("ProvisionedThroughput", {}).get("ReadCapacityUnits", 0)
+    if provisioned:
+        return float(provisioned)
+    on_demand_max = table.get("OnDemandThroughput", {}).get("MaxReadRequestUnits", -1)
+    if on_demand_max > 0:
+        return float(on_demand_max)
+    return EXPORT_ON_DEMAND_READ_CAPACITY
+
+
+@on_connection
+async def export_table(
+    table_name: str,
+    output_dir: str,
+    total_segments: int = 8,
+    max_workers: int | None = None,
+    target_capacity_share: float | None = None,
+    columns: dict[str, Any] | None = None,
+    rows_per_file: int | None = None,
+) -> ExportResult:
+    """
+    Export a table with a parallel scan, resuming from the checkpoint in output_dir.
+
+    Args:
+        table_name: The table to export
+        output_dir: Directory for the part files and the checkpoint
+        total_segments: Scan segments; fixed for the lifetime of a checkpoint
+        max_workers: Segments scanned at once, defaults to all of them
+        target_capacity_share: Share of the table's read capacity to consume, defaults
+            to EXPORT_TARGET_CAPACITY_SHARE
+        columns: Attributes to export with their Python types, e.g. CHAT_HISTORY_COLUMNS.
+            Every attribute is exported when not given.
+        rows_per_file: Rows per part file, defaults to EXPORT_ROWS_PER_FILE
+
+    Returns:
+        Totals of this run, and the progress of every segment
+    """
+    output_path = Path(output_dir)
+    output_path.mkdir(parents=True, exist_ok=True)
+    rows_per_file = rows_per_file or EXPORT_ROWS_PER_FILE
+
+    checkpoint = Checkpoint(
+        output_path / CHECKPOINT_FILE_NAME, table_name, total_segments
+    )
+    if checkpoint.load():
+        remaining = [s for s, p in checkpoint.segments.items() if not p.done]
+        logger.info(
+            f"Resuming export of {table_name}, {len(remaining)} of {total_segments} segments left"
+        )
+
+    units_per_second = await get_read_capacity(table_name) * (
+        target_capacity_share or EXPORT_TARGET_CAPACITY_SHARE
+    )
+    limiter = CapacityLimiter(units_per_second)
+    logger.info(
+        f"Exporting {table_name} in {total_segments} segments at up to {units_per_second:.0f} RCU/s"
+    )
+
+    table = await connection.table(table_name)
+    scan_kwargs: dict[str, Any] = {
+        "TotalSegments": total_segments,
+        "ReturnConsumedCapacity": "TOTAL",
+    }
+    if columns:
+        scan_kwargs["ProjectionExpression"] = ", ".join(f"#{c}" for c in columns)
+        scan_kwargs["ExpressionAttributeNames"] = {f"#{c}": c for c in columns}
+
+    totals = {"items": 0, "parts": 0, "consumed_capacity": 0.0}
+    semaphore = asyncio.Semaphore(max_workers or total_segments)
+
+    async def export_segment(segment: int):
+        progress = checkpoint.segments[segment]
+        start_key = progress.exclusive_start_key
+        rows: list[dict[str, Any]] = []
+        async with semaphore:
+            while not progress.done:
+                await limiter.acquire()
+                segment_kwargs = {**scan_kwargs, "Segment": segment}
+                if start_key:
+                    segment_kwargs["ExclusiveStartKey"] = {
+                        k: deserializer.deserialize(v) for k, v in start_key.items()
+                    }
+                response = await table.scan(**segment_kwargs)
+
+                consumed = response.get("ConsumedCapacity", {}).get("CapacityUnits", 0)
+                limiter.consume(consumed)
+                totals["consumed_capacity"] += consumed
+
+                rows.extend(to_row(item) for item in response.get("Items", []))
+                last_key = response.get("LastEvaluatedKey")
+                start_key = (
+                    {k: serializer.serialize(v) for k, v in last_key.items()}
+                    if last_key
+                    else None
+                )
+
+                # The checkpoint only advances with a written part file, so a resumed
+                # export rescans the pages of rows that were still buffered
+                if len(rows) >= rows_per_file or start_key is None:
+                    if rows:
+                        await asyncio.to_thread(
+                            write_part,
+                            output_path,
+                            segment,
+                            progress.parts,
+                            rows,
+                            columns,
+                        )
+                        progress.parts += 1
+                        progress.items += len(rows)
+                        totals["parts"] += 1
+                        totals["items"] += len(rows)
+                        rows = []
+                    progress.exclusive_start_key = start_key
+                    progress.done = start_key is None
+                    await checkpoint.save()
+
+    start = time.perf_counter()
+    tasks = [asyncio.create_task(export_segment(s)) for s in range(total_segments)]
+    try:
+        await asyncio.gather(*tasks)
+    except BaseException as e:
+        # Stop the other segments on any failure or cancellation, and wait for them so
+        # none keeps scanning or writing; written part files are in the checkpoint, so a
+        # rerun picks up from there
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        if isinstance(e, ClientError):
+            logger.error(f"Error exporting {table_name}: {e}", exc_info=True)
+            raise Exception(f"Failed to export table: {table_name}")
+        raise
+    elapsed = time.perf_counter() - start
+
+    logger.info(
+        f"Exported {totals['items']} items of {table_name} to {totals['parts']} part files in {elapsed:.1f} s"
+    )
+    return ExportResult(
+        items=totals["items"],
+        parts=totals["parts"],
+        consumed_capacity=totals["consumed_capacity"],
+        elapsed_seconds=elapsed,
+        segments=checkpoint.segments,
+    )
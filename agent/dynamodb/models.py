@@ -32,6 +32,8 @@ class Campaign(DictMixin):
     campaign_id: str
     name: str
     campaign_details: str | None = None
+    # Set once the campaign's conversations were archived and expired from chat history
+    archived_at: str | None = None
 
 
 @dataclass
@@ -50,6 +52,7 @@ class ChatMessage(DictMixin):
     phone_number: str
     direction: Literal["inbound", "outbound"]
     timestamp: str
+    phone_number_campaign_id: str | None = None
     response_type: Literal["automated", "ai_agent", "manual"] | None = None
     status: Literal["queued", "sent", "delivered", "failed"] | None = None
     guardrails_intervened: bool | None = None
@@ -60,6 +63,23 @@ class ChatMessage(DictMixin):
     error_message: str | None = None
 
 
+@dataclass
+class HistoryMessage(DictMixin):
+    """Lean read model of ChatMessage, with only what the agent's history needs."""
+
+    id: str
+    message: str
+    direction: Literal["inbound", "outbound"]
+    timestamp: str
+    guardrails_intervened: bool | None = None
+
+
+@dataclass
+class ConversationSummary(DictMixin):
+    conversation_summary: str
+    summarized_through: str  # Timestamp of the newest summarized message
+
+
 @dataclass
 class UpdateChatMessageAttributes(DictMixin):
     guardrails_intervened: bool | None = None
@@ -74,5 +94,6 @@ class AddMessageInput(DictMixin):
     timestamp: str
     id: str | None = None
     campaign_id: str | None = None
+    phone_number_campaign_id: str | None = None  # Set from phone_number and campaign_id
     response_type: Literal["automated", "ai_agent", "manual"] | None = None
     guardrails_intervened: bool | None = None
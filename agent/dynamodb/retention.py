@@ -0,0 +1,424 @@
+"""
+Tiered retention of chat history: closed campaigns are archived to the chat archive,
+expired from the chat table by TTL, and rehydrated when a customer replies again.
+"""
+
+import asyncio
+import os
+import time
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+from typing import Any
+
+import chat_archive
+from boto3.dynamodb.conditions import Attr, Key
+from botocore.exceptions import ClientError
+from dynamodb import (
+    CAMPAIGN_CUSTOMER_TABLE_NAME,
+    CAMPAIGN_TABLE_NAME,
+    CHAT_PHONE_INDEX_NAME,
+    CHAT_TABLE_NAME,
+)
+from dynamodb.batch import BATCH_WRITE_MAX_CONCURRENCY, batch_put_items
+from dynamodb.campaign import AsyncCampaignDDB
+from dynamodb.chat_history import AsyncChatHistoryDDB
+from dynamodb.connection import connection, on_connection
+from dynamodb.models import HistoryMessage
+from logging_config import setup_logging
+from phone_utils import mask_phone_number
+
+logger = setup_logging(__name__)
+
+# Name of the chat table's TTL attribute, in epoch seconds
+EXPIRES_AT_ATTRIBUTE = "expires_at"
+# Days archived messages stay in the chat table before DynamoDB deletes them
+CHAT_RETENTION_GRACE_DAYS = int(os.environ.get("CHAT_RETENTION_GRACE_DAYS", "7"))
+# Days rehydrated messages stay in the chat table before expiring again
+CHAT_REHYDRATED_RETENTION_DAYS = int(
+    os.environ.get("CHAT_REHYDRATED_RETENTION_DAYS", "30")
+)
+
+
+def get_expires_at(days: int) -> int:
+    """TTL attribute value for the given number of days from now."""
+    return int(time.time() + days * 86400)
+
+
+def merge_items(
+    archived_items: list[dict[str, Any]] | None, items: list[dict[str, Any]]
+) -> list[dict[str, Any]]:
+    """Union of archived and live items by message ID, in timestamp order."""
+    merged = {item["id"]: item for item in archived_items or []}
+    merged.update({item["id"]: item for item in items})
+    return sorted(merged.values(), key=lambda item: item["timestamp"])
+
+
+def to_history_messages(items: list[dict[str, Any]]) -> list[HistoryMessage]:
+    """History messages of archived items, in timestamp order."""
+    return [
+        HistoryMessage(
+            **{field: item.get(field) for field in HistoryMessage.__dataclass_fields__}
+        )
+        for item in sorted(items, key=lambda item: item["timestamp"])
+    ]
+
+
+class AsyncRetentionDDB:
+
+    @staticmethod
+    @on_connection
+    async def get_campaign_phone_numbers(campaign_id: str) -> list[str]:
+        """List the phone numbers of a campaign's customers."""
+        campaign_customer_table = await connection.table(CAMPAIGN_CUSTOMER_TABLE_NAME)
+        query_kwargs = {
+            "KeyConditionExpression": Key("campaign_id").eq(campaign_id),
+            "ProjectionExpression": "phone_number",
+        }
+        phone_numbers = []
+        while True:
+            response = await campaign_customer_table.query(**query_kwargs)
+            phone_numbers.extend(item["phone_number"] for item in response["Items"])
+            if "LastEvaluatedKey" not in response:
+                return phone_numbers
+            query_kwargs["ExclusiveStartKey"] = response["LastEvaluatedKey"]
+
+    @staticmethod
+    @on_connection
+    async def find_closed_campaigns(completed_before_days: int) -> list[str]:
+        """
+        Find completed campaigns that have not been archived yet.
+
+        Args:
+            completed_before_days: Only return campaigns completed at least this many
+                days ago, so late replies are still answered from the hot table
+
+        Returns:
+            The IDs of the campaigns to close
+        """
+        cutoff = (
+            datetime.now(tz=timezone.utc) - timedelta(days=completed_before_days)
+        ).isoformat()
+        campaign_table = await connection.table(CAMPAIGN_TABLE_NAME)
+        scan_kwargs = {
+            "FilterExpression": Attr("status").eq("completed")
+            & Attr("updated_at").lt(cutoff)
+            & Attr("archived_at").not_exists(),
+            "ProjectionExpression": "campaign_id",
+        }
+        campaign_ids = []
+        while True:
+            response = await campaign_table.scan(**scan_kwargs)
+            campaign_ids.extend(item["campaign_id"] for item in response["Items"])
+            if "LastEvaluatedKey" not in response:
+                return campaign_ids
+            scan_kwargs["ExclusiveStartKey"] = response["LastEvaluatedKey"]
+
+    @staticmethod
+    async def get_conversation_items(
+        phone_number: str, campaign_id: str
+    ) -> list[dict[str, Any]]:
+        """
+        Read the raw items of a conversation, with every attribute.
+
+        Always queries the phone number index, since messages written before the
+        campaign index backfill are missing from it and would never be archived.
+        """
+        items = []
+        async for page in AsyncChatHistoryDDB.iter_pages(
+            {
+                "IndexName": CHAT_PHONE_INDEX_NAME,
+                "KeyConditionExpression": Key("phone_number").eq(phone_number),
+                "FilterExpression": Attr("campaign_id").eq(campaign_id),
+            }
+        ):
+            items.extend(page)
+        return items
+
+    @staticmethod
+    async def set_expires_at(message_ids: list[str], expires_at: int):
+        """
+        Set the TTL of messages with one UpdateItem each, running several at once.
+
+        Only the TTL attribute is written, so concurrent updates of other attributes are
+        never reverted, and messages deleted in the meantime are not recreated.
+        """
+        chat_table = await connection.table(CHAT_TABLE_NAME)
+        semaphore = asyncio.Semaphore(BATCH_WRITE_MAX_CONCURRENCY)
+
+        async def update_bounded(message_id: str):
+            async with semaphore:
+                try:
+                    await chat_table.update_item(
+                        Key={"id": message_id},
+                        UpdateExpression="SET #expires_at = :expires_at",
+                        ConditionExpression="attribute_exists(id)",
+                        ExpressionAttributeNames={"#expires_at": EXPIRES_AT_ATTRIBUTE},
+                        ExpressionAttributeValues={":expires_at": expires_at},
+                    )
+                except ClientError as e:
+                    if e.response["Error"]["Code"] != "ConditionalCheckFailedException":
+                        raise
+
+        await asyncio.gather(*(update_bounded(m) for m in message_ids))
+
+    @staticmethod
+    @on_connection
+    async def close_campaign(
+        campaign_id: str, grace_days: int | None = None, dry_run: bool = False
+    ) -> int:
+        """
+        Archive a campaign's conversations, then set their TTL and mark the campaign.
+
+        Conversations are merged with what is already archived, so closing a campaign
+        again (e.g. after replies were rehydrated) never drops archived messages.
+        Messages only get their TTL once their conversation's archive object is stored.
+        The analytics Parquet file is rebuilt from the merged conversations, so a rerun
+        restores it if storing it failed.
+
+        Args:
+            campaign_id: The campaign to close
+            grace_days: Days until the messages expire, defaults to CHAT_RETENTION_GRACE_DAYS
+            dry_run: Only count the messages that would be archived
+
+        Returns:
+            The number of messages archived
+        """
+        expires_at = get_expires_at(
+            CHAT_RETENTION_GRACE_DAYS if grace_days is None else grace_days
+        )
+        phone_numbers = await AsyncRetentionDDB.get_campaign_phone_numbers(campaign_id)
+
+        parquet_writer = None
+        if chat_archive.CHAT_ARCHIVE_FORMAT == "parquet" and not dry_run:
+            parquet_writer = chat_archive.ParquetArchiveWriter(campaign_id)
+
+        archived_count = 0
+        try:
+            for phone_number in phone_numbers:
+                items = await AsyncRetentionDDB.get_conversation_items(
+                    phone_number, campaign_id
+                )
+                archived_items = await asyncio.to_thread(
+                    chat_archive.read_archived_conversation, campaign_id, phone_number
+                )
+                merged_items = merge_items(archived_items, items)
+                archived_count += len(merged_items)
+                if dry_run or not merged_items:
+                    continue
+
+                await asyncio.to_thread(
+                    chat_archive.write_object,
+                    chat_archive.get_conversation_key(campaign_id, phone_number),
+                    chat_archive.encode_jsonl(merged_items),
+                )
+                if parquet_writer:
+                    parquet_writer.write_conversation(merged_items)
+
+                # Rehydrated messages keep the TTL they were restored with
+                await AsyncRetentionDDB.set_expires_at(
+                    [item["id"] for item in items if EXPIRES_AT_ATTRIBUTE not in item],
+                    expires_at,
+                )
+                AsyncChatHistoryDDB.invalidate_conversation(phone_number, campaign_id)
+
+            if parquet_writer:
+                await asyncio.to_thread(parquet_writer.close)
+        except ClientError as e:
+            logger.error(f"Error closing campaign {campaign_id}: {e}", exc_info=True)
+            raise Exception(f"Failed to close campaign: {campaign_id}")
+
+        if not dry_run:
+            await AsyncRetentionDDB.mark_campaign_archived(campaign_id)
+        logger.info(
+            f"{'Would archive' if dry_run else 'Archived'} {archived_count} messages of {len(phone_numbers)} customers in campaign {campaign_id}"
+        )
+        return archived_count
+
+    @staticmethod
+    @on_connection
+    async def mark_campaign_archived(campaign_id: str):
+        """Record on the campaign when its conversations were archived."""
+        try:
+            campaign_table = await connection.table(CAMPAIGN_TABLE_NAME)
+            await campaign_table.update_item(
+                Key={"campaign_id": campaign_id},
+                UpdateExpression="SET archived_at = :archived_at",
+                ExpressionAttributeValues={
+                    ":archived_at": datetime.now(tz=timezone.utc).isoformat()
+                },
+            )
+            AsyncCampaignDDB.invalidate_campaign(campaign_id)
+        except ClientError as e:
+            logger.error(
+                f"Error marking campaign {campaign_id} archived: {e}", exc_info=True
+            )
+            raise Exception(f"Failed to mark campaign archived: {campaign_id}")
+
+    @staticmethod
+    @on_connection
+    async def get_archived_conversation(
+        phone_number: str, campaign_id: str, archived_at: str
+    ) -> list[HistoryMessage] | None:
+        """
+        Read an archived conversation that has not been restored since its archival.
+
+        The campaign customer record remembers when the conversation was last
+        rehydrated, so this is one GetItem for every reply to an archived campaign,
+        however many messages were exchanged after the restore.
+
+        Args:
+            phone_number: The customer's phone number in E.164 format
+            campaign_id: The archived campaign
+            archived_at: When the campaign was (last) archived
+
+        Returns:
+            The archived messages in timestamp order, or None if the conversation was
+            already rehydrated and the restored messages have not expired yet
+        """
+        try:
+            campaign_customer_table = await connection.table(CAMPAIGN_CUSTOMER_TABLE_NAME)
+            response = await campaign_customer_table.get_item(
+                Key={"campaign_id": campaign_id, "phone_number": phone_number},
+                ProjectionExpression="rehydrated_at",
+            )
+            rehydrated_at = response.get("Item", {}).get("rehydrated_at")
+            restored_since = (
+                datetime.now(tz=timezone.utc)
+                - timedelta(days=CHAT_REHYDRATED_RETENTION_DAYS)
+            ).isoformat()
+            if rehydrated_at and rehydrated_at >= max(archived_at, restored_since):
+                return None
+
+            items = await asyncio.to_thread(
+                chat_archive.read_archived_conversation, campaign_id, phone_number
+            )
+            return to_history_messages(items or [])
+        except Exception as e:
+            logger.error(
+                f"Error reading archived conversation for {mask_phone_number(phone_number)} in campaign {campaign_id}: {e}",
+                exc_info=True,
+            )
+            raise Exception(
+                f"Failed to read archived conversation: {mask_phone_number(phone_number)}"
+            )
+
+    @staticmethod
+    @on_connection
+    async def mark_conversation_rehydrated(
+        phone_number: str, campaign_id: str, rehydrated_at: str
+    ):
+        """Record on the campaign customer when the conversation was restored."""
+        try:
+            campaign_customer_table = await connection.table(CAMPAIGN_CUSTOMER_TABLE_NAME)
+            await campaign_customer_table.update_item(
+                Key={"campaign_id": campaign_id, "phone_number": phone_number},
+                UpdateExpression="SET rehydrated_at = :rehydrated_at",
+                ConditionExpression="attribute_exists(campaign_id)",
+                ExpressionAttributeValues={":rehydrated_at": rehydrated_at},
+            )
+        except ClientError as e:
+            if e.response["Error"]["Code"] == "ConditionalCheckFailedException":
+                logger.warning(
+                    f"No campaign record for {mask_phone_number(phone_number)} in campaign {campaign_id}, rehydration not recorded"
+                )
+                return
+            raise
+
+    @staticmethod
+    @on_connection
+    async def rehydrate_conversation(
+        phone_number: str, campaign_id: str
+    ) -> list[HistoryMessage]:
+        """
+        Restore an archived conversation to the chat table.
+
+        Restored messages expire again after CHAT_REHYDRATED_RETENTION_DAYS; they stay
+        in the archive, so the conversation can be rehydrated again later.
+
+        Args:
+            phone_number: The customer's phone number in E.164 format
+            campaign_id: The archived campaign
+
+        Returns:
+            The archived messages in timestamp order, empty if none were archived
+        """
+        try:
+            items = await asyncio.to_thread(
+                chat_archive.read_archived_conversation, campaign_id, phone_number
+            )
+            if not items:
+                return []
+
+            # The marker is taken before the write, so it never outlives the messages
+            rehydrated_at = datetime.now(tz=timezone.utc)
+            expires_at = Decimal(
+                int(rehydrated_at.timestamp())
+                + CHAT_REHYDRATED_RETENTION_DAYS * 86400
+            )
+            # JSON round trip turned numbers into int/float, which boto3 rejects
+            await batch_put_items(
+                CHAT_TABLE_NAME,
+                [
+                    {
+                        **{
+                            k: Decimal(str(v)) if isinstance(v, float) else v
+                            for k, v in item.items()
+                        },
+                        EXPIRES_AT_ATTRIBUTE: expires_at,
+                    }
+                    for item in items
+                ],
+            )
+            await AsyncRetentionDDB.mark_conversation_rehydrated(
+                phone_number, campaign_id, rehydrated_at.isoformat()
+            )
+            # Restored messages predate the cached ones, so a delta read would miss them
+            AsyncChatHistoryDDB.invalidate_conversation(phone_number, campaign_id)
+            logger.info(
+                f"Rehydrated {len(items)} messages for {mask_phone_number(phone_number)} in campaign {campaign_id}"
+            )
+            return to_history_messages(items)
+        except Exception as e:
+            logger.error(
+                f"Error rehydrating conversation for {mask_phone_number(phone_number)} in campaign {campaign_id}: {e}",
+                exc_info=True,
+            )
+            raise Exception(
+                f"Failed to rehydrate conversation: {mask_phone_number(phone_number)}"
+            )
+
+
+class RetentionDDB:
+    """Synchronous wrapper around AsyncRetentionDDB."""
+
+    @staticmethod
+    def find_closed_campaigns(completed_before_days: int) -> list[str]:
+        return connection.run_sync(
+            AsyncRetentionDDB.find_closed_campaigns(completed_before_days)
+        )
+
+    @staticmethod
+    def close_campaign(
+        campaign_id: str, grace_days: int | None = None, dry_run: bool = False
+    ) -> int:
+        return connection.run_sync(
+            AsyncRetentionDDB.close_campaign(campaign_id, grace_days, dry_run)
+        )
+
+    @staticmethod
+    def get_archived_conversation(
+        phone_number: str, campaign_id: str, archived_at: str
+    ) -> list[HistoryMessage] | None:
+        return connection.run_sync(
+            AsyncRetentionDDB.get_archived_conversation(
+                phone_number, campaign_id, archived_at
+            )
+        )
+
+    @staticmethod
+    def rehydrate_conversation(
+        phone_number: str, campaign_id: str
+    ) -> list[HistoryMessage]:
+        return connection.run_sync(
+            AsyncRetentionDDB.rehydrate_conversation(phone_number, campaign_id)
+        )
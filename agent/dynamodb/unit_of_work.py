@@ -0,0 +1,184 @@
+"""Unit of work that commits the writes of one agent turn in a single round trip."""
+
+import asyncio
+from dataclasses import dataclass, field
+from typing import Any, Callable
+
+from boto3.dynamodb.types import TypeSerializer
+from botocore.exceptions import ClientError
+from dynamodb import CHAT_TABLE_NAME, CUSTOMER_TABLE_NAME
+from dynamodb.chat_history import get_message_attributes_update, update_cached_message
+from dynamodb.connection import connection, on_connection
+from dynamodb.customer import (
+    get_customer_status_update,
+    skip_customer_status_update,
+    update_cached_customer_status,
+)
+from dynamodb.models import CustomerStatus, UpdateChatMessageAttributes
+from logging_config import setup_logging
+
+logger = setup_logging(__name__)
+
+# TransactWriteItems accepts at most 100 actions per call
+TRANSACTION_MAX_ITEMS = 100
+
+serializer = TypeSerializer()
+
+
+@dataclass
+class PendingUpdate:
+    """An UpdateItem collected by a unit of work, with its cache bookkeeping."""
+
+    table_name: str
+    update: dict[str, Any]
+    on_applied: Callable[[], None]
+    on_condition_failed: Callable[[], None] = lambda: None
+    # None until committed, then whether the update was written
+    applied: bool | None = field(default=None, init=False)
+
+    def set_applied(self, applied: bool):
+        self.applied = applied
+        if applied:
+            self.on_applied()
+        else:
+            self.on_condition_failed()
+
+    def as_transact_item(self) -> dict[str, Any]:
+        """The update as a TransactWriteItems action, in the low-level attribute format."""
+        update = {
+            "TableName": self.table_name,
+            **self.update,
+            "Key": {k: serializer.serialize(v) for k, v in self.update["Key"].items()},
+        }
+        if "ExpressionAttributeValues" in self.update:
+            update["ExpressionAttributeValues"] = {
+                k: serializer.serialize(v)
+                for k, v in self.update["ExpressionAttributeValues"].items()
+            }
+        return {"Update": update}
+
+
+class UnitOfWork:
+    """
+    Collects the writes made while handling a turn and commits them together.
+
+    Transactional commits write everything with one TransactWriteItems call. If only a
+    conditional update fails (e.g. the handoff after a human took over), the other
+    updates are still written and the failed one is reported through its `applied` flag.
+    """
+
+    def __init__(self):
+        self.updates: list[PendingUpdate] = []
+
+    def update_customer_status(
+        self,
+        phone_number: str,
+        status: CustomerStatus,
+        expected_status: CustomerStatus | None = None,
+    ) -> PendingUpdate:
+        """Add a status update. See AsyncCustomerDDB.update_customer_status."""
+        update = get_customer_status_update(phone_number, status, expected_status)
+        pending_update = PendingUpdate(
+            CUSTOMER_TABLE_NAME,
+            update,
+            on_applied=lambda: update_cached_customer_status(phone_number, update),
+            on_condition_failed=lambda: skip_customer_status_update(phone_number, status),
+        )
+        self.updates.append(pending_update)
+        return pending_update
+
+    def update_message_attributes(
+        self, message_id: str, attributes: UpdateChatMessageAttributes
+    ) -> PendingUpdate:
+        """Add a message attributes update. See AsyncChatHistoryDDB.update_message_attributes."""
+        pending_update = PendingUpdate(
+            CHAT_TABLE_NAME,
+            get_message_attributes_update(message_id, attributes),
+            on_applied=lambda: update_cached_message(message_id, attributes),
+        )
+        self.updates.append(pending_update)
+        return pending_update
+
+    @on_connection
+    async def commit(self, atomic: bool = True) -> bool:
+        """
+        Write the collected updates.
+
+        Args:
+            atomic: Write the updates in one transaction, or else as parallel UpdateItem
+                calls when the updates are independent
+
+        Returns:
+            True if every update was written, False if a condition failed for any
+
+        Raises:
+            Exception: If the updates could not be written
+        """
+        updates, self.updates = self.updates, []
+        if not updates:
+            return True
+
+        try:
+            if atomic and len(updates) > 1:
+                await self.commit_transaction(updates)
+            else:
+                await asyncio.gather(*(self.commit_update(u) for u in updates))
+        except ClientError as e:
+            logger.error(f"Error committing {len(updates)} updates: {e}", exc_info=True)
+            raise Exception(f"Failed to commit {len(updates)} updates")
+
+        return all(u.applied for u in updates)
+
+    @staticmethod
+    async def commit_update(pending_update: PendingUpdate):
+        """Write a single update with UpdateItem."""
+        table = await connection.table(pending_update.table_name)
+        try:
+            await table.update_item(**pending_update.update)
+        except ClientError as e:
+            if e.response["Error"]["Code"] != "ConditionalCheckFailedException":
+                raise
+            pending_update.set_applied(False)
+            return
+        pending_update.set_applied(True)
+
+    @staticmethod
+    async def commit_transaction(updates: list[PendingUpdate]):
+        """Write updates with TransactWriteItems, dropping those whose condition failed."""
+        if len(updates) > TRANSACTION_MAX_ITEMS:
+            raise ValueError(
+                f"A transaction holds at most {TRANSACTION_MAX_ITEMS} updates, got {len(updates)}"
+            )
+
+        for table_name in {u.table_name for u in updates}:
+            await connection.table(table_name)
+        client = (await connection.resource()).meta.client
+
+        while updates:
+            try:
+                await client.transact_write_items(
+                    TransactItems=[u.as_transact_item() for u in updates]
+                )
+            except ClientError as e:
+                if e.response["Error"]["Code"] != "TransactionCanceledException":
+                    raise
+                reasons = e.response.get("CancellationReasons", [])
+                failed = [
+                    update
+                    for update, reason in zip(updates, reasons)
+                    if reason.get("Code") == "ConditionalCheckFailed"
+                ]
+                # Anything but a failed condition (e.g. a conflict) fails the commit
+                if not failed or any(
+                    reason.get("Code") not in ("None", "ConditionalCheckFailed")
+                    for reason in reasons
+                ):
+                    raise
+                for update in failed:
+                    update.set_applied(False)
+                updates = [u for u in updates if u.applied is None]
+                continue
+
+            for update in updates:
+                update.set_applied(True)
+            return
@@ -0,0 +1,105 @@
+"""Long-lived asyncio runner shared by warm Lambda invocations."""
+
+import asyncio
+import atexit
+import signal
+import sys
+import threading
+from typing import Any, Callable, Coroutine, TypeVar
+
+from logging_config import setup_logging
+
+logger = setup_logging(__name__)
+
+T = TypeVar("T")
+
+_runner: asyncio.Runner | None = None
+_lock = threading.Lock()
+_previous_sigterm_handler: Any = None
+_shutdown_callbacks: list[Callable[[], Coroutine[Any, Any, Any]]] = []
+_background_tasks: set[asyncio.Task] = set()
+
+
+def get_runner() -> asyncio.Runner:
+    """
+    Get the runner for this container, creating it on first use.
+
+    The runner keeps one event loop alive across invocations, so the default executor
+    threads, async connection pools and cached client state survive between warm
+    invocations instead of being rebuilt every time.
+    """
+    global _runner
+    with _lock:
+        if _runner is None:
+            _runner = asyncio.Runner()
+            _install_shutdown_handlers()
+            logger.info("Created persistent event loop")
+        return _runner
+
+
+def run(coro: Coroutine[Any, Any, T]) -> T:
+    """Run a coroutine to completion on the persistent event loop."""
+    return get_runner().run(coro)
+
+
+def run_in_background(coro: Coroutine[Any, Any, Any]) -> asyncio.Task:
+    """
+    Start a coroutine on the running loop without waiting for it.
+
+    The loop only runs while an invocation does, so handlers drain background tasks
+    once their response is out; shutdown drains whatever is left.
+    """
+    task = asyncio.get_running_loop().create_task(coro)
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+    return task
+
+
+async def drain_background_tasks():
+    """Wait for the background tasks of the running loop, including ones they start."""
+    loop = asyncio.get_running_loop()
+    while tasks := [t for t in _background_tasks if t.get_loop() is loop]:
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+def on_shutdown(callback: Callable[[], Coroutine[Any, Any, Any]]):
+    """Run a coroutine function on the loop before it is closed, e.g. to flush buffers."""
+    _shutdown_callbacks.append(callback)
+
+
+def shutdown():
+    """
+    Run the shutdown callbacks, cancel outstanding tasks, shut down the default executor
+    and close the loop.
+    """
+    global _runner
+    with _lock:
+        runner, _runner = _runner, None
+
+    if runner is not None:
+        for callback in [drain_background_tasks, *_shutdown_callbacks]:
+            try:
+                runner.run(callback())
+            except Exception as e:
+                logger.error(f"Error in shutdown callback: {e}", exc_info=True)
+        runner.close()
+        logger.info("Closed persistent event loop")
+
+
+def _handle_sigterm(signum, frame):
+    """Close the loop when the Lambda runtime stops the container."""
+    shutdown()
+    if callable(_previous_sigterm_handler):
+        _previous_sigterm_handler(signum, frame)
+    else:
+        sys.exit(0)
+
+
+def _install_shutdown_handlers():
+    global _previous_sigterm_handler
+    atexit.register(shutdown)
+    try:
+        _previous_sigterm_handler = signal.signal(signal.SIGTERM, _handle_sigterm)
+    except ValueError:
+        # Signal handlers can only be installed from the main thread
+        logger.warning("Not on the main thread, SIGTERM shutdown handler not installed")
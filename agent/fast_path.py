@@ -0,0 +1,180 @@
+"""Rule-based fast path that handles trivial inbound messages without the LLM."""
+
+import dataclasses
+import functools
+import json
+import os
+import unicodedata
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import Literal
+
+from dynamodb.models import HistoryMessage
+from logging_config import setup_logging
+from utils import normalize_text
+
+logger = setup_logging(__name__)
+
+DEFAULT_HELP_RESPONSE = (
+    "Thanks for reaching out! Reply with any question and a member of our team will "
+    "help. Reply STOP to opt out."
+)
+
+
+@dataclass
+class FastPathRules:
+    """
+    Fast path rules for a campaign.
+
+    Keywords are compared with the whole message after it is lowercased and stripped of
+    punctuation and extra whitespace.
+
+    Args:
+        enabled: Whether the fast path is used at all
+        opt_out_keywords: Messages that opt the customer out
+        opt_out_response: Reply to an opt-out. None sends no reply, since AWS End User
+            Messaging already confirms opt-out keywords
+        opt_out_handoff: Hand the customer off to a human on opt-out
+        help_keywords: Messages that ask for help
+        help_response: Reply to a help request
+        skip_empty: Do not reply to empty or emoji-only messages
+        skip_duplicates: Do not reply to an exact repeat of the previous message
+        duplicate_window_seconds: Only skip a repeat that arrived this soon after the
+            previous copy, so a text resent because it went unanswered is answered
+    """
+
+    enabled: bool = True
+    opt_out_keywords: list[str] = field(
+        default_factory=lambda: [
+            "stop",
+            "stopall",
+            "stop all",
+            "unsubscribe",
+            "cancel",
+            "end",
+            "quit",
+            "optout",
+            "opt out",
+        ]
+    )
+    opt_out_response: str | None = None
+    opt_out_handoff: bool = True
+    help_keywords: list[str] = field(default_factory=lambda: ["help", "info"])
+    help_response: str | None = DEFAULT_HELP_RESPONSE
+    skip_empty: bool = True
+    skip_duplicates: bool = True
+    duplicate_window_seconds: int = 60
+
+
+@dataclass
+class FastPathMatch:
+    """A fast path rule hit. A None response_text means no reply is sent."""
+
+    intent: Literal["opt_out", "help", "empty", "duplicate"]
+    response_text: str | None = None
+    should_handoff: bool = False
+    handoff_reason: str | None = None
+
+
+@functools.cache
+def load_fast_path_rules() -> dict[str, FastPathRules]:
+    """
+    Load the fast path rules from the FAST_PATH_RULES environment variable.
+
+    FAST_PATH_RULES is a JSON object keyed by campaign ID, plus an optional "default" key.
+    Campaign entries override individual fields of the default rules.
+    """
+    config = json.loads(os.environ.get("FAST_PATH_RULES", "{}"))
+    default_rules = FastPathRules(**config.pop("default", {}))
+    rules = {
+        campaign_id: dataclasses.replace(default_rules, **overrides)
+        for campaign_id, overrides in config.items()
+    }
+    rules["default"] = default_rules
+    return rules
+
+
+def get_fast_path_rules(campaign_id: str | None) -> FastPathRules:
+    """Get the fast path rules for a campaign, falling back to the default rules."""
+    rules = load_fast_path_rules()
+    return rules.get(campaign_id, rules["default"])
+
+
+def is_empty_or_emoji_only(message: str) -> bool:
+    """True if the message has no content other than emoji, marks and whitespace."""
+    # Emoji are "So", skin tone modifiers "Sk"; currency and math symbols ("$", "+")
+    # are content, so a message like "$$$" still gets a reply
+    return all(
+        unicodedata.category(ch) in ("So", "Sk") or unicodedata.category(ch)[0] in "ZCM"
+        for ch in message
+    )
+
+
+def match_fast_path(message: str, rules: FastPathRules) -> FastPathMatch | None:
+    """
+    Match an inbound message against the keyword and empty-message rules.
+
+    Args:
+        message: The message received from the customer
+        rules: The rules of the customer's campaign
+
+    Returns:
+        The matched rule, or None if the message needs the agent
+    """
+    if not rules.enabled:
+        return None
+
+    if rules.skip_empty and is_empty_or_emoji_only(message):
+        return FastPathMatch(intent="empty")
+
+    normalized_message = normalize_text(message)
+
+    if normalized_message in rules.opt_out_keywords:
+        return FastPathMatch(
+            intent="opt_out",
+            response_text=rules.opt_out_response,
+            should_handoff=rules.opt_out_handoff,
+            handoff_reason="Customer opted out" if rules.opt_out_handoff else None,
+        )
+
+    if normalized_message in rules.help_keywords:
+        return FastPathMatch(intent="help", response_text=rules.help_response)
+
+    return None
+
+
+def match_duplicate(
+    message: str, conversation_history: list[HistoryMessage], rules: FastPathRules
+) -> FastPathMatch | None:
+    """
+    Match an exact repeat of the previous message, e.g. a text delivered twice.
+
+    Only a repeat within duplicate_window_seconds of the previous copy matches, while
+    that copy is still being answered; a later resend gets a reply of its own.
+
+    Args:
+        message: The message received from the customer
+        conversation_history: The conversation history, excluding the current message
+        rules: The rules of the customer's campaign
+
+    Returns:
+        The duplicate match, or None if the message is not a repeat
+    """
+    if not (rules.enabled and rules.skip_duplicates and conversation_history):
+        return None
+
+    previous_message = conversation_history[-1]
+    if previous_message.direction != "inbound" or previous_message.message != message:
+        return None
+
+    received_at = datetime.fromisoformat(
+        previous_message.timestamp.replace("Z", "+00:00")
+    )
+    if received_at.tzinfo is None:
+        received_at = received_at.replace(tzinfo=timezone.utc)
+    if datetime.now(tz=timezone.utc) - received_at <= timedelta(
+        seconds=rules.duplicate_window_seconds
+    ):
+        return FastPathMatch(intent="duplicate")
+
+    return None
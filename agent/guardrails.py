@@ -1,18 +1,34 @@
 """Content guardrails and safety checks for agent responses."""
 
+import hashlib
 import os
-from typing import Optional
-
-import boto3
+from typing import Any, Optional
 
+from aws_clients import get_client
+from cache import TTLCache
 from logging_config import setup_logging
-from utils import get_boto3_session_config
+from utils import is_lazy_init_enabled, normalize_text
 
 logger = setup_logging(__name__)
 
+# Verdicts for normalized message content. Only non-intervened verdicts are cached
+# unless GUARDRAIL_CACHE_INTERVENED is enabled.
+guardrail_cache: TTLCache[str, tuple[bool, Optional[str]]] = TTLCache(
+    maxsize=int(os.environ.get("GUARDRAIL_CACHE_MAX_SIZE", "4096")),
+    ttl=float(os.environ.get("GUARDRAIL_CACHE_TTL_SECONDS", "3600")),
+)
+GUARDRAIL_CACHE_INTERVENED = (
+    os.environ.get("GUARDRAIL_CACHE_INTERVENED", "false").lower() == "true"
+)
+
+
+def get_bedrock_client() -> Any:
+    """Get the shared Bedrock runtime client, creating it on first use."""
+    return get_client("bedrock-runtime")
 
-session = boto3.Session(**get_boto3_session_config())
-bedrock = session.client("bedrock-runtime")
+
+if not is_lazy_init_enabled():
+    get_bedrock_client()
 
 
 def apply_guardrails(text: str, source: str = "INPUT") -> tuple[bool, Optional[str]]:
@@ -37,7 +53,12 @@ def apply_guardrails(text: str, source: str = "INPUT") -> tuple[bool, Optional[s
     if source != "INPUT" and source != "OUTPUT":
         raise ValueError("Source must be either 'INPUT' or 'OUTPUT'.")
 
-    response = bedrock.apply_guardrail(
+    cache_key = get_guardrail_cache_key(text, guardrail_id, guardrail_version, source)
+    cached_verdict = guardrail_cache.get(cache_key)
+    if cached_verdict:
+        return cached_verdict
+
+    response = get_bedrock_client().apply_guardrail(
         guardrailIdentifier=guardrail_id,
         guardrailVersion=guardrail_version,
         source=source,
@@ -45,9 +66,22 @@ def apply_guardrails(text: str, source: str = "INPUT") -> tuple[bool, Optional[s
     )
 
     if "GUARDRAIL_INTERVENED" == response.get("action"):
-        return False, get_guardrails_response(response)
-
-    return True, None
+        verdict = (False, get_guardrails_response(response))
+        if GUARDRAIL_CACHE_INTERVENED:
+            guardrail_cache.set(cache_key, verdict)
+        return verdict
+
+    verdict = (True, None)
+    guardrail_cache.set(cache_key, verdict)
+    return verdict
+
+
+def get_guardrail_cache_key(
+    text: str, guardrail_id: str, guardrail_version: str, source: str
+) -> str:
+    """Build the verdict cache key from the guardrail and the normalized content hash."""
+    content_hash = hashlib.sha256(normalize_text(text).encode()).hexdigest()
+    return f"{guardrail_id}:{guardrail_version}:{source}:{content_hash}"
 
 
 def get_guardrails_response(response: dict) -> str:
@@ -2,32 +2,45 @@
 
 import asyncio
 import json
-from typing import Any, Dict
+import os
+from collections import defaultdict
+from typing import Any, Dict, List
 
+import event_loop
 from constants import TECHNICAL_DIFFICULTY_RESPONSE
 from logging_config import setup_logging
 from main import process_message
-from sqs_utils import send_to_outbound_sms_queue
+from phone_utils import parse_phone_number
+from sqs_utils import send_to_outbound_sms_queue, send_to_outbound_sms_queue_batched
+from storage import get_storage
 
 from agent.models import AgentResponseWrapper
 
 logger = setup_logging(__name__)
 
+# Maximum number of phone numbers processed at the same time within one SQS batch
+BATCH_MAX_CONCURRENCY = int(os.environ.get("AGENT_BATCH_MAX_CONCURRENCY", "5"))
+
 
 def lambda_handler(event: Dict[str, Any], _: Any) -> Dict[str, Any]:
     """
     AWS Lambda handler for the sales AI Agent
 
-    Handles direct invocations
+    Handles direct invocations and SQS batches
 
     Args:
-        event: The event dictionary containing phone_number, message, and message_id
+        event: The event dictionary containing phone_number, message, and message_id,
+            or an SQS event whose record bodies contain those fields
         _: The context object (not used)
     
     Returns:
-        The response dictionary with status code and body
+        The response dictionary with status code and body, or the SQS partial batch
+        response for SQS events
     """
 
+    if "Records" in event:
+        return process_sqs_batch_sync(event["Records"])
+
     try:
         logger.info(f"Lambda invocation - Event: {json.dumps(event, default=str)}")
 
@@ -39,6 +52,7 @@ def lambda_handler(event: Dict[str, Any], _: Any) -> Dict[str, Any]:
             phone_number=event["phone_number"],
             message=event["message"],
             message_id=event["message_id"],
+            customer_updated_at=event.get("customer_updated_at"),
         )
 
     except Exception as e:
@@ -49,7 +63,12 @@ def lambda_handler(event: Dict[str, Any], _: Any) -> Dict[str, Any]:
         }
 
 
-def process_message_sync(phone_number: str, message: str, message_id: str) -> Dict[str, Any]:
+def process_message_sync(
+    phone_number: str,
+    message: str,
+    message_id: str,
+    customer_updated_at: str | None = None,
+) -> Dict[str, Any]:
     """
     Synchronous wrapper for the async process_message function
 
@@ -57,6 +76,7 @@ def process_message_sync(phone_number: str, message: str, message_id: str) -> Di
         phone_number: The customer's phone number
         message: The message received from the customer
         message_id: The ID of the incoming message
+        customer_updated_at: The customer's updated_at as read by the caller, if known
     
     Returns:
         The response dictionary with status code and body
@@ -65,34 +85,30 @@ def process_message_sync(phone_number: str, message: str, message_id: str) -> Di
     try:
         logger.info(f"Processing message from {phone_number}: {message}")
 
-        # Run the async function in the event loop
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-
-        try:
-            response = loop.run_until_complete(
-                process_message(phone_number, message, message_id)
-            )
+        # Run the async function on the event loop shared by warm invocations
+        response = event_loop.run(
+            process_message(phone_number, message, message_id, customer_updated_at)
+        )
 
-            logger.info(f"AI response generated: {response}")
+        logger.info(f"AI response generated: {response}")
 
-            queue_success, queue_timestamp = send_to_outbound_sms_queue(phone_number, response)
+        queue_success, queue_timestamp = send_to_outbound_sms_queue(phone_number, response)
 
-            return {
-                "statusCode": 200,
-                "body": json.dumps(
-                    {
-                        "phone_number": phone_number,
-                        "incoming_message": message,
-                        "ai_response": response.as_dict() if response else None,
-                        "sms_queued": queue_success,
-                        "timestamp": queue_timestamp,
-                    }
-                ),
-            }
+        # Follow-up work of the turn (e.g. the summary refresh) runs after the reply
+        event_loop.run(event_loop.drain_background_tasks())
 
-        finally:
-            loop.close()
+        return {
+            "statusCode": 200,
+            "body": json.dumps(
+                {
+                    "phone_number": phone_number,
+                    "incoming_message": message,
+                    "ai_response": response.as_dict() if response else None,
+                    "sms_queued": queue_success,
+                    "timestamp": queue_timestamp,
+                }
+            ),
+        }
 
     except Exception as e:
         logger.error(f"Message processing error: {str(e)}", exc_info=True)
@@ -118,3 +134,160 @@ def process_message_sync(phone_number: str, message: str, message_id: str) -> Di
                 }
             ),
         }
+
+
+def process_sqs_batch_sync(records: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Synchronous wrapper for process_sqs_batch
+
+    Args:
+        records: The SQS records of the batch
+
+    Returns:
+        The SQS partial batch response
+    """
+    return event_loop.run(process_sqs_batch(records))
+
+
+async def process_sqs_batch(
+    records: List[Dict[str, Any]], max_concurrency: int = BATCH_MAX_CONCURRENCY
+) -> Dict[str, Any]:
+    """
+    Process an SQS batch of inbound messages concurrently.
+
+    Records are grouped by normalized phone number, so formatting variants of one
+    customer's number share a group. Groups run concurrently up to max_concurrency,
+    while the records of one phone number run in order. Once a record fails, the
+    remaining records for that phone number are not processed and are reported as
+    failed too, so SQS retries them in their original order.
+
+    Args:
+        records: The SQS records of the batch
+        max_concurrency: Maximum number of phone numbers processed at the same time
+
+    Returns:
+        The SQS partial batch response listing the failed message IDs
+    """
+    logger.info(f"Lambda invocation - SQS batch of {len(records)} records")
+
+    failures: List[str] = []
+    records_by_phone: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+
+    for record in records:
+        try:
+            body = json.loads(record["body"])
+            for key in ["phone_number", "message", "message_id"]:
+                if key not in body:
+                    raise ValueError(f"Missing required field: {key}")
+            # Invalid numbers keep their own group and fail in process_message
+            parsed_phone = parse_phone_number(body["phone_number"])
+            phone_key = (
+                parsed_phone.e164 if parsed_phone.is_valid else body["phone_number"]
+            )
+            records_by_phone[phone_key].append(
+                {"record_id": record["messageId"], **body}
+            )
+        except Exception as e:
+            logger.error(
+                f"Invalid SQS record {record.get('messageId')}: {str(e)}", exc_info=True
+            )
+            failures.append(record.get("messageId"))
+
+    if len(records_by_phone) > 1:
+        await prefetch_batch_lookups(list(records_by_phone))
+
+    semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def process_phone_records(phone_records: List[Dict[str, Any]]):
+        async with semaphore:
+            for index, phone_record in enumerate(phone_records):
+                try:
+                    await process_sqs_record(
+                        phone_number=phone_record["phone_number"],
+                        message=phone_record["message"],
+                        message_id=phone_record["message_id"],
+                        customer_updated_at=phone_record.get("customer_updated_at"),
+                    )
+                except Exception as e:
+                    logger.error(
+                        f"SQS record {phone_record['record_id']} failed: {str(e)}",
+                        exc_info=True,
+                    )
+                    failures.extend(r["record_id"] for r in phone_records[index:])
+                    return
+
+    await asyncio.gather(
+        *(process_phone_records(group) for group in records_by_phone.values())
+    )
+
+    # Every reply is queued, finish the follow-up work of the turns
+    await event_loop.drain_background_tasks()
+
+    if failures:
+        logger.warning(f"{len(failures)} of {len(records)} SQS records failed")
+
+    return {
+        "batchItemFailures": [{"itemIdentifier": record_id} for record_id in failures]
+    }
+
+
+async def prefetch_batch_lookups(phone_numbers: List[str]):
+    """
+    Warm the customer and campaign caches for a batch with one batched lookup per table
+    (BatchGetItem on DynamoDB), instead of a single-key read per record.
+
+    Args:
+        phone_numbers: The phone numbers of the batch, as received
+    """
+    try:
+        normalized_phones = [
+            parsed.e164
+            for parsed in map(parse_phone_number, phone_numbers)
+            if parsed.is_valid
+        ]
+        customers = await get_storage().get_customers(normalized_phones)
+        await get_storage().get_campaigns(
+            [
+                customer.most_recent_campaign_id
+                for customer in customers.values()
+                if customer.most_recent_campaign_id
+            ]
+        )
+    except Exception as e:
+        # Each record still looks up what it needs on its own
+        logger.warning(f"Error prefetching batch lookups: {str(e)}", exc_info=True)
+
+
+async def process_sqs_record(
+    phone_number: str,
+    message: str,
+    message_id: str,
+    customer_updated_at: str | None = None,
+):
+    """
+    Process a single inbound message from an SQS batch and queue the reply.
+
+    Unlike process_message_sync no fallback reply is sent on failure: process_message
+    raises its errors, so SQS retries the record instead.
+
+    Args:
+        phone_number: The customer's phone number
+        message: The message received from the customer
+        message_id: The ID of the incoming message
+        customer_updated_at: The customer's updated_at as read by the caller, if known
+
+    Raises:
+        Exception: If the message could not be processed or the reply not be queued
+    """
+    response = await process_message(
+        phone_number, message, message_id, customer_updated_at, raise_errors=True
+    )
+    logger.info(f"AI response generated: {response}")
+
+    if response is None:
+        return
+
+    # Replies of concurrently processed records share SendMessageBatch calls
+    queue_success, _ = await send_to_outbound_sms_queue_batched(phone_number, response)
+    if not queue_success:
+        raise Exception(f"Failed to queue response for message {message_id}")
@@ -1,29 +1,342 @@
 """Main module for processing customer messages and generating agent responses."""
 
+import asyncio
+import os
 from typing import Optional, Union
 
 import constants
-from dynamodb.chat_history import ChatHistoryDDB
-from dynamodb.customer import CustomerDDB
-from dynamodb.models import CustomerStatus, UpdateChatMessageAttributes
+import event_loop
+from dynamodb.models import (
+    Campaign,
+    ConversationSummary,
+    CustomerStatus,
+    HistoryMessage,
+    UpdateChatMessageAttributes,
+)
+from fast_path import (
+    FastPathMatch,
+    get_fast_path_rules,
+    match_duplicate,
+    match_fast_path,
+)
 from guardrails import apply_guardrails
 from logging_config import setup_logging
-from phone_utils import mask_phone_number, normalize_phone_number, validate_phone_number
+from phone_utils import mask_phone_number, parse_phone_number
+from pydantic_logging import configure_logfire
 from pydantic_ai.usage import RunUsage, UsageLimits
 from pydantic_core import ValidationError
 from retrier import exponential_backoff_retry
+from storage import get_storage
 
-from agent.agent import sales_agent
+from agent.agent import get_bedrock_model, sales_agent, summary_agent
 from agent.models import AgentContext, AgentResponseWrapper
-from agent.utils import convert_history_to_messages
+from agent.utils import (
+    convert_history_to_messages,
+    format_history_for_summary,
+    select_history_window,
+    split_pending_inbound,
+)
 
 logger = setup_logging(__name__)
 
 usage_limits = UsageLimits(request_limit=50)
 
+# "concurrent" fans out the guardrail check, history query and campaign fetch once the
+# customer is known; "sequential" runs them one after another as separate round trips.
+PRE_AGENT_PIPELINE_MODE = os.environ.get("PRE_AGENT_PIPELINE_MODE", "concurrent")
+
+# Seconds to wait for follow-up texts from the same customer before answering, so that
+# rapid-fire messages are merged into a single agent turn. 0 disables coalescing.
+COALESCE_WINDOW_SECONDS = float(os.environ.get("COALESCE_WINDOW_SECONDS", "0"))
+
+# "full" sends the whole campaign conversation to the agent; "windowed" sends only the
+# newest turns that fit the token budget, plus a rolling summary of everything older.
+HISTORY_MODE = os.environ.get("HISTORY_MODE", "full")
+HISTORY_WINDOW_MAX_MESSAGES = int(os.environ.get("HISTORY_WINDOW_MAX_MESSAGES", "20"))
+HISTORY_TOKEN_BUDGET = int(os.environ.get("HISTORY_TOKEN_BUDGET", "2000"))
+# Messages that must pile up outside the window before the summary is refreshed
+HISTORY_SUMMARY_MIN_MESSAGES = int(os.environ.get("HISTORY_SUMMARY_MIN_MESSAGES", "6"))
+
+# Restore the archived conversation when a customer replies to an archived campaign
+CHAT_REHYDRATE_ON_REPLY = (
+    os.environ.get("CHAT_REHYDRATE_ON_REPLY", "true").lower() == "true"
+)
+
+
+async def load_conversation_history(
+    normalized_phone: str, campaign_id: str, skip_last: bool = False
+) -> list[HistoryMessage]:
+    """Load the conversation history, limited to the newest messages in windowed mode."""
+    if HISTORY_MODE == "windowed":
+        return await get_storage().get_recent_conversation_history(
+            normalized_phone, campaign_id, HISTORY_WINDOW_MAX_MESSAGES, skip_last
+        )
+    return await get_storage().get_conversation_history(
+        normalized_phone, campaign_id, skip_last=skip_last
+    )
+
+
+async def load_conversation_summary(
+    normalized_phone: str, campaign_id: str
+) -> Optional[ConversationSummary]:
+    """Load the rolling conversation summary, which only exists in windowed mode."""
+    if HISTORY_MODE != "windowed":
+        return None
+    return await get_storage().get_conversation_summary(
+        campaign_id, normalized_phone
+    )
+
+
+async def refresh_conversation_summary(
+    normalized_phone: str,
+    campaign_id: str,
+    window_start: str,
+    conversation_summary: Optional[ConversationSummary],
+    min_messages: int = HISTORY_SUMMARY_MIN_MESSAGES,
+):
+    """
+    Fold the messages that dropped out of the history window into the rolling summary.
+
+    Only the messages between the end of the current summary and the start of the
+    window are read, and the summary is only rewritten once enough of them have piled
+    up, so the cost per turn stays bounded however long the conversation gets.
+
+    Args:
+        normalized_phone: The customer's phone number in E.164 format
+        campaign_id: The customer's most recent campaign ID
+        window_start: Timestamp of the oldest message to keep out of the summary
+        conversation_summary: The summary the agent was given, if any
+        min_messages: Messages that must be found before the summary is rewritten
+    """
+    try:
+        summarized_through = (
+            conversation_summary.summarized_through if conversation_summary else None
+        )
+        dropped_messages = await get_storage().get_messages_between(
+            normalized_phone, campaign_id, summarized_through, window_start
+        )
+        if not dropped_messages or len(dropped_messages) < min_messages:
+            return
+
+        previous_summary = (
+            conversation_summary.conversation_summary if conversation_summary else ""
+        )
+        prompt = (
+            f"<previous_summary>{previous_summary}</previous_summary>\n"
+            f"<messages>\n{format_history_for_summary(dropped_messages)}\n</messages>"
+        )
+
+        async def run_summary_agent():
+            return await summary_agent.run(prompt, model=get_bedrock_model())
+
+        result = await exponential_backoff_retry(run_summary_agent)
+        await get_storage().update_conversation_summary(
+            campaign_id,
+            normalized_phone,
+            ConversationSummary(
+                conversation_summary=result.output.strip(),
+                summarized_through=dropped_messages[-1].timestamp,
+            ),
+        )
+        logger.info(
+            f"Summarized {len(dropped_messages)} older messages for {mask_phone_number(normalized_phone)} in campaign {campaign_id}"
+        )
+    except Exception as e:
+        # The summary only catches up on the next turn, the response is unaffected
+        logger.error(f"Error refreshing conversation summary: {e}", exc_info=True)
+
+
+async def restore_archived_history(normalized_phone: str, campaign_id: str):
+    """Write an archived conversation back to chat history, logging any failure."""
+    try:
+        await get_storage().rehydrate_conversation(normalized_phone, campaign_id)
+    except Exception as e:
+        # The next reply reads the archive again
+        logger.error(f"Error rehydrating conversation history: {e}", exc_info=True)
+
+
+async def rehydrate_archived_history(
+    normalized_phone: str,
+    campaign: Campaign,
+    conversation_history: list[HistoryMessage],
+) -> list[HistoryMessage]:
+    """
+    Add the archived messages of a campaign conversation that expired from chat history.
+
+    The archive is only read while the conversation has not been rehydrated since the
+    campaign was archived. The archived messages are answered with right away and
+    written back to chat history in the background, off the reply path.
+
+    Args:
+        normalized_phone: The customer's phone number in E.164 format
+        campaign: The customer's most recent campaign
+        conversation_history: The loaded conversation history
+
+    Returns:
+        The conversation history, with the archived messages if any were found
+    """
+    if not campaign.archived_at:
+        return conversation_history
+
+    try:
+        archived_messages = await get_storage().get_archived_conversation(
+            normalized_phone, campaign.campaign_id, campaign.archived_at
+        )
+    except Exception as e:
+        # Answer with the history at hand rather than not at all
+        logger.error(f"Error reading archived conversation: {e}", exc_info=True)
+        return conversation_history
+    if not archived_messages:
+        return conversation_history
+
+    # Off the reply path, the handlers drain it once the reply is queued
+    event_loop.run_in_background(
+        restore_archived_history(normalized_phone, campaign.campaign_id)
+    )
+
+    loaded_ids = {message.id for message in conversation_history}
+    return sorted(
+        [m for m in archived_messages if m.id not in loaded_ids]
+        + conversation_history,
+        key=lambda m: m.timestamp,
+    )
+
+
+async def coalesce_inbound_messages(
+    normalized_phone: str, campaign_id: str, incoming_message_id: str
+) -> Optional[tuple[list[HistoryMessage], list[HistoryMessage]]]:
+    """
+    Wait for the coalescing window, then collect the customer's unanswered messages.
+
+    Args:
+        normalized_phone: The customer's phone number in E.164 format
+        campaign_id: The customer's most recent campaign ID
+        incoming_message_id: The ID of the incoming message
+
+    Returns:
+        None if a newer inbound message arrived within the window, in which case the
+        invocation handling that message answers for both. Otherwise a tuple of the
+        unanswered inbound messages to merge (ending with the incoming message) and the
+        conversation history that precedes them.
+    """
+    await asyncio.sleep(COALESCE_WINDOW_SECONDS)
+
+    conversation_history = await load_conversation_history(
+        normalized_phone, campaign_id
+    )
+    earlier_history, pending_messages = split_pending_inbound(conversation_history)
+
+    pending_ids = [message.id for message in pending_messages]
+    if incoming_message_id not in pending_ids:
+        # Incoming message is not among the unanswered ones, answer it on its own
+        return [], [m for m in conversation_history if m.id != incoming_message_id]
+
+    if pending_ids[-1] != incoming_message_id:
+        return None
+
+    return pending_messages, earlier_history
+
+
+async def run_pre_agent_stages(
+    normalized_phone: str,
+    campaign_id: str,
+    incoming_message: str,
+    conversation_history: Optional[list[HistoryMessage]] = None,
+) -> tuple[
+    tuple[bool, Optional[str]],
+    list[HistoryMessage],
+    Optional[Campaign],
+    Optional[ConversationSummary],
+]:
+    """
+    Run the guardrail check, conversation history query and campaign fetch.
+
+    In concurrent mode the three independent calls run together, so the time before the
+    agent starts is bounded by the slowest one. In sequential mode the history query is
+    skipped when the guardrails intervene and the campaign is left for the agent's
+    instructions hook to load.
+
+    Args:
+        normalized_phone: The customer's phone number in E.164 format
+        campaign_id: The customer's most recent campaign ID
+        incoming_message: The message received from the customer
+        conversation_history: Already loaded conversation history, if any. The history
+            query is skipped when this is given.
+
+    Returns:
+        Tuple of the guardrail verdict, the conversation history (excluding the current
+        message), the campaign, if it was fetched, and the rolling conversation summary
+        in windowed history mode
+    """
+
+    async def load_history() -> list[HistoryMessage]:
+        if conversation_history is not None:
+            return conversation_history
+        return await load_conversation_history(
+            normalized_phone, campaign_id, skip_last=True
+        )
+
+    if PRE_AGENT_PIPELINE_MODE == "concurrent":
+        guardrails_result, history, campaign, summary = await asyncio.gather(
+            asyncio.to_thread(apply_guardrails, incoming_message),
+            load_history(),
+            get_storage().get_campaign(campaign_id),
+            load_conversation_summary(normalized_phone, campaign_id),
+        )
+        return guardrails_result, history, campaign, summary
+
+    guardrails_result = await asyncio.to_thread(apply_guardrails, incoming_message)
+    if not guardrails_result[0]:
+        return guardrails_result, [], None, None
+
+    history, summary = await asyncio.gather(
+        load_history(), load_conversation_summary(normalized_phone, campaign_id)
+    )
+    return guardrails_result, history, None, summary
+
+
+async def respond_with_fast_path(
+    fast_path_match: FastPathMatch, normalized_phone: str, campaign_id: str
+) -> Optional[AgentResponseWrapper]:
+    """
+    Apply a fast path rule hit instead of running the agent.
+
+    Args:
+        fast_path_match: The matched fast path rule
+        normalized_phone: The customer's phone number in E.164 format
+        campaign_id: The customer's most recent campaign ID
+
+    Returns:
+        The canned response, or None if no reply should be sent
+    """
+    logger.info(
+        f"Fast path '{fast_path_match.intent}' matched for {mask_phone_number(normalized_phone)}"
+    )
+
+    if fast_path_match.should_handoff:
+        await get_storage().update_customer_status(
+            normalized_phone,
+            CustomerStatus.NEEDS_RESPONSE,
+            expected_status=CustomerStatus.AUTOMATED,
+        )
+
+    if not fast_path_match.response_text:
+        return None
+
+    return AgentResponseWrapper(
+        response_text=fast_path_match.response_text,
+        should_handoff=fast_path_match.should_handoff,
+        handoff_reason=fast_path_match.handoff_reason,
+        campaign_id=campaign_id,
+    )
+
 
 async def process_message(
-    phone_number: str, incoming_message: str, incoming_message_id: Optional[str] = None
+    phone_number: str,
+    incoming_message: str,
+    incoming_message_id: Optional[str] = None,
+    customer_updated_at: Optional[str] = None,
+    raise_errors: bool = False,
 ) -> Union[AgentResponseWrapper, None]:
     """
     Main entry point for processing a new message.
@@ -32,20 +345,29 @@ async def process_message(
         phone_number: The customer's phone number
         incoming_message: The message received from the customer
         incoming_message_id: The ID of the incoming message
+        customer_updated_at: The customer's updated_at as read by the inbound SMS
+            processor, used to detect a stale cached customer
+        raise_errors: Raise errors instead of answering with a fallback reply, so a
+            queue consumer can have the message retried
 
     Returns:
         The AI-generated response message
     """
     campaign_id = None
     try:
-        # Validate phone number format
-        if not validate_phone_number(phone_number):
-            raise ValueError(f"Invalid phone number format: {mask_phone_number(phone_number)}")
+        # No-op unless logfire setup was deferred by lazy initialization
+        configure_logfire()
 
-        # Normalize phone number for consistent processing
-        normalized_phone = normalize_phone_number(phone_number)
+        # Validate and normalize phone number format in a single parse
+        parsed_phone = parse_phone_number(phone_number)
+        if not parsed_phone.is_valid:
+            raise ValueError(f"Invalid phone number format: {parsed_phone.masked}")
 
-        customer = CustomerDDB.get_or_create_customer(phone_number=normalized_phone)
+        normalized_phone = parsed_phone.e164
+
+        customer = await get_storage().get_or_create_customer(
+            phone_number=normalized_phone, known_updated_at=customer_updated_at
+        )
 
         # Check customer status - only respond with AI if status is 'automated'
         if customer.status != CustomerStatus.AUTOMATED:
@@ -62,14 +384,54 @@ async def process_message(
             )
             return None
 
-        is_valid, guardrails_response = apply_guardrails(incoming_message)
-        if not is_valid:
-            ChatHistoryDDB.update_message_attributes(
-                incoming_message_id,
-                attributes=UpdateChatMessageAttributes(
-                    guardrails_intervened=True, user_sentiment="negative"
-                ),
+        # Handle trivial intents without guardrails, history or the LLM
+        fast_path_rules = get_fast_path_rules(campaign_id)
+        fast_path_match = match_fast_path(incoming_message, fast_path_rules)
+        if fast_path_match:
+            return await respond_with_fast_path(
+                fast_path_match, normalized_phone, campaign_id
             )
+
+        # Merge rapid-fire texts into one turn, answered by the latest message's invocation
+        conversation_history = None
+        message_ids = [incoming_message_id]
+        if COALESCE_WINDOW_SECONDS > 0 and incoming_message_id:
+            coalesced = await coalesce_inbound_messages(
+                normalized_phone, campaign_id, incoming_message_id
+            )
+            if coalesced is None:
+                logger.info(
+                    f"Newer message from {mask_phone_number(normalized_phone)} arrived, deferring response to it"
+                )
+                return None
+
+            pending_messages, conversation_history = coalesced
+            if len(pending_messages) > 1:
+                incoming_message = "\n".join(m.message for m in pending_messages)
+                message_ids = [m.id for m in pending_messages]
+                logger.info(
+                    f"Coalesced {len(pending_messages)} messages from {mask_phone_number(normalized_phone)}"
+                )
+
+        (
+            (is_valid, guardrails_response),
+            conversation_history,
+            campaign,
+            conversation_summary,
+        ) = await run_pre_agent_stages(
+            normalized_phone, campaign_id, incoming_message, conversation_history
+        )
+        if not is_valid:
+            unit_of_work = get_storage().unit_of_work()
+            for message_id in message_ids:
+                unit_of_work.update_message_attributes(
+                    message_id,
+                    attributes=UpdateChatMessageAttributes(
+                        guardrails_intervened=True, user_sentiment="negative"
+                    ),
+                )
+            # Independent flags, no need to pay for a transaction
+            await unit_of_work.commit(atomic=False)
             return AgentResponseWrapper(
                 response_text=guardrails_response,
                 should_handoff=False,
@@ -77,10 +439,47 @@ async def process_message(
                 campaign_id=campaign_id,
             )
 
-        # Get campaign-scoped conversation history (exclude current message) and convert to Pydantic AI message format
-        conversation_history = ChatHistoryDDB.get_conversation_history(
-            normalized_phone, campaign_id, skip_last=True
+        # Replies to a closed campaign bring its archived conversation back
+        if CHAT_REHYDRATE_ON_REPLY:
+            if campaign is None:
+                campaign = await get_storage().get_campaign(campaign_id)
+            if campaign:
+                conversation_history = await rehydrate_archived_history(
+                    normalized_phone, campaign, conversation_history
+                )
+
+        fast_path_match = match_duplicate(
+            incoming_message, conversation_history, fast_path_rules
         )
+        if fast_path_match:
+            return await respond_with_fast_path(
+                fast_path_match, normalized_phone, campaign_id
+            )
+
+        # Bound the history sent to the agent, older turns are covered by the summary
+        summary_refresh = None
+        if HISTORY_MODE == "windowed" and conversation_history:
+            window = select_history_window(conversation_history, HISTORY_TOKEN_BUDGET)
+            summarized_through = (
+                conversation_summary.summarized_through
+                if conversation_summary
+                else None
+            )
+            # Messages outside the token budget stay in the window until the summary
+            # covers them, so no turn is ever invisible to the agent
+            unsummarized = [
+                m
+                for m in conversation_history[: len(conversation_history) - len(window)]
+                if summarized_through is None or m.timestamp > summarized_through
+            ]
+            if len(unsummarized) >= HISTORY_SUMMARY_MIN_MESSAGES and window:
+                summary_refresh = (window[0].timestamp, HISTORY_SUMMARY_MIN_MESSAGES)
+            elif len(conversation_history) >= HISTORY_WINDOW_MAX_MESSAGES:
+                # Older messages were not even loaded; summarize any the summary lacks
+                summary_refresh = ((unsummarized + window)[0].timestamp, 1)
+            conversation_history = unsummarized + window
+
+        # Convert campaign-scoped conversation history to Pydantic AI message format
         message_history = convert_history_to_messages(conversation_history)
 
         # Create context for the agent
@@ -88,6 +487,12 @@ async def process_message(
             customer_phone_number=normalized_phone,
             customer_name=f"{customer.first_name} {customer.last_name}",
             most_recent_campaign_id=campaign_id,
+            campaign_details=campaign.campaign_details if campaign else None,
+            conversation_summary=(
+                conversation_summary.conversation_summary
+                if conversation_summary
+                else None
+            ),
         )
 
         # Generate response using the AI agent
@@ -96,6 +501,7 @@ async def process_message(
         async def run_agent():
             return await sales_agent.run(
                 incoming_message,
+                model=get_bedrock_model(),
                 deps=context,
                 message_history=message_history,
                 usage=usage,
@@ -105,21 +511,44 @@ async def process_message(
         result = await exponential_backoff_retry(run_agent)
         agent_response = result.output
 
-        # Check if human handoff is required
+        # Write the handoff and sentiment together in one round trip
+        unit_of_work = get_storage().unit_of_work()
+        handoff = None
         if agent_response.should_handoff:
-            CustomerDDB.update_customer_status(
-                normalized_phone, CustomerStatus.NEEDS_RESPONSE
+            # Hand off only if no human changed the status while the agent was running
+            handoff = unit_of_work.update_customer_status(
+                normalized_phone,
+                CustomerStatus.NEEDS_RESPONSE,
+                expected_status=CustomerStatus.AUTOMATED,
             )
+
+        if agent_response.user_sentiment:
+            # Every coalesced message of the turn gets the sentiment of the reply
+            for message_id in message_ids:
+                unit_of_work.update_message_attributes(
+                    message_id,
+                    attributes=UpdateChatMessageAttributes(
+                        user_sentiment=agent_response.user_sentiment
+                    ),
+                )
+
+        await unit_of_work.commit()
+        if handoff and handoff.applied:
             logger.info(
                 f"Human handoff triggered for {mask_phone_number(normalized_phone)}"
             )
 
-        if agent_response.user_sentiment:
-            ChatHistoryDDB.update_message_attributes(
-                incoming_message_id,
-                attributes=UpdateChatMessageAttributes(
-                    user_sentiment=agent_response.user_sentiment
-                ),
+        if summary_refresh:
+            # Off the reply path, the handlers drain it once the reply is queued
+            window_start, min_messages = summary_refresh
+            event_loop.run_in_background(
+                refresh_conversation_summary(
+                    normalized_phone,
+                    campaign_id,
+                    window_start,
+                    conversation_summary,
+                    min_messages,
+                )
             )
 
         return AgentResponseWrapper(
@@ -131,6 +560,8 @@ async def process_message(
 
     except ValidationError as e:
         logger.error(f"Validation error: {str(e)}", exc_info=True)
+        if raise_errors:
+            raise
         return AgentResponseWrapper(
             response_text=constants.TECHNICAL_DIFFICULTY_RESPONSE,
             should_handoff=False,
@@ -161,4 +592,6 @@ async def process_message(
                 campaign_id=campaign_id,
             )
 
+        if raise_errors:
+            raise
         return agent_response
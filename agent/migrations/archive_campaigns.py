@@ -0,0 +1,81 @@
+"""
+Archive the chat history of closed campaigns and expire it from the chat table, or
+restore an archived conversation by hand.
+
+Closing archives every conversation of a campaign to CHAT_ARCHIVE_URI, sets the
+expires_at TTL on its messages and marks the campaign archived. Replies to an archived
+campaign rehydrate the conversation automatically (see CHAT_REHYDRATE_ON_REPLY).
+
+Usage (from the agent directory, e.g. against DynamoDB Local with ENVIRONMENT=local):
+    dotenv -f .env.test run python migrations/archive_campaigns.py close <campaign_id>... [--grace-days N] [--dry-run]
+    dotenv -f .env.test run python migrations/archive_campaigns.py close --completed-before-days 30 [--dry-run]
+    dotenv -f .env.test run python migrations/archive_campaigns.py rehydrate <campaign_id> <phone_number>
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+# Add parent directory to path to import the dynamodb package
+sys.path.append(str(Path(__file__).parent.parent))
+
+from dynamodb.retention import RetentionDDB
+from logging_config import setup_logging
+from phone_utils import mask_phone_number
+
+logger = setup_logging(__name__)
+
+
+def close(args: argparse.Namespace):
+    campaign_ids = args.campaign_ids
+    if args.completed_before_days is not None:
+        campaign_ids += RetentionDDB.find_closed_campaigns(args.completed_before_days)
+    if not campaign_ids:
+        logger.info("No campaigns to close")
+        return
+
+    total = 0
+    for campaign_id in campaign_ids:
+        total += RetentionDDB.close_campaign(campaign_id, args.grace_days, args.dry_run)
+    logger.info(
+        f"{'Would archive' if args.dry_run else 'Archived'} {total} messages of {len(campaign_ids)} campaigns"
+    )
+
+
+def rehydrate(args: argparse.Namespace):
+    messages = RetentionDDB.rehydrate_conversation(args.phone_number, args.campaign_id)
+    logger.info(
+        f"Restored {len(messages)} messages for {mask_phone_number(args.phone_number)} in campaign {args.campaign_id}"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    close_parser = subparsers.add_parser("close", help="Archive and expire campaigns")
+    close_parser.add_argument("campaign_ids", nargs="*", help="Campaigns to close")
+    close_parser.add_argument(
+        "--completed-before-days",
+        type=int,
+        help="Also close unarchived campaigns completed at least this many days ago",
+    )
+    close_parser.add_argument(
+        "--grace-days",
+        type=int,
+        help="Days until archived messages expire (default: CHAT_RETENTION_GRACE_DAYS)",
+    )
+    close_parser.add_argument(
+        "--dry-run", action="store_true", help="Only count the messages to archive"
+    )
+    close_parser.set_defaults(handler=close)
+
+    rehydrate_parser = subparsers.add_parser(
+        "rehydrate", help="Restore an archived conversation to the chat table"
+    )
+    rehydrate_parser.add_argument("campaign_id")
+    rehydrate_parser.add_argument("phone_number", help="E.164 phone number")
+    rehydrate_parser.set_defaults(handler=rehydrate)
+
+    args = parser.parse_args()
+    args.handler(args)
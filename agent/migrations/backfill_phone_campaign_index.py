@@ -0,0 +1,145 @@
+"""
+Backfill phone_number_campaign_id on existing chat history items, so that they are
+returned by the phone_number_campaign_id-timestamp-index.
+
+With --create-index the index is first added to an existing table that predates it
+(e.g. a DynamoDB Local table). Deployed tables get the index from the CDK stack.
+
+Usage (from the agent directory, e.g. against DynamoDB Local with ENVIRONMENT=local):
+    dotenv -f .env.test run python migrations/backfill_phone_campaign_index.py [--create-index] [--dry-run]
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+from botocore.exceptions import ClientError
+
+# Add parent directory to path to import the dynamodb package
+sys.path.append(str(Path(__file__).parent.parent))
+
+from dynamodb import (
+    CHAT_PHONE_CAMPAIGN_INDEX_NAME,
+    get_phone_campaign_key,
+    get_table_references,
+)
+from logging_config import setup_logging
+
+logger = setup_logging(__name__)
+
+
+def create_index(chat_table, poll_interval: float = 5.0):
+    """Add the phone_number_campaign_id-timestamp-index if missing and wait until it is active."""
+    chat_table.reload()
+    index_names = [
+        index["IndexName"] for index in chat_table.global_secondary_indexes or []
+    ]
+    if CHAT_PHONE_CAMPAIGN_INDEX_NAME in index_names:
+        logger.info(f"{CHAT_PHONE_CAMPAIGN_INDEX_NAME} already exists")
+    else:
+        logger.info(f"Creating {CHAT_PHONE_CAMPAIGN_INDEX_NAME} ...")
+        chat_table.update(
+            AttributeDefinitions=[
+                {"AttributeName": "phone_number_campaign_id", "AttributeType": "S"},
+                {"AttributeName": "timestamp", "AttributeType": "S"},
+            ],
+            GlobalSecondaryIndexUpdates=[
+                {
+                    "Create": {
+                        "IndexName": CHAT_PHONE_CAMPAIGN_INDEX_NAME,
+                        "KeySchema": [
+                            {"AttributeName": "phone_number_campaign_id", "KeyType": "HASH"},
+                            {"AttributeName": "timestamp", "KeyType": "RANGE"},
+                        ],
+                        "Projection": {"ProjectionType": "ALL"},
+                    }
+                }
+            ],
+        )
+
+    while True:
+        chat_table.reload()
+        index = next(
+            index
+            for index in chat_table.global_secondary_indexes
+            if index["IndexName"] == CHAT_PHONE_CAMPAIGN_INDEX_NAME
+        )
+        if index["IndexStatus"] == "ACTIVE":
+            logger.info(f"{CHAT_PHONE_CAMPAIGN_INDEX_NAME} is active")
+            return
+        time.sleep(poll_interval)
+
+
+def backfill(chat_table, dry_run: bool = False) -> tuple[int, int]:
+    """
+    Set phone_number_campaign_id on every campaign message that does not have it yet.
+
+    Returns:
+        Tuple of the number of items scanned and the number of items updated
+    """
+    scanned = updated = 0
+    scan_kwargs = {
+        "ProjectionExpression": "#id, #phone_number, #campaign_id",
+        "FilterExpression": "attribute_exists(#campaign_id) AND attribute_not_exists(#key)",
+        "ExpressionAttributeNames": {
+            "#id": "id",
+            "#phone_number": "phone_number",
+            "#campaign_id": "campaign_id",
+            "#key": "phone_number_campaign_id",
+        },
+    }
+
+    while True:
+        response = chat_table.scan(**scan_kwargs)
+        scanned += response.get("ScannedCount", 0)
+
+        for item in response.get("Items", []):
+            if dry_run:
+                updated += 1
+                continue
+            try:
+                chat_table.update_item(
+                    Key={"id": item["id"]},
+                    UpdateExpression="SET phone_number_campaign_id = :key",
+                    ConditionExpression="attribute_exists(id)",
+                    ExpressionAttributeValues={
+                        ":key": get_phone_campaign_key(
+                            item["phone_number"], item["campaign_id"]
+                        )
+                    },
+                )
+                updated += 1
+            except ClientError as e:
+                # Item deleted since it was scanned
+                if e.response["Error"]["Code"] != "ConditionalCheckFailedException":
+                    raise
+
+        logger.info(f"Scanned {scanned} items, {'would update' if dry_run else 'updated'} {updated}")
+
+        if "LastEvaluatedKey" not in response:
+            return scanned, updated
+        scan_kwargs["ExclusiveStartKey"] = response["LastEvaluatedKey"]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument(
+        "--create-index",
+        action="store_true",
+        help="add the index to the chat history table first if it is missing",
+    )
+    parser.add_argument(
+        "--dry-run", action="store_true", help="count items without updating them"
+    )
+    args = parser.parse_args()
+
+    chat_table = get_table_references()["chat_history"]
+
+    if args.create_index:
+        create_index(chat_table)
+
+    scanned, updated = backfill(chat_table, dry_run=args.dry_run)
+    print(
+        f"Done: scanned {scanned} items, {'would update' if args.dry_run else 'updated'} {updated}"
+    )
@@ -0,0 +1,62 @@
+"""
+Export the chat history table to Parquet part files (gzipped JSONL without pyarrow)
+with a parallel scan, for reply rate, sentiment and handoff analytics.
+
+Rerunning with the same output directory and segment count resumes an interrupted
+export from its checkpoint. Start a fresh export in an empty directory.
+
+Usage (from the agent directory, e.g. against DynamoDB Local with ENVIRONMENT=local):
+    dotenv -f .env.test run python migrations/export_chat_history.py <output_dir> [--segments 8] [--workers N] [--capacity-share 0.25] [--all-attributes]
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+# Add parent directory to path to import the dynamodb package
+sys.path.append(str(Path(__file__).parent.parent))
+
+from dynamodb import CHAT_TABLE_NAME
+from dynamodb.connection import connection
+from dynamodb.export import CHAT_HISTORY_COLUMNS, export_table
+from logging_config import setup_logging
+
+logger = setup_logging(__name__)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("output_dir", help="Directory for part files and checkpoint")
+    parser.add_argument(
+        "--segments", type=int, default=8, help="Parallel scan segments (default: 8)"
+    )
+    parser.add_argument(
+        "--workers", type=int, help="Segments scanned at once (default: all)"
+    )
+    parser.add_argument(
+        "--capacity-share",
+        type=float,
+        help="Share of read capacity to use (default: EXPORT_TARGET_CAPACITY_SHARE)",
+    )
+    parser.add_argument(
+        "--all-attributes",
+        action="store_true",
+        help="Export every attribute instead of the fixed chat history columns",
+    )
+    args = parser.parse_args()
+
+    result = connection.run_sync(
+        export_table(
+            CHAT_TABLE_NAME,
+            args.output_dir,
+            total_segments=args.segments,
+            max_workers=args.workers,
+            target_capacity_share=args.capacity_share,
+            columns=None if args.all_attributes else CHAT_HISTORY_COLUMNS,
+        )
+    )
+    logger.info(
+        f"Exported {result.items} messages in {result.elapsed_seconds:.1f} s "
+        f"({result.items / max(result.elapsed_seconds, 1e-9):.0f} items/s, "
+        f"{result.consumed_capacity:.0f} RCU)"
+    )
@@ -1,29 +1,86 @@
 """Phone number utilities for normalization and validation."""
 
+import functools
+import os
+from dataclasses import dataclass
+
 import phonenumbers
 from phonenumbers import NumberParseException
 
 
-def normalize_phone_number(phone_number: str) -> str:
+@dataclass(frozen=True)
+class ParsedPhoneNumber:
     """
-    Normalize a phone number to E.164 format for consistent database storage.
+    Result of parsing a phone number once.
+
+    Attributes:
+        raw: The phone number as given
+        is_valid: True if it is a valid US phone number
+        e164: E.164 format (e.g., +12128675309), or the raw string if invalid
+        national: National format (e.g., (212) 867-5309), or the raw string if invalid
+        masked: Masked form for logging (e.g., ***-***-5309)
+    """
+
+    raw: str
+    is_valid: bool
+    e164: str
+    national: str
+    masked: str
+
+
+@functools.lru_cache(maxsize=int(os.environ.get("PHONE_CACHE_MAX_SIZE", "4096")))
+def parse_phone_number(phone_number: str) -> ParsedPhoneNumber:
+    """
+    Parse and validate a phone number once, producing all of its derived forms.
+
+    Results are memoized in a bounded LRU, since the same numbers recur throughout a
+    campaign.
 
     Args:
         phone_number: Phone number in any format
 
     Returns:
-        Normalized phone number in E.164 format (e.g., +12128675309)
-        Returns original string if parsing fails
+        ParsedPhoneNumber with the validation result and normalized forms
     """
     try:
         parsed = phonenumbers.parse(phone_number, "US")
         if phonenumbers.is_valid_number(parsed):
-            return phonenumbers.format_number(
+            e164 = phonenumbers.format_number(
                 parsed, phonenumbers.PhoneNumberFormat.E164
             )
-        return phone_number
+            return ParsedPhoneNumber(
+                raw=phone_number,
+                is_valid=True,
+                e164=e164,
+                national=phonenumbers.format_number(
+                    parsed, phonenumbers.PhoneNumberFormat.NATIONAL
+                ),
+                masked=mask_phone_number(e164),
+            )
     except NumberParseException:
-        return phone_number
+        pass
+
+    return ParsedPhoneNumber(
+        raw=phone_number,
+        is_valid=False,
+        e164=phone_number,
+        national=phone_number,
+        masked=mask_phone_number(phone_number),
+    )
+
+
+def normalize_phone_number(phone_number: str) -> str:
+    """
+    Normalize a phone number to E.164 format for consistent database storage.
+
+    Args:
+        phone_number: Phone number in any format
+
+    Returns:
+        Normalized phone number in E.164 format (e.g., +12128675309)
+        Returns original string if parsing fails
+    """
+    return parse_phone_number(phone_number).e164
 
 
 def validate_phone_number(phone_number: str) -> bool:
@@ -36,11 +93,7 @@ def validate_phone_number(phone_number: str) -> bool:
     Returns:
         True if valid US phone number, False otherwise
     """
-    try:
-        parsed = phonenumbers.parse(phone_number, "US")
-        return phonenumbers.is_valid_number(parsed)
-    except NumberParseException:
-        return False
+    return parse_phone_number(phone_number).is_valid
 
 
 def format_phone_number(phone_number: str) -> str:
@@ -54,15 +107,7 @@ def format_phone_number(phone_number: str) -> str:
         Formatted phone number in national format (e.g., (212) 867-5309)
         Returns original string if parsing fails
     """
-    try:
-        parsed = phonenumbers.parse(phone_number, "US")
-        if phonenumbers.is_valid_number(parsed):
-            return phonenumbers.format_number(
-                parsed, phonenumbers.PhoneNumberFormat.NATIONAL
-            )
-        return phone_number
-    except NumberParseException:
-        return phone_number
+    return parse_phone_number(phone_number).national
 
 
 def mask_phone_number(phone_number: str) -> str:
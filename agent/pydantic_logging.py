@@ -1,9 +1,20 @@
 """Pydantic Logfire configuration and initialization."""
 
+import functools
 import os
 
 import logfire
+from utils import is_lazy_init_enabled
 
-logfire.configure(token=os.environ["PYDANTIC_LOGFIRE_TOKEN"])
-logfire.info("Sales Agent initialized")
-logfire.instrument_pydantic_ai()
+
+@functools.cache
+def configure_logfire():
+    """Configure logfire and instrument pydantic-ai once per process."""
+    logfire.configure(token=os.environ["PYDANTIC_LOGFIRE_TOKEN"])
+    logfire.info("Sales Agent initialized")
+    logfire.instrument_pydantic_ai()
+
+
+# Configure on import, unless deferred to the first processed message
+if not is_lazy_init_enabled():
+    configure_logfire()
@@ -1,13 +1,17 @@
 """SQS utility functions for message processing."""
 
+import asyncio
 import json
 import os
+import random
+from dataclasses import dataclass, field
 from datetime import datetime, timezone
 
-import boto3
+import event_loop
+from aws_clients import get_client
 from custom_types import OutboundSQSMessageAttributes, OutboundSQSMessageBody
 from logging_config import setup_logging
-from utils import get_boto3_session_config
+from utils import is_lazy_init_enabled
 
 from agent.models import AgentResponseWrapper
 
@@ -15,8 +19,47 @@ logger = setup_logging(__name__)
 
 OUTBOUND_SMS_QUEUE_URL = os.environ.get("OUTBOUND_SMS_QUEUE_URL")
 
-# Initialize SQS client
-sqs = boto3.client("sqs", **get_boto3_session_config())
+# SendMessageBatch accepts at most 10 entries and 256 KiB of payload per call
+SQS_BATCH_MAX_ENTRIES = 10
+SQS_BATCH_MAX_BYTES = 256 * 1024
+# Seconds a message waits for others to share its batch before it is sent anyway
+SQS_BATCH_MAX_WAIT_SECONDS = float(os.environ.get("SQS_BATCH_MAX_WAIT_SECONDS", "0.05"))
+# Retries of entries that failed on the SQS side, with full-jitter backoff
+SQS_BATCH_MAX_RETRIES = int(os.environ.get("SQS_BATCH_MAX_RETRIES", "3"))
+SQS_BATCH_BASE_DELAY = float(os.environ.get("SQS_BATCH_BASE_DELAY", "0.1"))
+
+
+def get_sqs_client():
+    """Get the shared SQS client, creating it on first use."""
+    return get_client("sqs")
+
+
+if not is_lazy_init_enabled():
+    get_sqs_client()
+
+
+def get_outbound_sms_message(
+    phone_number: str, agent_response: AgentResponseWrapper, queue_timestamp: str
+) -> dict:
+    """Body and attributes of an outbound SMS queue message."""
+    message_body = OutboundSQSMessageBody(
+        phoneNumber=phone_number,
+        agentResponse=agent_response.as_dict(),
+        campaignId=agent_response.campaign_id,
+        timestamp=queue_timestamp,
+    )
+
+    message_attributes = OutboundSQSMessageAttributes()
+
+    # Add campaign_id to message attributes if provided
+    if agent_response.campaign_id:
+        message_attributes.campaignId = agent_response.campaign_id
+
+    return {
+        "MessageBody": json.dumps(message_body.as_dict()),
+        "MessageAttributes": message_attributes.to_sqs_format(),
+    }
+
 
 def send_to_outbound_sms_queue(
     phone_number: str, agent_response: AgentResponseWrapper | None = None
@@ -42,23 +85,9 @@ def send_to_outbound_sms_queue(
         return False, queue_timestamp
 
     try:
-        message_body = OutboundSQSMessageBody(
-            phoneNumber=phone_number,
-            agentResponse=agent_response.as_dict(),
-            campaignId=agent_response.campaign_id,
-            timestamp=queue_timestamp,
-        )
-
-        message_attributes = OutboundSQSMessageAttributes()
-
-        # Add campaign_id to message attributes if provided
-        if agent_response.campaign_id:
-            message_attributes.campaignId = agent_response.campaign_id
-
-        response = sqs.send_message(
+        response = get_sqs_client().send_message(
             QueueUrl=OUTBOUND_SMS_QUEUE_URL,
-            MessageBody=json.dumps(message_body.as_dict()),
-            MessageAttributes=message_attributes.to_sqs_format(),
+            **get_outbound_sms_message(phone_number, agent_response, queue_timestamp),
         )
 
         logger.info(f"Message queued successfully. MessageId: {response['MessageId']}")
@@ -67,3 +96,203 @@ def send_to_outbound_sms_queue(
     except Exception as e:
         logger.error(f"Failed to send message to SQS queue: {str(e)}", exc_info=True)
         return False, queue_timestamp
+
+
+@dataclass
+class PendingSQSMessage:
+    """A message waiting in the outbound batcher for its batch to be sent."""
+
+    entry_id: str
+    entry: dict
+    queue_timestamp: str
+    future: asyncio.Future
+    size: int = field(init=False)
+
+    def __post_init__(self):
+        # Message attribute names and values count towards the batch payload too
+        self.size = len(self.entry["MessageBody"].encode()) + sum(
+            len(name) + len(value["StringValue"])
+            for name, value in self.entry["MessageAttributes"].items()
+        )
+
+    def resolve(self, success: bool):
+        # The caller may have been cancelled, the message is sent regardless
+        if not self.future.done():
+            self.future.set_result((success, self.queue_timestamp))
+
+
+class OutboundSMSBatcher:
+    """
+    Buffers outbound SMS messages and sends them with SendMessageBatch.
+
+    A batch is sent once 10 messages (or 256 KiB) are buffered, or max_wait_seconds
+    after the first message of the batch arrived. Entries SQS fails on its side are
+    retried on their own; entries rejected as the sender's fault are not. Every caller
+    waits for the outcome of its own message.
+
+    The batcher belongs to the event loop it was created on.
+    """
+
+    def __init__(
+        self,
+        queue_url: str | None,
+        max_wait_seconds: float | None = None,
+        max_retries: int | None = None,
+    ):
+        self.queue_url = queue_url
+        self.max_wait_seconds = (
+            SQS_BATCH_MAX_WAIT_SECONDS if max_wait_seconds is None else max_wait_seconds
+        )
+        self.max_retries = SQS_BATCH_MAX_RETRIES if max_retries is None else max_retries
+        self.loop = asyncio.get_running_loop()
+        self.pending: list[PendingSQSMessage] = []
+        self.pending_size = 0
+        self._next_entry_id = 0
+        self._timer: asyncio.TimerHandle | None = None
+        self._in_flight: set[asyncio.Task] = set()
+
+    async def send(
+        self, phone_number: str, agent_response: AgentResponseWrapper | None
+    ) -> tuple[bool, str]:
+        """
+        Queue an agent response, see send_to_outbound_sms_queue.
+
+        Returns:
+            Tuple indicating success status and the timestamp when the message queue was attempted
+        """
+        queue_timestamp = datetime.now(tz=timezone.utc).isoformat()
+        if not self.queue_url:
+            logger.error("OUTBOUND_SMS_QUEUE_URL environment variable not set")
+            return False, queue_timestamp
+
+        if not agent_response:
+            logger.error("Agent response is None, not sending to outbound SMS queue")
+            return False, queue_timestamp
+
+        message = PendingSQSMessage(
+            entry_id=str(self._next_entry_id),
+            entry=get_outbound_sms_message(
+                phone_number, agent_response, queue_timestamp
+            ),
+            queue_timestamp=queue_timestamp,
+            future=self.loop.create_future(),
+        )
+        self._next_entry_id += 1
+
+        if self.pending_size + message.size > SQS_BATCH_MAX_BYTES:
+            self._send_pending()
+        self.pending.append(message)
+        self.pending_size += message.size
+
+        if len(self.pending) >= SQS_BATCH_MAX_ENTRIES:
+            self._send_pending()
+        elif self._timer is None:
+            self._timer = self.loop.call_later(
+                self.max_wait_seconds, self._send_pending
+            )
+
+        return await message.future
+
+    def _send_pending(self):
+        """Start sending the buffered messages as one batch."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if not self.pending:
+            return
+
+        batch, self.pending, self.pending_size = self.pending, [], 0
+        task = self.loop.create_task(self._send_batch(batch))
+        self._in_flight.add(task)
+        task.add_done_callback(self._in_flight.discard)
+
+    async def _send_batch(self, batch: list[PendingSQSMessage]):
+        messages = {message.entry_id: message for message in batch}
+        for attempt in range(self.max_retries + 1):
+            try:
+                response = await asyncio.to_thread(
+                    get_sqs_client().send_message_batch,
+                    QueueUrl=self.queue_url,
+                    Entries=[
+                        {"Id": entry_id, **message.entry}
+                        for entry_id, message in messages.items()
+                    ],
+                )
+            except Exception as e:
+                # The client already retried the call itself
+                logger.error(
+                    f"Failed to send batch of {len(messages)} messages to SQS queue: {str(e)}",
+                    exc_info=True,
+                )
+                break
+
+            for successful in response.get("Successful", []):
+                messages.pop(successful["Id"]).resolve(True)
+
+            for failed in response.get("Failed", []):
+                if failed.get("SenderFault"):
+                    logger.error(
+                        f"SQS rejected message: {failed.get('Code')} {failed.get('Message')}"
+                    )
+                    messages.pop(failed["Id"]).resolve(False)
+
+            if not messages:
+                logger.info(f"Batch of {len(batch)} messages queued successfully")
+                return
+
+            if attempt < self.max_retries:
+                logger.warning(
+                    f"{len(messages)} of {len(batch)} messages failed on the SQS side, retry {attempt + 1}"
+                )
+                await asyncio.sleep(
+                    random.uniform(0, SQS_BATCH_BASE_DELAY * 2**attempt)
+                )
+
+        for message in messages.values():
+            message.resolve(False)
+
+    async def flush(self):
+        """Send everything buffered and wait until every batch in flight is done."""
+        self._send_pending()
+        while self._in_flight:
+            await asyncio.gather(*self._in_flight, return_exceptions=True)
+
+
+_outbound_sms_batcher: OutboundSMSBatcher | None = None
+
+
+def get_outbound_sms_batcher() -> OutboundSMSBatcher:
+    """Get the outbound batcher of the running event loop, creating it on first use."""
+    global _outbound_sms_batcher
+    if (
+        _outbound_sms_batcher is None
+        or _outbound_sms_batcher.loop is not asyncio.get_running_loop()
+    ):
+        _outbound_sms_batcher = OutboundSMSBatcher(OUTBOUND_SMS_QUEUE_URL)
+    return _outbound_sms_batcher
+
+
+async def send_to_outbound_sms_queue_batched(
+    phone_number: str, agent_response: AgentResponseWrapper | None = None
+) -> tuple[bool, str]:
+    """
+    Send agent response to outbound SMS queue, batched with concurrent responses
+
+    Args:
+        phone_number: The recipient phone number
+        agent_response: The complete AgentResponseWrapper object from the AI agent
+
+    Returns:
+        Tuple indicating success status and the timestamp when the message queue was attempted
+    """
+    return await get_outbound_sms_batcher().send(phone_number, agent_response)
+
+
+async def flush_outbound_sms_queue():
+    """Send the responses still buffered on the running event loop."""
+    batcher = _outbound_sms_batcher
+    if batcher is not None and batcher.loop is asyncio.get_running_loop():
+        await batcher.flush()
+
+
+event_loop.on_shutdown(flush_outbound_sms_queue)
@@ -0,0 +1,34 @@
+"""Pluggable storage of customers, campaigns and chat history."""
+
+import functools
+import os
+
+from utils import get_storage_backend_name
+
+from storage.protocol import StorageBackend
+
+SQLITE_DATABASE_PATH = os.environ.get("SQLITE_DATABASE_PATH", "outreach.db")
+
+
+@functools.cache
+def get_storage() -> StorageBackend:
+    """
+    Get the storage backend selected by STORAGE_BACKEND, creating it on first use.
+
+    Backends are imported on demand, so the SQLite and in-memory backends neither
+    initialize the DynamoDB tables nor need the aioboto3 connection.
+    """
+    backend_name = get_storage_backend_name()
+    if backend_name == "dynamodb":
+        from storage.dynamodb_store import DynamoDBStorage
+
+        return DynamoDBStorage()
+    if backend_name == "sqlite":
+        from storage.sqlite_store import SQLiteStorage
+
+        return SQLiteStorage(SQLITE_DATABASE_PATH)
+    if backend_name == "memory":
+        from storage.memory_store import InMemoryStorage
+
+        return InMemoryStorage()
+    raise ValueError(f"Unknown storage backend: {backend_name}")
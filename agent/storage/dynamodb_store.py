@@ -0,0 +1,126 @@
+"""Storage backend on the DynamoDB tables, delegating to the Async*DDB repositories."""
+
+from dynamodb.campaign import AsyncCampaignDDB
+from dynamodb.campaign_customer import AsyncCampaignCustomerDDB
+from dynamodb.chat_history import AsyncChatHistoryDDB
+from dynamodb.customer import AsyncCustomerDDB
+from dynamodb.models import (
+    AddMessageInput,
+    Campaign,
+    ConversationSummary,
+    CreateCampaignInput,
+    Customer,
+    CustomerStatus,
+    HistoryMessage,
+    UpdateChatMessageAttributes,
+)
+from dynamodb.retention import AsyncRetentionDDB
+from dynamodb.unit_of_work import UnitOfWork
+
+
+class DynamoDBStorage:
+    """The production backend. See the Async*DDB repositories for the semantics."""
+
+    async def get_customer(self, phone_number: str) -> Customer | None:
+        return await AsyncCustomerDDB.get_customer(phone_number)
+
+    async def get_customers(self, phone_numbers: list[str]) -> dict[str, Customer]:
+        return await AsyncCustomerDDB.get_customers(phone_numbers)
+
+    async def create_customer(self, customer: Customer):
+        return await AsyncCustomerDDB.create_customer(customer)
+
+    async def get_or_create_customer(
+        self,
+        phone_number: str,
+        first_name: str = "Unknown",
+        last_name: str = "Customer",
+        most_recent_campaign_id: str | None = None,
+        known_updated_at: str | None = None,
+    ) -> Customer:
+        return await AsyncCustomerDDB.get_or_create_customer(
+            phone_number,
+            first_name,
+            last_name,
+            most_recent_campaign_id,
+            known_updated_at,
+        )
+
+    async def update_customer_status(
+        self,
+        phone_number: str,
+        status: CustomerStatus,
+        expected_status: CustomerStatus | None = None,
+    ) -> Customer | None:
+        return await AsyncCustomerDDB.update_customer_status(
+            phone_number, status, expected_status
+        )
+
+    async def get_campaign(self, campaign_id: str) -> Campaign | None:
+        return await AsyncCampaignDDB.get_campaign(campaign_id)
+
+    async def get_campaigns(self, campaign_ids: list[str]) -> dict[str, Campaign]:
+        return await AsyncCampaignDDB.get_campaigns(campaign_ids)
+
+    async def create_campaign(self, campaign: CreateCampaignInput) -> str:
+        return await AsyncCampaignDDB.create_campaign(campaign)
+
+    async def add_message(self, message: AddMessageInput) -> str:
+        return await AsyncChatHistoryDDB.add_message(message)
+
+    async def get_conversation_history(
+        self, phone_number: str, campaign_id: str | None = None, skip_last: bool = False
+    ) -> list[HistoryMessage]:
+        return await AsyncChatHistoryDDB.get_conversation_history(
+            phone_number, campaign_id, skip_last
+        )
+
+    async def get_recent_conversation_history(
+        self, phone_number: str, campaign_id: str, limit: int, skip_last: bool = False
+    ) -> list[HistoryMessage]:
+        return await AsyncChatHistoryDDB.get_recent_conversation_history(
+            phone_number, campaign_id, limit, skip_last
+        )
+
+    async def get_messages_between(
+        self, phone_number: str, campaign_id: str, after: str | None, before: str
+    ) -> list[HistoryMessage]:
+        return await AsyncChatHistoryDDB.get_messages_between(
+            phone_number, campaign_id, after, before
+        )
+
+    async def update_message_attributes(
+        self, message_id: str, attributes: UpdateChatMessageAttributes
+    ):
+        return await AsyncChatHistoryDDB.update_message_attributes(
+            message_id, attributes
+        )
+
+    async def get_archived_conversation(
+        self, phone_number: str, campaign_id: str, archived_at: str
+    ) -> list[HistoryMessage] | None:
+        return await AsyncRetentionDDB.get_archived_conversation(
+            phone_number, campaign_id, archived_at
+        )
+
+    async def rehydrate_conversation(
+        self, phone_number: str, campaign_id: str
+    ) -> list[HistoryMessage]:
+        return await AsyncRetentionDDB.rehydrate_conversation(phone_number, campaign_id)
+
+    async def get_conversation_summary(
+        self, campaign_id: str, phone_number: str
+    ) -> ConversationSummary | None:
+        return await AsyncCampaignCustomerDDB.get_conversation_summary(
+            campaign_id, phone_number
+        )
+
+    async def update_conversation_summary(
+        self, campaign_id: str, phone_number: str, summary: ConversationSummary
+    ) -> bool:
+        return await AsyncCampaignCustomerDDB.update_conversation_summary(
+            campaign_id, phone_number, summary
+        )
+
+    def unit_of_work(self) -> UnitOfWork:
+        return UnitOfWork()
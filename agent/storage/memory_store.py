@@ -0,0 +1,192 @@
+"""In-process storage backend for benchmarks, load tests and local runs."""
+
+import dataclasses
+import uuid
+from datetime import datetime, timezone
+
+from dynamodb.models import (
+    AddMessageInput,
+    Campaign,
+    ChatMessage,
+    ConversationSummary,
+    CreateCampaignInput,
+    Customer,
+    CustomerStatus,
+    HistoryMessage,
+    UpdateChatMessageAttributes,
+)
+
+from storage.protocol import SequentialUnitOfWork
+
+
+def to_history_message(message: ChatMessage) -> HistoryMessage:
+    return HistoryMessage(
+        id=message.id,
+        message=message.message,
+        direction=message.direction,
+        timestamp=message.timestamp,
+        guardrails_intervened=message.guardrails_intervened,
+    )
+
+
+class InMemoryStorage:
+    """
+    Keeps everything in dicts of the process, so nothing survives a restart.
+
+    Returned objects are copies, so callers cannot change stored state by mutating them.
+    """
+
+    def __init__(self):
+        self.customers: dict[str, Customer] = {}
+        self.campaigns: dict[str, CreateCampaignInput] = {}
+        self.messages: dict[str, ChatMessage] = {}
+        # (phone number, campaign ID) to the conversation's messages in timestamp order
+        self.conversations: dict[tuple[str, str], list[ChatMessage]] = {}
+        self.summaries: dict[tuple[str, str], ConversationSummary] = {}
+
+    async def get_customer(self, phone_number: str) -> Customer | None:
+        customer = self.customers.get(phone_number)
+        return dataclasses.replace(customer) if customer else None
+
+    async def get_customers(self, phone_numbers: list[str]) -> dict[str, Customer]:
+        return {
+            phone_number: dataclasses.replace(self.customers[phone_number])
+            for phone_number in phone_numbers
+            if phone_number in self.customers
+        }
+
+    async def create_customer(self, customer: Customer):
+        if customer.created_at is None or customer.updated_at is None:
+            now = datetime.now(tz=timezone.utc).isoformat()
+            customer.created_at = now
+            customer.updated_at = now
+        self.customers[customer.phone_number] = dataclasses.replace(customer)
+
+    async def get_or_create_customer(
+        self,
+        phone_number: str,
+        first_name: str = "Unknown",
+        last_name: str = "Customer",
+        most_recent_campaign_id: str | None = None,
+        known_updated_at: str | None = None,
+    ) -> Customer:
+        if phone_number not in self.customers:
+            await self.create_customer(
+                Customer(
+                    phone_number=phone_number,
+                    first_name=first_name,
+                    last_name=last_name,
+                    status=CustomerStatus.AUTOMATED,
+                    most_recent_campaign_id=most_recent_campaign_id,
+                )
+            )
+        return dataclasses.replace(self.customers[phone_number])
+
+    async def update_customer_status(
+        self,
+        phone_number: str,
+        status: CustomerStatus,
+        expected_status: CustomerStatus | None = None,
+    ) -> Customer | None:
+        customer = self.customers.get(phone_number)
+        if customer is None or (expected_status and customer.status != expected_status):
+            return None
+        customer.status = status
+        customer.updated_at = datetime.now(tz=timezone.utc).isoformat()
+        return dataclasses.replace(customer)
+
+    async def get_campaign(self, campaign_id: str) -> Campaign | None:
+        campaign = self.campaigns.get(campaign_id)
+        if campaign is None:
+            return None
+        return Campaign(
+            campaign_id=campaign_id,
+            name=campaign.name,
+            campaign_details=campaign.campaign_details,
+        )
+
+    async def get_campaigns(self, campaign_ids: list[str]) -> dict[str, Campaign]:
+        campaigns = {}
+        for campaign_id in campaign_ids:
+            campaign = await self.get_campaign(campaign_id)
+            if campaign:
+                campaigns[campaign_id] = campaign
+        return campaigns
+
+    async def create_campaign(self, campaign: CreateCampaignInput) -> str:
+        campaign.campaign_id = campaign.campaign_id or str(uuid.uuid4())
+        self.campaigns[campaign.campaign_id] = dataclasses.replace(campaign)
+        return campaign.campaign_id
+
+    async def add_message(self, message: AddMessageInput) -> str:
+        message.id = message.id or str(uuid.uuid4())
+        stored_message = ChatMessage(**dataclasses.asdict(message))
+        self.messages[message.id] = stored_message
+        if message.campaign_id:
+            conversation = self.conversations.setdefault(
+                (message.phone_number, message.campaign_id), []
+            )
+            conversation.append(stored_message)
+            conversation.sort(key=lambda m: m.timestamp)
+        return message.id
+
+    async def get_conversation_history(
+        self, phone_number: str, campaign_id: str | None = None, skip_last: bool = False
+    ) -> list[HistoryMessage]:
+        if not campaign_id:
+            return []
+        conversation = self.conversations.get((phone_number, campaign_id), [])
+        messages = [to_history_message(m) for m in conversation]
+        return messages[:-1] if skip_last else messages
+
+    async def get_recent_conversation_history(
+        self, phone_number: str, campaign_id: str, limit: int, skip_last: bool = False
+    ) -> list[HistoryMessage]:
+        messages = await self.get_conversation_history(phone_number, campaign_id)
+        messages = messages[-(limit + 1 if skip_last else limit) :] if limit else []
+        return messages[:-1] if skip_last else messages
+
+    async def get_messages_between(
+        self, phone_number: str, campaign_id: str, after: str | None, before: str
+    ) -> list[HistoryMessage]:
+        return [
+            to_history_message(m)
+            for m in self.conversations.get((phone_number, campaign_id), [])
+            if (after is None or m.timestamp > after) and m.timestamp < before
+        ]
+
+    async def update_message_attributes(
+        self, message_id: str, attributes: UpdateChatMessageAttributes
+    ):
+        message = self.messages.get(message_id)
+        if message is None:
+            return
+        for attr_name, attr_value in attributes.as_dict().items():
+            setattr(message, attr_name, attr_value)
+
+    async def get_archived_conversation(
+        self, phone_number: str, campaign_id: str, archived_at: str
+    ) -> list[HistoryMessage] | None:
+        # Nothing expires from memory, so there is nothing to restore
+        return None
+
+    async def rehydrate_conversation(
+        self, phone_number: str, campaign_id: str
+    ) -> list[HistoryMessage]:
+        return []
+
+    async def get_conversation_summary(
+        self, campaign_id: str, phone_number: str
+    ) -> ConversationSummary | None:
+        summary = self.summaries.get((campaign_id, phone_number))
+        return dataclasses.replace(summary) if summary else None
+
+    async def update_conversation_summary(
+        self, campaign_id: str, phone_number: str, summary: ConversationSummary
+    ) -> bool:
+        # No campaign customer records exist locally, so the summary is always stored
+        self.summaries[(campaign_id, phone_number)] = dataclasses.replace(summary)
+        return True
+
+    def unit_of_work(self) -> SequentialUnitOfWork:
+        return SequentialUnitOfWork(self)
@@ -0,0 +1,167 @@
+"""Storage protocol shared by the DynamoDB, SQLite and in-memory backends."""
+
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Protocol
+
+from dynamodb.models import (
+    AddMessageInput,
+    Campaign,
+    ConversationSummary,
+    CreateCampaignInput,
+    Customer,
+    CustomerStatus,
+    HistoryMessage,
+    UpdateChatMessageAttributes,
+)
+
+
+class PendingWrite(Protocol):
+    """A write collected by a unit of work; applied is None until committed."""
+
+    applied: bool | None
+
+
+class UnitOfWork(Protocol):
+    """Collects the writes of one turn and commits them together."""
+
+    def update_customer_status(
+        self,
+        phone_number: str,
+        status: CustomerStatus,
+        expected_status: CustomerStatus | None = None,
+    ) -> PendingWrite: ...
+
+    def update_message_attributes(
+        self, message_id: str, attributes: UpdateChatMessageAttributes
+    ) -> PendingWrite: ...
+
+    async def commit(self, atomic: bool = True) -> bool: ...
+
+
+class StorageBackend(Protocol):
+    """
+    Customer, campaign and chat history storage used by the agent.
+
+    Methods mirror the Async*DDB repositories, which define their semantics.
+    """
+
+    # Customers
+    async def get_customer(self, phone_number: str) -> Customer | None: ...
+
+    async def get_customers(self, phone_numbers: list[str]) -> dict[str, Customer]: ...
+
+    async def create_customer(self, customer: Customer): ...
+
+    async def get_or_create_customer(
+        self,
+        phone_number: str,
+        first_name: str = "Unknown",
+        last_name: str = "Customer",
+        most_recent_campaign_id: str | None = None,
+        known_updated_at: str | None = None,
+    ) -> Customer: ...
+
+    async def update_customer_status(
+        self,
+        phone_number: str,
+        status: CustomerStatus,
+        expected_status: CustomerStatus | None = None,
+    ) -> Customer | None: ...
+
+    # Campaigns
+    async def get_campaign(self, campaign_id: str) -> Campaign | None: ...
+
+    async def get_campaigns(self, campaign_ids: list[str]) -> dict[str, Campaign]: ...
+
+    async def create_campaign(self, campaign: CreateCampaignInput) -> str: ...
+
+    # Chat history
+    async def add_message(self, message: AddMessageInput) -> str: ...
+
+    async def get_conversation_history(
+        self, phone_number: str, campaign_id: str | None = None, skip_last: bool = False
+    ) -> list[HistoryMessage]: ...
+
+    async def get_recent_conversation_history(
+        self, phone_number: str, campaign_id: str, limit: int, skip_last: bool = False
+    ) -> list[HistoryMessage]: ...
+
+    async def get_messages_between(
+        self, phone_number: str, campaign_id: str, after: str | None, before: str
+    ) -> list[HistoryMessage]: ...
+
+    async def update_message_attributes(
+        self, message_id: str, attributes: UpdateChatMessageAttributes
+    ): ...
+
+    async def get_archived_conversation(
+        self, phone_number: str, campaign_id: str, archived_at: str
+    ) -> list[HistoryMessage] | None: ...
+
+    async def rehydrate_conversation(
+        self, phone_number: str, campaign_id: str
+    ) -> list[HistoryMessage]: ...
+
+    # Campaign customers
+    async def get_conversation_summary(
+        self, campaign_id: str, phone_number: str
+    ) -> ConversationSummary | None: ...
+
+    async def update_conversation_summary(
+        self, campaign_id: str, phone_number: str, summary: ConversationSummary
+    ) -> bool: ...
+
+    def unit_of_work(self) -> UnitOfWork: ...
+
+
+@dataclass
+class QueuedWrite:
+    """A write of a SequentialUnitOfWork, run when the unit of work commits."""
+
+    write: Callable[[], Awaitable[Any]]
+    applied: bool | None = field(default=None, init=False)
+
+
+class SequentialUnitOfWork:
+    """
+    Unit of work for the in-memory backend, which commits the writes one by one.
+
+    Not atomic: commit(atomic=True) is accepted for compatibility, but writes are
+    applied in the order they were added and a failing write leaves the earlier ones
+    applied. The in-memory writes cannot fail halfway, so nothing is lost in practice.
+    """
+
+    def __init__(self, storage: StorageBackend):
+        self.storage = storage
+        self.writes: list[QueuedWrite] = []
+
+    def update_customer_status(
+        self,
+        phone_number: str,
+        status: CustomerStatus,
+        expected_status: CustomerStatus | None = None,
+    ) -> QueuedWrite:
+        async def write() -> bool:
+            customer = await self.storage.update_customer_status(
+                phone_number, status, expected_status
+            )
+            return customer is not None
+
+        self.writes.append(QueuedWrite(write))
+        return self.writes[-1]
+
+    def update_message_attributes(
+        self, message_id: str, attributes: UpdateChatMessageAttributes
+    ) -> QueuedWrite:
+        async def write() -> bool:
+            await self.storage.update_message_attributes(message_id, attributes)
+            return True
+
+        self.writes.append(QueuedWrite(write))
+        return self.writes[-1]
+
+    async def commit(self, atomic: bool = True) -> bool:
+        writes, self.writes = self.writes, []
+        for queued_write in writes:
+            queued_write.applied = await queued_write.write()
+        return all(w.applied for w in writes)
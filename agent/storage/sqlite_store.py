@@ -0,0 +1,416 @@
+"""SQLite storage backend for single-node deployments and local runs."""
+
+import asyncio
+import sqlite3
+import threading
+import uuid
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any
+
+from dynamodb.models import (
+    AddMessageInput,
+    Campaign,
+    ConversationSummary,
+    CreateCampaignInput,
+    Customer,
+    CustomerStatus,
+    HistoryMessage,
+    UpdateChatMessageAttributes,
+)
+from logging_config import setup_logging
+
+logger = setup_logging(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS customers (
+    phone_number TEXT PRIMARY KEY,
+    first_name TEXT NOT NULL,
+    last_name TEXT NOT NULL,
+    status TEXT NOT NULL,
+    created_at TEXT,
+    updated_at TEXT,
+    most_recent_campaign_id TEXT
+);
+CREATE TABLE IF NOT EXISTS campaigns (
+    campaign_id TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    message_template TEXT NOT NULL,
+    campaign_details TEXT
+);
+CREATE TABLE IF NOT EXISTS chat_history (
+    id TEXT PRIMARY KEY,
+    campaign_id TEXT,
+    message TEXT NOT NULL,
+    phone_number TEXT NOT NULL,
+    direction TEXT NOT NULL,
+    timestamp TEXT NOT NULL,
+    phone_number_campaign_id TEXT,
+    response_type TEXT,
+    status TEXT,
+    guardrails_intervened INTEGER,
+    user_sentiment TEXT,
+    should_handoff INTEGER,
+    sent_at TEXT,
+    external_message_id TEXT,
+    error_message TEXT
+);
+-- Serves every conversation query, like the phone_number_campaign_id-timestamp-index
+CREATE INDEX IF NOT EXISTS chat_history_phone_campaign_timestamp
+    ON chat_history (phone_number, campaign_id, timestamp);
+CREATE TABLE IF NOT EXISTS campaign_customers (
+    campaign_id TEXT NOT NULL,
+    phone_number TEXT NOT NULL,
+    conversation_summary TEXT,
+    summarized_through TEXT,
+    updated_at TEXT,
+    PRIMARY KEY (campaign_id, phone_number)
+);
+"""
+
+HISTORY_COLUMNS = ", ".join(HistoryMessage.__dataclass_fields__.keys())
+
+
+def to_history_message(row: sqlite3.Row) -> HistoryMessage:
+    message = HistoryMessage(**row)
+    if message.guardrails_intervened is not None:
+        message.guardrails_intervened = bool(message.guardrails_intervened)
+    return message
+
+
+def to_customer(row: sqlite3.Row) -> Customer:
+    return Customer(**{k: row[k] for k in row.keys() if row[k] is not None})
+
+
+def get_customer_status_update(
+    phone_number: str, status: CustomerStatus, expected_status: CustomerStatus | None
+) -> tuple[str, list[Any]]:
+    """UPDATE statement and parameters for a (conditional) customer status change."""
+    sql = "UPDATE customers SET status = ?, updated_at = ? WHERE phone_number = ?"
+    parameters = [
+        status.value,
+        datetime.now(tz=timezone.utc).isoformat(),
+        phone_number,
+    ]
+    if expected_status:
+        sql += " AND status = ?"
+        parameters.append(expected_status.value)
+    return sql, parameters
+
+
+def get_message_attributes_update(
+    message_id: str, attributes: UpdateChatMessageAttributes
+) -> tuple[str, list[Any]] | None:
+    """UPDATE statement and parameters for setting message attributes, if any are set."""
+    values = attributes.as_dict()
+    if not values:
+        return None
+    # Column names are UpdateChatMessageAttributes fields, never user input
+    assignments = ", ".join(f"{name} = ?" for name in values)
+    return (
+        f"UPDATE chat_history SET {assignments} WHERE id = ?",
+        [*values.values(), message_id],
+    )
+
+
+@dataclass
+class SQLiteWrite:
+    """A statement of a SQLiteUnitOfWork; conditional writes may match no rows."""
+
+    sql: str | None
+    parameters: list[Any]
+    conditional: bool
+    applied: bool | None = field(default=None, init=False)
+
+
+class SQLiteUnitOfWork:
+    """
+    Unit of work that commits its writes in one SQLite transaction.
+
+    Like a DynamoDB transaction, a conditional status update whose condition does not
+    hold is not applied while the other writes are; any error rolls back every write.
+    """
+
+    def __init__(self, storage: "SQLiteStorage"):
+        self.storage = storage
+        self.writes: list[SQLiteWrite] = []
+
+    def update_customer_status(
+        self,
+        phone_number: str,
+        status: CustomerStatus,
+        expected_status: CustomerStatus | None = None,
+    ) -> SQLiteWrite:
+        sql, parameters = get_customer_status_update(
+            phone_number, status, expected_status
+        )
+        self.writes.append(SQLiteWrite(sql, parameters, conditional=True))
+        return self.writes[-1]
+
+    def update_message_attributes(
+        self, message_id: str, attributes: UpdateChatMessageAttributes
+    ) -> SQLiteWrite:
+        # Nothing to set is a write that trivially succeeds
+        sql, parameters = get_message_attributes_update(message_id, attributes) or (
+            None,
+            [],
+        )
+        self.writes.append(SQLiteWrite(sql, parameters, conditional=False))
+        return self.writes[-1]
+
+    async def commit(self, atomic: bool = True) -> bool:
+        writes, self.writes = self.writes, []
+        statements = [(w.sql, w.parameters) for w in writes if w.sql]
+        row_counts = iter(
+            await asyncio.to_thread(self.storage._execute_transaction, statements)
+            if statements
+            else []
+        )
+        for write in writes:
+            row_count = next(row_counts) if write.sql else 0
+            write.applied = row_count > 0 or not write.conditional
+        return all(w.applied for w in writes)
+
+
+class SQLiteStorage:
+    """
+    Stores everything in one SQLite database file in WAL mode.
+
+    A single connection is shared behind a lock and used from worker threads, so the
+    event loop is never blocked on disk I/O. WAL lets readers in other processes (e.g.
+    an analytics shell) run alongside the writer.
+    """
+
+    def __init__(self, database_path: str):
+        self.database_path = database_path
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(
+            database_path, check_same_thread=False, isolation_level=None
+        )
+        self._connection.row_factory = sqlite3.Row
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.executescript(SCHEMA)
+        logger.info(f"Opened SQLite storage at {database_path}")
+
+    def _execute(self, sql: str, parameters: Any = ()) -> list[sqlite3.Row]:
+        with self._lock:
+            return self._connection.execute(sql, parameters).fetchall()
+
+    def _execute_update(self, sql: str, parameters: Any = ()) -> int:
+        with self._lock:
+            return self._connection.execute(sql, parameters).rowcount
+
+    def _execute_transaction(self, statements: list[tuple[str, Any]]) -> list[int]:
+        with self._lock:
+            self._connection.execute("BEGIN")
+            try:
+                row_counts = [
+                    self._connection.execute(sql, parameters).rowcount
+                    for sql, parameters in statements
+                ]
+            except Exception:
+                self._connection.execute("ROLLBACK")
+                raise
+            self._connection.execute("COMMIT")
+            return row_counts
+
+    async def execute(self, sql: str, parameters: Any = ()) -> list[sqlite3.Row]:
+        """Run a query on a worker thread and return its rows."""
+        return await asyncio.to_thread(self._execute, sql, parameters)
+
+    async def execute_update(self, sql: str, parameters: Any = ()) -> int:
+        """Run a write on a worker thread and return the number of changed rows."""
+        return await asyncio.to_thread(self._execute_update, sql, parameters)
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
+
+    async def get_customer(self, phone_number: str) -> Customer | None:
+        rows = await self.execute(
+            "SELECT * FROM customers WHERE phone_number = ?", (phone_number,)
+        )
+        return to_customer(rows[0]) if rows else None
+
+    async def get_customers(self, phone_numbers: list[str]) -> dict[str, Customer]:
+        if not phone_numbers:
+            return {}
+        placeholders = ", ".join("?" for _ in phone_numbers)
+        rows = await self.execute(
+            f"SELECT * FROM customers WHERE phone_number IN ({placeholders})",
+            phone_numbers,
+        )
+        return {row["phone_number"]: to_customer(row) for row in rows}
+
+    async def create_customer(self, customer: Customer):
+        if customer.created_at is None or customer.updated_at is None:
+            now = datetime.now(tz=timezone.utc).isoformat()
+            customer.created_at = now
+            customer.updated_at = now
+        item = customer.as_dict()
+        await self.execute_update(
+            f"INSERT OR REPLACE INTO customers ({', '.join(item)}) VALUES ({', '.join('?' for _ in item)})",
+            list(item.values()),
+        )
+
+    async def get_or_create_customer(
+        self,
+        phone_number: str,
+        first_name: str = "Unknown",
+        last_name: str = "Customer",
+        most_recent_campaign_id: str | None = None,
+        known_updated_at: str | None = None,
+    ) -> Customer:
+        now = datetime.now(tz=timezone.utc).isoformat()
+        await self.execute_update(
+            "INSERT OR IGNORE INTO customers VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (
+                phone_number,
+                first_name,
+                last_name,
+                CustomerStatus.AUTOMATED.value,
+                now,
+                now,
+                most_recent_campaign_id,
+            ),
+        )
+        return await self.get_customer(phone_number)
+
+    async def update_customer_status(
+        self,
+        phone_number: str,
+        status: CustomerStatus,
+        expected_status: CustomerStatus | None = None,
+    ) -> Customer | None:
+        sql, parameters = get_customer_status_update(
+            phone_number, status, expected_status
+        )
+        if not await self.execute_update(sql, parameters):
+            return None
+        return await self.get_customer(phone_number)
+
+    async def get_campaign(self, campaign_id: str) -> Campaign | None:
+        rows = await self.execute(
+            "SELECT campaign_id, name, campaign_details FROM campaigns WHERE campaign_id = ?",
+            (campaign_id,),
+        )
+        return Campaign(**rows[0]) if rows else None
+
+    async def get_campaigns(self, campaign_ids: list[str]) -> dict[str, Campaign]:
+        if not campaign_ids:
+            return {}
+        placeholders = ", ".join("?" for _ in campaign_ids)
+        rows = await self.execute(
+            f"SELECT campaign_id, name, campaign_details FROM campaigns WHERE campaign_id IN ({placeholders})",
+            campaign_ids,
+        )
+        return {row["campaign_id"]: Campaign(**row) for row in rows}
+
+    async def create_campaign(self, campaign: CreateCampaignInput) -> str:
+        campaign.campaign_id = campaign.campaign_id or str(uuid.uuid4())
+        await self.execute_update(
+            "INSERT OR REPLACE INTO campaigns VALUES (?, ?, ?, ?)",
+            (
+                campaign.campaign_id,
+                campaign.name,
+                campaign.message_template,
+                campaign.campaign_details,
+            ),
+        )
+        return campaign.campaign_id
+
+    async def add_message(self, message: AddMessageInput) -> str:
+        message.id = message.id or str(uuid.uuid4())
+        item = message.as_dict()
+        await self.execute_update(
+            f"INSERT INTO chat_history ({', '.join(item)}) VALUES ({', '.join('?' for _ in item)})",
+            list(item.values()),
+        )
+        return message.id
+
+    async def get_conversation_history(
+        self, phone_number: str, campaign_id: str | None = None, skip_last: bool = False
+    ) -> list[HistoryMessage]:
+        if not campaign_id:
+            return []
+        rows = await self.execute(
+            f"SELECT {HISTORY_COLUMNS} FROM chat_history"
+            " WHERE phone_number = ? AND campaign_id = ? ORDER BY timestamp",
+            (phone_number, campaign_id),
+        )
+        messages = [to_history_message(row) for row in rows]
+        return messages[:-1] if skip_last else messages
+
+    async def get_recent_conversation_history(
+        self, phone_number: str, campaign_id: str, limit: int, skip_last: bool = False
+    ) -> list[HistoryMessage]:
+        rows = await self.execute(
+            f"SELECT {HISTORY_COLUMNS} FROM chat_history"
+            " WHERE phone_number = ? AND campaign_id = ? ORDER BY timestamp DESC LIMIT ?",
+            (phone_number, campaign_id, limit + 1 if skip_last else limit),
+        )
+        messages = [to_history_message(row) for row in reversed(rows)]
+        return messages[:-1] if skip_last else messages
+
+    async def get_messages_between(
+        self, phone_number: str, campaign_id: str, after: str | None, before: str
+    ) -> list[HistoryMessage]:
+        rows = await self.execute(
+            f"SELECT {HISTORY_COLUMNS} FROM chat_history"
+            " WHERE phone_number = ? AND campaign_id = ? AND timestamp > ? AND timestamp < ?"
+            " ORDER BY timestamp",
+            (phone_number, campaign_id, after or "", before),
+        )
+        return [to_history_message(row) for row in rows]
+
+    async def update_message_attributes(
+        self, message_id: str, attributes: UpdateChatMessageAttributes
+    ):
+        update = get_message_attributes_update(message_id, attributes)
+        if update:
+            await self.execute_update(*update)
+
+    async def get_archived_conversation(
+        self, phone_number: str, campaign_id: str, archived_at: str
+    ) -> list[HistoryMessage] | None:
+        # Local chat history is never archived, so there is nothing to restore
+        return None
+
+    async def rehydrate_conversation(
+        self, phone_number: str, campaign_id: str
+    ) -> list[HistoryMessage]:
+        return []
+
+    async def get_conversation_summary(
+        self, campaign_id: str, phone_number: str
+    ) -> ConversationSummary | None:
+        rows = await self.execute(
+            "SELECT conversation_summary, summarized_through FROM campaign_customers"
+            " WHERE campaign_id = ? AND phone_number = ? AND conversation_summary IS NOT NULL",
+            (campaign_id, phone_number),
+        )
+        return ConversationSummary(**rows[0]) if rows else None
+
+    async def update_conversation_summary(
+        self, campaign_id: str, phone_number: str, summary: ConversationSummary
+    ) -> bool:
+        # No campaign customer records are written locally, so the record is upserted
+        await self.execute_update(
+            "INSERT INTO campaign_customers VALUES (?, ?, ?, ?, ?)"
+            " ON CONFLICT (campaign_id, phone_number) DO UPDATE SET"
+            " conversation_summary = excluded.conversation_summary,"
+            " summarized_through = excluded.summarized_through,"
+            " updated_at = excluded.updated_at",
+            (
+                campaign_id,
+                phone_number,
+                summary.conversation_summary,
+                summary.summarized_through,
+                datetime.now(tz=timezone.utc).isoformat(),
+            ),
+        )
+        return True
+
+    def unit_of_work(self) -> SQLiteUnitOfWork:
+        return SQLiteUnitOfWork(self)
@@ -1,6 +1,7 @@
 """Utility functions for AWS configuration, HTTP requests, and datetime formatting."""
 
 import os
+import unicodedata
 from datetime import datetime, timedelta, timezone
 from typing import Any, Dict
 
@@ -37,6 +38,16 @@ def get_boto3_session_config() -> Dict[str, Any]:
     return config
 
 
+def is_lazy_init_enabled() -> bool:
+    """Whether AWS clients and table checks are deferred from import time to first use."""
+    return os.environ.get("AGENT_LAZY_INIT", "false").lower() == "true"
+
+
+def get_storage_backend_name() -> str:
+    """Storage backend of customers, campaigns and chat history: dynamodb, sqlite or memory."""
+    return os.environ.get("STORAGE_BACKEND", "dynamodb").lower()
+
+
 def get_dynamodb_resource_config() -> Dict[str, Any]:
     """Get DynamoDB resource configuration for local or AWS environments."""
     config = {}
@@ -45,6 +56,13 @@ def get_dynamodb_resource_config() -> Dict[str, Any]:
     return config
 
 
+def normalize_text(text: str) -> str:
+    """Normalize case, whitespace and punctuation so trivially different texts compare equal."""
+    text = unicodedata.normalize("NFKC", text).casefold()
+    text = "".join(ch for ch in text if not unicodedata.category(ch).startswith("P"))
+    return " ".join(text.split())
+
+
 def get_request(url, params=None, headers=None):
     """
     Make a GET request to the specified URL with optional parameters and headers.
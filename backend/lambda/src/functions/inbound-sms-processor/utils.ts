@@ -103,6 +103,8 @@ async function processInboundMessage(smsMessage: InboundSMSMessage): Promise<voi
                     message: smsMessage.messageBody,
                     message_id: dbMessage.id,
                     customer_id: normalizedPhone,
+                    // Lets the agent detect a stale cached customer without re-reading it
+                    customer_updated_at: customer.updated_at,
                 })
             );
         } catch (error) {
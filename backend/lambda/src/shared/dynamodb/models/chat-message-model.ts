@@ -13,6 +13,9 @@ export class ChatMessageModel {
       ...message,
       id: messageId,
       timestamp: now,
+      ...(message.campaign_id && {
+        phone_number_campaign_id: `${message.phone_number}#${message.campaign_id}`,
+      }),
     };
 
     await dynamoDBDocumentClient.send(
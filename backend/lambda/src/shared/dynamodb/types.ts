@@ -51,6 +51,8 @@ export interface DbCampaign extends CampaignMetrics {
   sent_count: number;
   status?: CampaignStatus;
   sent_at?: string;
+  // Set once the campaign's chat history was archived, see agent/dynamodb/retention.py
+  archived_at?: string;
   created_at: string;
   updated_at: string;
 }
@@ -76,15 +78,19 @@ export interface DbChatMessage {
   sent_at?: string;
   response_type?: ChatMessageResponseType;
   campaign_id?: string;
+  // `${phone_number}#${campaign_id}`, partition key of the phone_number_campaign_id-timestamp-index
+  phone_number_campaign_id?: string;
   status?: ChatMessageStatus;
   should_handoff?: boolean;
   handoff_reason?: string;
   user_sentiment?: UserSentiment;
   external_message_id?: string;
   error_message?: string;
+  // TTL in epoch seconds, set once the message was archived
+  expires_at?: number;
 }
 
-export type CreateDbChatMessage = Omit<DbChatMessage, 'id' | 'timestamp'>;
+export type CreateDbChatMessage = Omit<DbChatMessage, 'id' | 'timestamp' | 'phone_number_campaign_id' | 'expires_at'>;
 
 /**
  * CAMPAIGN CUSTOMER MODEL AND TYPES
@@ -96,8 +102,13 @@ export interface DbCampaignCustomer {
   campaign_id: string;
   phone_number: string;
   status: CampaignCustomerStatus;
+  conversation_summary?: string; // Rolling summary written by the agent in windowed history mode
+  summarized_through?: string;
   created_at: string;
   updated_at: string;
 }
 
-export type CreateDbCampaignCustomer = Omit<DbCampaignCustomer, TimestampMetadataKeys>;
+export type CreateDbCampaignCustomer = Omit<
+  DbCampaignCustomer,
+  TimestampMetadataKeys | 'conversation_summary' | 'summarized_through'
+>;
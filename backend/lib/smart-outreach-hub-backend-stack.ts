@@ -2,6 +2,7 @@ import * as cdk from 'aws-cdk-lib';
 import * as dynamodb from 'aws-cdk-lib/aws-dynamodb';
 import * as sns from 'aws-cdk-lib/aws-sns';
 import * as sqs from 'aws-cdk-lib/aws-sqs';
+import * as s3 from 'aws-cdk-lib/aws-s3';
 import * as snsSubscriptions from 'aws-cdk-lib/aws-sns-subscriptions';
 import * as lambda from 'aws-cdk-lib/aws-lambda';
 import * as lambdaEventSources from 'aws-cdk-lib/aws-lambda-event-sources';
@@ -162,6 +163,8 @@ export class SmartOutreachHubBackendStack extends cdk.Stack {
                 name: 'id',
                 type: dynamodb.AttributeType.STRING,
             },
+            // Set on messages of archived campaigns, see agent/dynamodb/retention.py
+            timeToLiveAttribute: 'expires_at',
             billingMode: dynamodb.BillingMode.PAY_PER_REQUEST,
             removalPolicy: cdk.RemovalPolicy.DESTROY,
             pointInTimeRecoverySpecification: {
@@ -182,6 +185,37 @@ export class SmartOutreachHubBackendStack extends cdk.Stack {
             },
         });
 
+        // Add GSI for querying one campaign's conversation with a phone number
+        chatTable.addGlobalSecondaryIndex({
+            indexName: 'phone_number_campaign_id-timestamp-index',
+            partitionKey: {
+                name: 'phone_number_campaign_id',
+                type: dynamodb.AttributeType.STRING,
+            },
+            sortKey: {
+                name: 'timestamp',
+                type: dynamodb.AttributeType.STRING,
+            },
+        });
+
+        // Cold tier of chat history, partitioned by campaign and phone number
+        const chatArchiveBucket = new s3.Bucket(this, 'ChatArchiveBucket', {
+            encryption: s3.BucketEncryption.S3_MANAGED,
+            blockPublicAccess: s3.BlockPublicAccess.BLOCK_ALL,
+            enforceSSL: true,
+            lifecycleRules: [
+                {
+                    transitions: [
+                        {
+                            storageClass: s3.StorageClass.INFREQUENT_ACCESS,
+                            transitionAfter: cdk.Duration.days(30),
+                        },
+                    ],
+                },
+            ],
+            removalPolicy: cdk.RemovalPolicy.RETAIN,
+        });
+
         const campaignTable = new dynamodb.Table(this, 'CampaignTable', {
             tableName: 'outreach-campaigns',
             partitionKey: {
@@ -402,6 +436,10 @@ export class SmartOutreachHubBackendStack extends cdk.Stack {
                 DYNAMODB_CHAT_TABLE: chatTable.tableName,
                 DYNAMODB_CAMPAIGN_TABLE: campaignTable.tableName,
                 DYNAMODB_CAMPAIGN_CUSTOMER_TABLE: campaignCustomerTable.tableName,
+                // Flip to 'true' once migrations/backfill_phone_campaign_index.py has run
+                CHAT_HISTORY_USE_CAMPAIGN_INDEX: 'false',
+                // Chat history archive
+                CHAT_ARCHIVE_URI: `s3://${chatArchiveBucket.bucketName}/chat-history`,
                 // SQS Queues
                 OUTBOUND_SMS_QUEUE_URL: outboundSmsQueue.queueUrl,
                 // Pydantic AI Configuration
@@ -417,6 +455,7 @@ export class SmartOutreachHubBackendStack extends cdk.Stack {
         chatTable.grantReadWriteData(aiAgentFunction);
         campaignTable.grantReadWriteData(aiAgentFunction);
         campaignCustomerTable.grantReadWriteData(aiAgentFunction);
+        chatArchiveBucket.grantReadWrite(aiAgentFunction);
 
         // Grant Bedrock permissions to AI Agent function
         aiAgentFunction.addToRolePolicy(new iam.PolicyStatement({